@@ -0,0 +1,236 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL = 600.0
+
+
+def normalize(value: Any) -> Any:
+    """Canonical form of a request body: integral floats become ints, tuples become lists"""
+    if isinstance(value, dict):
+        return {str(k): normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def cache_key(namespace: str, payload: Any, version: str = '') -> str:
+    canonical = json.dumps(normalize(payload), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(f"{namespace}\0{version}\0{canonical}".encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    按请求内容寻址的结果缓存
+    - 进程内 LRU：条目数、总字节数和 TTL 三种淘汰条件
+    - 可选磁盘层（directory），多个 uvicorn 进程共享；写入先写临时文件再 os.replace，读到的总是完整文件
+    - 同一进程内相同 key 的并发请求只计算一次，其余请求等待同一个结果
+    计算抛出的异常不缓存，会传给所有等待者
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl: float = DEFAULT_TTL, directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._entries: 'OrderedDict[str, Tuple[float, int, Any]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'inflight_waits': 0, 'evictions': 0}
+
+    @classmethod
+    def from_env(cls) -> 'ResultCache':
+        return cls(
+            max_entries=int(os.environ.get('RESULT_CACHE_SIZE', DEFAULT_MAX_ENTRIES)),
+            max_bytes=int(os.environ.get('RESULT_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+            ttl=float(os.environ.get('RESULT_CACHE_TTL', DEFAULT_TTL)),
+            directory=os.environ.get('RESULT_CACHE_DIR') or None,
+        )
+
+    # 进程内 LRU
+    def _memory_get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] < time.time():
+            self._remove(key)
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry[2]
+
+    def _memory_put(self, key: str, value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.time() + self.ttl, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.counters['evictions'] += 1
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    # 磁盘层
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _disk_get(self, key: str) -> Tuple[bool, Any, int]:
+        if not self.directory:
+            return False, None, 0
+        path = self._disk_path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+            entry = json.loads(text)
+        except (OSError, ValueError):
+            return False, None, 0
+        if entry['expires_at'] < time.time():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            return False, None, 0
+        return True, entry['value'], len(text)
+
+    def _disk_put(self, key: str, serialized: str, expires_at: float) -> None:
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(f'{{"expires_at":{expires_at},"value":{serialized}}}')
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.error(f"写入磁盘缓存失败: {str(e)}")
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            found, value = self._memory_get(key)
+            if found:
+                self.counters['memory_hits'] += 1
+                return True, value
+        found, value, size = self._disk_get(key)
+        if found:
+            with self._lock:
+                self.counters['disk_hits'] += 1
+                self._memory_put(key, value, size)
+        return found, value
+
+    def put(self, key: str, value: Any) -> None:
+        try:
+            serialized = json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+        except (TypeError, ValueError):
+            logger.warning(f"结果无法序列化，不缓存: {key}")
+            return
+        with self._lock:
+            self._memory_put(key, value, len(serialized))
+        if self.directory:
+            self._disk_put(key, serialized, time.time() + self.ttl)
+
+    def _claim(self, key: str) -> Tuple[Future, bool]:
+        """Return (future, True) if the caller must compute, (future, False) to wait for another caller"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.counters['inflight_waits'] += 1
+                return future, False
+            future = self._inflight[key] = Future()
+            self.counters['misses'] += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, value: Any = None, error: Optional[BaseException] = None) -> None:
+        if error is None:
+            self.put(key, value)
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is None:
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+
+    def get_or_compute(self, namespace: str, payload: Any, compute: Callable[[], Any], version: str = '') -> Any:
+        """Cached compute() for synchronous callers (FastAPI runs sync endpoints in a thread pool)"""
+        key = cache_key(namespace, payload, version)
+        found, value = self.get(key)
+        if found:
+            return value
+        future, owner = self._claim(key)
+        if not owner:
+            return future.result()
+        try:
+            value = compute()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, value)
+        return value
+
+    async def get_or_compute_async(self, namespace: str, payload: Any, compute: Callable[[], Any],
+                                   version: str = '') -> Any:
+        """Same as get_or_compute for async endpoints; compute() runs in a worker thread"""
+        key = cache_key(namespace, payload, version)
+        found, value = self.get(key)
+        if found:
+            return value
+        future, owner = self._claim(key)
+        if not owner:
+            return await asyncio.wrap_future(future)
+        try:
+            value = await asyncio.to_thread(compute)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.directory:
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith('.json'):
+                        os.unlink(os.path.join(root, name))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters['memory_hits'] + self.counters['disk_hits'] + self.counters['misses']
+            hits = lookups - self.counters['misses']
+            return {
+                **self.counters,
+                'hit_rate': round(hits / lookups, 4) if lookups else None,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'disk_directory': self.directory,
+            }
+
+
+# 各路由共用的缓存实例
+result_cache = ResultCache.from_env()
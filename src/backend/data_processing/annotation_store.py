@@ -0,0 +1,192 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+REFERENCE_DIR = os.path.join(os.path.dirname(__file__), 'reference')
+# 数据库放在临时目录（源码目录可能只读）；用 ANNOTATION_DB_PATH 指定持久位置
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), 'sars_cov2_annotations.sqlite3')
+# 新建数据库时导入的初始注释（原 main.KNOWN_MUTATIONS）
+SEED_FILE = os.path.join(REFERENCE_DIR, 'known_mutations.csv')
+
+MUTATION_RE = re.compile(r'^([A-Za-z0-9]+):([A-Z*])(\d+)([A-Z*])$')
+# 每条 SQL 最多绑定的 (gene, position, alt) 组数，避免超出 SQLite 变量数上限
+LOOKUP_BATCH = 300
+IMPORT_BATCH = 10000
+FIELDS = ('gene', 'position', 'ref', 'alt', 'impact', 'description', 'frequency', 'notes')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS annotations (
+    gene TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    alt TEXT NOT NULL,
+    ref TEXT NOT NULL,
+    impact TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    frequency REAL,
+    notes TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (gene, position, alt)
+) WITHOUT ROWID;
+"""
+
+
+def split_mutation(mutation: str) -> Optional[Tuple[str, int, str, str]]:
+    """'S:D614G' -> ('S', 614, 'D', 'G')"""
+    match = MUTATION_RE.match(mutation.strip())
+    if not match:
+        return None
+    gene, ref, pos, alt = match.groups()
+    return gene, int(pos), ref, alt
+
+
+class AnnotationStore:
+    """
+    按 (gene, position, alt) 聚簇索引的 SQLite 突变注释库
+    打开数据库不读取数据，启动耗时与注释条数无关；查询都走主键索引
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, seed_file: Optional[str] = SEED_FILE):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        if seed_file and conn.execute("SELECT 1 FROM annotations LIMIT 1").fetchone() is None:
+            self.import_file(seed_file)
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            'mutation': f"{row['gene']}:{row['ref']}{row['position']}{row['alt']}",
+            'gene': row['gene'],
+            'position': row['position'],
+            'impact': row['impact'],
+            'description': row['description'],
+            'frequency': row['frequency'],
+            'notes': row['notes'],
+        }
+
+    def bulk_import(self, records: Iterable[Dict[str, Any]], replace: bool = True) -> int:
+        """Insert annotation dicts (FIELDS keys, or 'mutation' instead of gene/position/ref/alt) in one transaction"""
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT OR IGNORE'
+        sql = f"{verb} INTO annotations (gene, position, alt, ref, impact, description, frequency, notes) " \
+              f"VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+        conn = self._conn()
+        count = 0
+        batch = []
+        with conn:
+            for record in records:
+                if record.get('mutation'):
+                    parsed = split_mutation(record['mutation'])
+                    if parsed is None:
+                        raise ValueError(f"Invalid mutation: {record['mutation']}")
+                    gene, position, ref, alt = parsed
+                else:
+                    gene, position, ref, alt = record['gene'], int(record['position']), record['ref'], record['alt']
+                frequency = record.get('frequency')
+                batch.append((
+                    gene, position, alt, ref, record.get('impact') or 'Unknown', record.get('description') or '',
+                    float(frequency) if frequency not in (None, '') else None, record.get('notes') or ''
+                ))
+                if len(batch) >= IMPORT_BATCH:
+                    conn.executemany(sql, batch)
+                    count += len(batch)
+                    batch.clear()
+            conn.executemany(sql, batch)
+            count += len(batch)
+        return count
+
+    def import_file(self, path: str, replace: bool = True) -> int:
+        """Bulk import from CSV/TSV (header row) or JSON lines"""
+        with open(path, newline='', encoding='utf-8') as f:
+            if path.endswith(('.jsonl', '.ndjson')):
+                return self.bulk_import((json.loads(line) for line in f if line.strip()), replace)
+            delimiter = '\t' if path.endswith(('.tsv', '.tab')) else ','
+            return self.bulk_import(csv.DictReader(f, delimiter=delimiter), replace)
+
+    def get(self, mutation: str) -> Optional[Dict[str, Any]]:
+        parsed = split_mutation(mutation)
+        if parsed is None:
+            return None
+        gene, position, ref, alt = parsed
+        row = self._conn().execute(
+            "SELECT * FROM annotations WHERE gene = ? AND position = ? AND alt = ?", (gene, position, alt)
+        ).fetchone()
+        # 主键不含参考残基；参考残基不一致的写法（如 S:X614G）不是同一个突变
+        return self._row_to_dict(row) if row is not None and row['ref'] == ref else None
+
+    def lookup_many(self, mutations: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Annotations for a whole mutation list: {mutation: annotation} for the annotated ones (reference residue must match)"""
+        keys: Dict[Tuple[str, int, str], List[Tuple[str, str]]] = {}
+        for mutation in mutations:
+            parsed = split_mutation(mutation)
+            if parsed is not None:
+                keys.setdefault((parsed[0], parsed[1], parsed[3]), []).append((mutation, parsed[2]))
+        found = {}
+        items = list(keys)
+        conn = self._conn()
+        for i in range(0, len(items), LOOKUP_BATCH):
+            batch = items[i:i + LOOKUP_BATCH]
+            values = ', '.join(['(?, ?, ?)'] * len(batch))
+            rows = conn.execute(
+                f"SELECT * FROM annotations WHERE (gene, position, alt) IN (VALUES {values})",
+                [value for key in batch for value in key]
+            )
+            for row in rows:
+                annotation = self._row_to_dict(row)
+                for mutation, ref in keys[(row['gene'], row['position'], row['alt'])]:
+                    if ref == row['ref']:
+                        found[mutation] = {**annotation, 'mutation': mutation}
+        return found
+
+    def range(self, gene: str, start: int, end: int, impact: Optional[str] = None,
+              limit: int = 1000, offset: int = 0) -> List[Dict[str, Any]]:
+        """All annotations of `gene` with start <= position <= end, ordered by position"""
+        sql = "SELECT * FROM annotations WHERE gene = ? AND position BETWEEN ? AND ?"
+        params: List[Any] = [gene, start, end]
+        if impact:
+            sql += " AND impact = ?"
+            params.append(impact)
+        sql += " ORDER BY position, alt LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        return [self._row_to_dict(row) for row in self._conn().execute(sql, params)]
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM annotations").fetchone()[0]
+
+    def iter_all(self) -> Iterator[Dict[str, Any]]:
+        for row in self._conn().execute("SELECT * FROM annotations ORDER BY gene, position, alt"):
+            yield self._row_to_dict(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the mutation annotation store')
+    parser.add_argument('--db', default=os.environ.get('ANNOTATION_DB_PATH', DEFAULT_DB_PATH))
+    sub = parser.add_subparsers(dest='command', required=True)
+    load = sub.add_parser('import', help='bulk import CSV/TSV/JSONL annotations')
+    load.add_argument('files', nargs='+')
+    load.add_argument('--keep-existing', action='store_true', help='do not overwrite existing annotations')
+    sub.add_parser('count', help='print the number of annotations')
+    args = parser.parse_args()
+
+    store = AnnotationStore(args.db)
+    if args.command == 'import':
+        for path in args.files:
+            print(f"{path}: {store.import_file(path, replace=not args.keep_existing)} annotations")
+    print(f"{args.db}: {store.count()} annotations")
+
+
+if __name__ == '__main__':
+    main()
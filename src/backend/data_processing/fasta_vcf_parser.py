@@ -1,6 +1,17 @@
 import re
 import csv
+import codecs
+import mmap
+import os
 from io import StringIO
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+# 流式读取上传文件时每次读取的字节数
+CHUNK_SIZE = 1 << 20
+# 输出 FASTA 时每行的碱基数（与参考基因组文件一致）
+FASTA_LINE_WIDTH = 70
 
 def parse_fasta(content: str):
     """Parse FASTA format string, return list of dicts: [{id, sequence}]"""
@@ -22,6 +33,274 @@ def parse_fasta(content: str):
         records.append({'id': seq_id, 'sequence': ''.join(seq_lines)})
     return records
 
+class LineStream:
+    """Split a stream of byte chunks into decoded lines, carrying partial lines across chunk boundaries"""
+
+    def __init__(self, encoding: str = 'utf-8'):
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._pending = ''  # 还没有遇到换行符的半行
+        self.bytes_read = 0
+
+    def feed(self, chunk: bytes) -> List[str]:
+        self.bytes_read += len(chunk)
+        lines = (self._pending + self._decoder.decode(chunk)).splitlines(True)
+        # 最后一行可能被截断在块边界上，留到下一块再处理
+        if lines and lines[-1].splitlines() == [lines[-1]]:
+            self._pending = lines.pop()
+        else:
+            self._pending = ''
+        return lines
+
+    def close(self) -> List[str]:
+        tail = self._pending + self._decoder.decode(b'', final=True)
+        self._pending = ''
+        return [tail] if tail else []
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Yield decoded lines (with line endings) from an iterable of byte chunks"""
+    stream = LineStream()
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.close()
+
+class FastaStreamParser:
+    """Incremental FASTA parser: feed byte chunks, get complete {id, sequence} records back as they finish"""
+
+    def __init__(self, encoding: str = 'utf-8'):
+        self._lines = LineStream(encoding)
+        self._seq_id = None
+        self._seq_lines: List[str] = []
+
+    @property
+    def bytes_read(self) -> int:
+        return self._lines.bytes_read
+
+    def feed(self, chunk: bytes) -> Iterator[Dict[str, str]]:
+        return self._consume(self._lines.feed(chunk))
+
+    def close(self) -> Iterator[Dict[str, str]]:
+        yield from self._consume(self._lines.close())
+        if self._seq_id is not None:
+            yield {'id': self._seq_id, 'sequence': ''.join(self._seq_lines)}
+            self._seq_id = None
+            self._seq_lines = []
+
+    def _consume(self, lines: List[str]) -> Iterator[Dict[str, str]]:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('>'):
+                if self._seq_id is not None:
+                    yield {'id': self._seq_id, 'sequence': ''.join(self._seq_lines)}
+                self._seq_id = line[1:].split()[0]
+                self._seq_lines = []
+            else:
+                self._seq_lines.append(line)
+
+def iter_fasta(chunks: Iterable[bytes]) -> Iterator[Dict[str, str]]:
+    """Yield FASTA records one at a time from an iterable of byte chunks"""
+    parser = FastaStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+# .fai 每行：名称、碱基数、首个碱基的字节偏移、每行碱基数、每行字节数（含换行符）
+FaiEntry = Tuple[str, int, int, int, int]
+
+class _FaiRecord:
+    __slots__ = ('name', 'offset', 'length', 'linebases', 'linewidth', 'short_seen', 'keep')
+
+    def __init__(self, name: str, offset: int, keep: bool):
+        self.name = name
+        self.offset = offset
+        self.length = 0
+        self.linebases: Optional[int] = None
+        self.linewidth: Optional[int] = None
+        # 已出现过短于 linebases 的行：之后只允许空行，否则无法按偏移随机访问
+        self.short_seen = False
+        self.keep = keep
+
+class FastaIndexer:
+    """
+    一次流式扫描建立与 samtools faidx 兼容的 .fai 索引
+    只按字节偏移记账，不解码、不拼接序列；每块内的换行位置和行长用 numpy 整块计算，
+    跨块的半行只记长度（标题行除外），内存占用与文件大小和行长无关
+    行长不一致（除每条记录的最后一行外）时抛出 ValueError，与 samtools 一致
+    """
+
+    def __init__(self):
+        self.entries: List[FaiEntry] = []
+        self.duplicates = 0
+        self._names = set()
+        self._record: Optional[_FaiRecord] = None
+        self._offset = 0  # 当前块起点在整个文件中的字节偏移
+        self._partial = 0  # 上一块末尾未结束的行已读的字节数
+        self._partial_header: Optional[bytearray] = None  # 未结束的行是标题行时保存其内容
+        self._partial_cr = False  # 未结束的行最后一个字节是否为 '\r'
+
+    def feed(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        buf = np.frombuffer(chunk, dtype=np.uint8)
+        newlines = np.flatnonzero(buf == 10)
+        if not newlines.size:
+            self._carry(chunk, buf)
+            self._offset += len(chunk)
+            return
+
+        starts = np.empty(newlines.size, dtype=np.int64)
+        starts[0] = 0
+        starts[1:] = newlines[:-1] + 1
+        widths = newlines - starts + 1
+        widths[0] += self._partial
+        before = buf[np.maximum(newlines - 1, 0)]
+        cr = before == 13
+        if newlines[0] == 0:
+            cr[0] = self._partial_cr
+        bases = widths - 1 - cr
+        header = buf[starts] == ord('>')
+        if self._partial:
+            header[0] = self._partial_header is not None
+        elif newlines[0] == 0:
+            header[0] = False
+
+        line = 0
+        for h in np.flatnonzero(header):
+            self._add_lines(widths[line:h], bases[line:h])
+            if h == 0 and self._partial:
+                text = bytes(self._partial_header) + chunk[:newlines[0]]
+            else:
+                text = chunk[starts[h]:newlines[h]]
+            self._start_record(text, self._offset + int(newlines[h]) + 1)
+            line = h + 1
+        self._add_lines(widths[line:], bases[line:])
+
+        self._partial = 0
+        self._partial_header = None
+        self._partial_cr = False
+        tail = chunk[newlines[-1] + 1:]
+        if tail:
+            self._carry(tail, buf[newlines[-1] + 1:])
+        self._offset += len(chunk)
+
+    def _carry(self, data: bytes, buf: np.ndarray) -> None:
+        """Remember an unterminated line: its length, plus its bytes when it is a header"""
+        if self._partial == 0 and data[:1] == b'>':
+            self._partial_header = bytearray()
+        if self._partial_header is not None:
+            self._partial_header += data
+        self._partial += len(data)
+        self._partial_cr = bool(buf[-1] == 13)
+
+    def _start_record(self, header: bytes, offset: int) -> None:
+        self._finish_record()
+        fields = header[1:].split(None, 1)
+        name = fields[0].decode('utf-8', errors='replace') if fields else ''
+        # 与 samtools 相同：重名的记录只保留第一条
+        keep = bool(name) and name not in self._names
+        if name and not keep:
+            self.duplicates += 1
+        self._names.add(name)
+        self._record = _FaiRecord(name, offset, keep)
+
+    def _add_lines(self, widths: np.ndarray, bases: np.ndarray) -> None:
+        record = self._record
+        if record is None or not len(widths):
+            return
+        if record.linewidth is None:
+            record.linebases, record.linewidth = int(bases[0]), int(widths[0])
+        if record.short_seen:
+            if bases.any():
+                raise ValueError(f"{record.name}: 行长度不一致，无法建立索引")
+        else:
+            mismatch = np.flatnonzero((widths != record.linewidth) | (bases != record.linebases))
+            if mismatch.size:
+                k = mismatch[0]
+                if bases[k] > record.linebases or bases[k + 1:].any():
+                    raise ValueError(f"{record.name}: 行长度不一致，无法建立索引")
+                record.short_seen = True
+        record.length += int(bases.sum())
+
+    def _finish_record(self) -> None:
+        record = self._record
+        if record is not None and record.keep:
+            self.entries.append((record.name, record.length, record.offset,
+                                 record.linebases or 0, record.linewidth or 0))
+        self._record = None
+
+    def close(self) -> List[FaiEntry]:
+        """Finish the last record (a final line without newline counts as a full line) and return the entries"""
+        if self._partial:
+            if self._partial_header is not None:
+                self._start_record(bytes(self._partial_header), self._offset)
+            else:
+                bases = self._partial - self._partial_cr
+                self._add_lines(np.array([self._partial + 1]), np.array([bases]))
+            self._partial = 0
+            self._partial_header = None
+        self._finish_record()
+        return self.entries
+
+def wrap_sequence(sequence: bytes, line_width: int = FASTA_LINE_WIDTH) -> str:
+    """Sequence bytes as FASTA lines, each ending with a newline"""
+    lines = [sequence[i:i + line_width].decode('ascii', errors='replace') for i in range(0, len(sequence), line_width)]
+    return '\n'.join(lines) + '\n' if lines else ''
+
+def format_fasta(header: str, sequence: bytes, line_width: int = FASTA_LINE_WIDTH) -> str:
+    return f">{header}\n" + wrap_sequence(sequence, line_width)
+
+def write_fai(entries: Iterable[FaiEntry], path: str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write('\t'.join(map(str, entry)) + '\n')
+
+def read_fai(path: str) -> Dict[str, FaiEntry]:
+    entries = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) >= 5:
+                entries.setdefault(fields[0], (fields[0], *map(int, fields[1:5])))
+    return entries
+
+class FastaIndex:
+    """
+    .fai 索引 + 内存映射的 FASTA 文件：按名称读取任意记录或区间
+    由偏移量直接算出区间所在的字节范围，耗时只与区间长度有关，与文件大小和记录数无关
+    """
+
+    def __init__(self, fasta_path: str, fai_path: Optional[str] = None):
+        self.path = fasta_path
+        self.entries = read_fai(fai_path or fasta_path + '.fai')
+        with open(fasta_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def length(self, name: str) -> int:
+        return self.entries[name][1]
+
+    def fetch(self, name: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Bases of [start, end) (0-based, end exclusive) of record `name`, case preserved; KeyError if unknown"""
+        _, length, offset, linebases, linewidth = self.entries[name]
+        end = length if end is None else min(end, length)
+        start = max(start, 0)
+        if start >= end:
+            return b''
+        first = offset + (start // linebases) * linewidth + start % linebases
+        last = offset + ((end - 1) // linebases) * linewidth + (end - 1) % linebases + 1
+        return self._data[first:last].translate(None, b'\r\n')
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
 def parse_vcf(content: str):
     """Parse VCF format string, return list of dicts: [{chrom, pos, ref, alt, info}]"""
     records = []
@@ -43,6 +322,228 @@ def parse_vcf(content: str):
         })
     return records
 
+# 三字母氨基酸缩写 -> 单字母（用于 SnpEff 的 HGVS.p 注释）
+AA_THREE_TO_ONE = {
+    'Ala': 'A', 'Arg': 'R', 'Asn': 'N', 'Asp': 'D', 'Cys': 'C', 'Gln': 'Q', 'Glu': 'E',
+    'Gly': 'G', 'His': 'H', 'Ile': 'I', 'Leu': 'L', 'Lys': 'K', 'Met': 'M', 'Phe': 'F',
+    'Pro': 'P', 'Ser': 'S', 'Thr': 'T', 'Trp': 'W', 'Tyr': 'Y', 'Val': 'V', 'Ter': '*'
+}
+HGVS_P_PATTERN = re.compile(r'p\.([A-Z][a-z]{2})(\d+)([A-Z][a-z]{2})$')
+BCSQ_AA_PATTERN = re.compile(r'^(\d+)([A-Z*])>\d+([A-Z*])$')
+AA_CHANGE_PATTERN = re.compile(r'^(?:p\.)?([A-Z])(\d+)([A-Z])$')
+
+# 列式解析时每积累多少行转换一次 NumPy 数组
+VCF_BLOCK_SIZE = 65536
+
+def info_fields(info: str) -> Dict[str, str]:
+    """Split a VCF INFO column into {key: value}; flags map to '1'"""
+    fields = {}
+    if info in ('', '.'):
+        return fields
+    for item in info.split(';'):
+        key, sep, value = item.partition('=')
+        fields[key] = value if sep else '1'
+    return fields
+
+def mutation_from_info(fields: Dict[str, str]) -> Optional[str]:
+    """
+    Build a 'gene:RefPosAlt' amino-acid mutation from variant annotations:
+    SnpEff ANN, bcftools csq BCSQ, or plain GENE + AA keys. Returns None for
+    non-missense or unannotated variants
+    """
+    for ann in fields.get('ANN', '').split(','):
+        parts = ann.split('|')
+        if len(parts) > 10:
+            match = HGVS_P_PATTERN.match(parts[10])
+            if match and parts[3]:
+                ref, pos, alt = match.groups()
+                ref, alt = AA_THREE_TO_ONE.get(ref), AA_THREE_TO_ONE.get(alt)
+                if ref and alt and ref != alt:
+                    return f"{parts[3]}:{ref}{pos}{alt}"
+    for csq in fields.get('BCSQ', '').split(','):
+        parts = csq.split('|')
+        if len(parts) > 5 and parts[0] == 'missense' and parts[1]:
+            match = BCSQ_AA_PATTERN.match(parts[5])
+            if match:
+                pos, ref, alt = match.groups()
+                return f"{parts[1]}:{ref}{pos}{alt}"
+    if 'GENE' in fields and 'AA' in fields:
+        match = AA_CHANGE_PATTERN.match(fields['AA'])
+        if match:
+            ref, pos, alt = match.groups()
+            if ref != alt:
+                return f"{fields['GENE']}:{ref}{pos}{alt}"
+    return None
+
+def genotype_carries_alt(sample_field: str) -> bool:
+    """True if the GT of a sample column contains a non-reference allele"""
+    gt = sample_field.split(':', 1)[0]
+    return any(allele not in ('0', '.', '') for allele in re.split(r'[/|]', gt))
+
+class VcfColumns:
+    """
+    Columnar VCF: one NumPy array per field instead of one dict per variant
+    chrom 以类别编码保存（chrom_codes 指向 chrom_categories）
+    """
+
+    def __init__(self, chrom_codes: np.ndarray, chrom_categories: List[str], pos: np.ndarray,
+                 ref: np.ndarray, alt: np.ndarray, info: Dict[str, np.ndarray],
+                 mutations: Optional[List[Optional[str]]], samples: List[str],
+                 genotypes: Optional[np.ndarray]):
+        self.chrom_codes = chrom_codes
+        self.chrom_categories = chrom_categories
+        self.pos = pos
+        self.ref = ref
+        self.alt = alt
+        self.info = info
+        self.mutations = mutations
+        self.samples = samples
+        self.genotypes = genotypes
+
+    def __len__(self) -> int:
+        return len(self.pos)
+
+    @property
+    def chrom(self) -> np.ndarray:
+        return np.asarray(self.chrom_categories, dtype=object)[self.chrom_codes]
+
+    def mutation_list(self) -> List[str]:
+        """All derivable amino-acid mutations, in file order (input for /ai_predict)"""
+        return [m for m in (self.mutations or []) if m is not None]
+
+    def sample_mutations(self) -> Dict[str, List[str]]:
+        """{sample: mutations carried by that sample} (input for /analyze/variants)"""
+        if self.genotypes is None or self.mutations is None:
+            return {}
+        annotated = np.array([m is not None for m in self.mutations], dtype=bool)
+        return {
+            sample: [self.mutations[i] for i in np.flatnonzero(self.genotypes[:, j] & annotated)]
+            for j, sample in enumerate(self.samples)
+        }
+
+class VcfColumnsParser:
+    """
+    Incremental columnar VCF parser: feed byte chunks, call close() for the VcfColumns
+    info_keys: INFO 键按需解析为字符串数组（缺失为 ''）
+    mutations: 根据 ANN/BCSQ/GENE+AA 注释生成 gene:RefPosAlt 突变字符串
+    genotypes: 解析样本列，得到 (变异数 x 样本数) 的携带矩阵
+    preview: 额外保留前 N 行 parse_vcf 格式的字典，用于接口预览
+    sink: 每一行的同格式字典都会传给 sink（例如逐行写入 NDJSON），不在内存中保留
+    """
+
+    def __init__(self, info_keys: Sequence[str] = (), mutations: bool = False,
+                 genotypes: bool = False, preview: int = 0,
+                 sink: Optional[Callable[[Dict[str, str]], None]] = None):
+        self._lines = LineStream()
+        self.info_keys = list(info_keys)
+        self.want_mutations = mutations
+        self.want_genotypes = genotypes
+        self.preview_limit = preview
+        self.preview: List[Dict[str, str]] = []
+        self.sink = sink
+        self._chrom_index: Dict[str, int] = {}
+        self._chrom_codes = array('i')
+        self._pos = array('i')
+        self._ref_blocks, self._alt_blocks = [], []
+        self._ref_buf, self._alt_buf = [], []
+        self._info_values = {key: [] for key in self.info_keys}
+        self._mutations: Optional[List[Optional[str]]] = [] if mutations else None
+        self._samples: List[str] = []
+        self._gt_blocks, self._gt_buf = [], []
+
+    @property
+    def bytes_read(self) -> int:
+        return self._lines.bytes_read
+
+    def feed(self, chunk: bytes) -> None:
+        self._consume(self._lines.feed(chunk))
+
+    def close(self) -> VcfColumns:
+        self._consume(self._lines.close())
+        self._flush()
+
+        def concat(blocks, dtype):
+            return np.concatenate(blocks) if blocks else np.array([], dtype=dtype)
+
+        genotypes = None
+        if self.want_genotypes:
+            n_samples = len(self._samples)
+            genotypes = concat(self._gt_blocks, bool).reshape(len(self._pos), n_samples) if n_samples \
+                else np.zeros((len(self._pos), 0), dtype=bool)
+        return VcfColumns(
+            chrom_codes=np.array(self._chrom_codes, dtype=np.int32),
+            chrom_categories=list(self._chrom_index),
+            pos=np.array(self._pos, dtype=np.int32),
+            ref=concat(self._ref_blocks, 'S1'),
+            alt=concat(self._alt_blocks, 'S1'),
+            info={key: np.array(values, dtype=str) for key, values in self._info_values.items()},
+            mutations=self._mutations,
+            samples=self._samples,
+            genotypes=genotypes,
+        )
+
+    def _flush(self) -> None:
+        if self._ref_buf:
+            self._ref_blocks.append(np.array(self._ref_buf, dtype=bytes))
+            self._alt_blocks.append(np.array(self._alt_buf, dtype=bytes))
+            self._ref_buf.clear()
+            self._alt_buf.clear()
+        if self._gt_buf:
+            self._gt_blocks.append(np.array(self._gt_buf, dtype=bool))
+            self._gt_buf.clear()
+
+    def _consume(self, lines: List[str]) -> None:
+        need_info = bool(self.info_keys) or self.want_mutations
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('#'):
+                if line.startswith('#CHROM'):
+                    self._samples = line.split('\t')[9:]
+                continue
+            fields = line.split('\t')
+            if len(fields) < 5:
+                continue
+            chrom, pos, _id, ref, alt = fields[:5]
+            info = fields[7] if len(fields) > 7 else ''
+            if self.sink is not None or len(self.preview) < self.preview_limit:
+                record = {'chrom': chrom, 'pos': pos, 'ref': ref, 'alt': alt, 'info': info}
+                if len(self.preview) < self.preview_limit:
+                    self.preview.append(record)
+                if self.sink is not None:
+                    self.sink(record)
+
+            code = self._chrom_index.get(chrom)
+            if code is None:
+                code = self._chrom_index[chrom] = len(self._chrom_index)
+            self._chrom_codes.append(code)
+            # 无法解析的位置记为 -1，保持与 parse_vcf 相同的记录数
+            self._pos.append(int(pos) if pos.isdigit() else -1)
+            self._ref_buf.append(ref.encode())
+            self._alt_buf.append(alt.encode())
+            if need_info:
+                parsed = info_fields(info)
+                for key in self.info_keys:
+                    self._info_values[key].append(parsed.get(key, ''))
+                if self.want_mutations:
+                    self._mutations.append(mutation_from_info(parsed))
+            if self.want_genotypes:
+                n_samples = len(self._samples)
+                sample_fields = fields[9:9 + n_samples]
+                sample_fields += ['.'] * (n_samples - len(sample_fields))
+                self._gt_buf.extend(genotype_carries_alt(field) for field in sample_fields)
+            if len(self._ref_buf) >= VCF_BLOCK_SIZE:
+                self._flush()
+
+def parse_vcf_columns(chunks: Iterable[bytes], info_keys: Sequence[str] = (),
+                      mutations: bool = False, genotypes: bool = False) -> VcfColumns:
+    """Stream a VCF from byte chunks into typed columns (see VcfColumnsParser)"""
+    parser = VcfColumnsParser(info_keys=info_keys, mutations=mutations, genotypes=genotypes)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
+
 def parse_csv(content: str):
     """Parse CSV format string, return list of dicts (one per row)."""
     f = StringIO(content)
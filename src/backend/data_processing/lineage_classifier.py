@@ -0,0 +1,182 @@
+import csv
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+REFERENCE_DIR = os.path.join(os.path.dirname(__file__), 'reference')
+# 内置的少量谱系定义；完整的表（数千个谱系）通过 LINEAGE_TABLE_PATH 加载
+DEFAULT_TABLE = os.path.join(REFERENCE_DIR, 'lineages.csv')
+
+MUTATION_SEP = re.compile(r'[\s,;]+')
+# Jaccard 相似度低于该值时不判定谱系
+MIN_SCORE = 0.5
+# 第一轮只比较大小在 [t*|S|, |S|/t] 内的谱系：J <= min(|S|,|L|)/max(|S|,|L|)，
+# 因此窗口内最佳得分不低于 t 的样本在窗口外不可能有更高得分；其余样本再与全部谱系比较
+PRUNE_SCORE = 0.9
+# 每块样本数；块内得分矩阵为 SCORE_BLOCK x 谱系数的 float32
+SCORE_BLOCK = 2048
+
+# (lineage, label, mutations)
+LineageRow = Tuple[str, str, List[str]]
+
+
+def read_lineage_table(path: str) -> List[LineageRow]:
+    """CSV/TSV with a header row: lineage, mutations (separated by spaces, commas or semicolons), optional label"""
+    delimiter = '\t' if path.endswith(('.tsv', '.tab')) else ','
+    with open(path, newline='', encoding='utf-8') as f:
+        return [
+            (row['lineage'].strip(), (row.get('label') or '').strip(),
+             [m for m in MUTATION_SEP.split(row['mutations']) if m])
+            for row in csv.DictReader(f, delimiter=delimiter)
+        ]
+
+
+class LineageClassifier:
+    """
+    按 Jaccard 相似度把样本的突变集合归入谱系
+    所有谱系的定义突变构成全局词表，样本编码为词表上的位集合（CSR 行，词表外的突变不参与比较），
+    交集大小 popcount(S & L) 由稀疏矩阵乘积一次算出所有样本与所有谱系的结果：
+    1. 所属谱系完全相同的突变合并为一列（按计数相乘）
+    2. 超过半数谱系共有的列按补集存储：交集 = 样本在这些列上的计数 - 与"不含该列的谱系"的乘积，
+       几乎所有谱系共有的祖先突变因此不产生计算量
+    3. 突变集合相同的样本只计算一次
+    """
+
+    def __init__(self, lineages: Sequence[LineageRow]):
+        if not lineages:
+            raise ValueError("Empty lineage table")
+        self.names = [name for name, _, _ in lineages]
+        self.labels = [label or None for _, label, _ in lineages]
+        self.vocabulary: Dict[str, int] = {}
+        rows, cols = [], []
+        for i, (name, _, mutations) in enumerate(lineages):
+            columns = {self.vocabulary.setdefault(m, len(self.vocabulary)) for m in mutations}
+            if not columns:
+                raise ValueError(f"Lineage {name} has no mutations")
+            rows.extend([i] * len(columns))
+            cols.extend(columns)
+        n, v = len(lineages), len(self.vocabulary)
+        membership = sp.csc_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(n, v))
+        membership.sort_indices()
+        self.sizes = np.diff(membership.tocsr().indptr).astype(np.float32)
+
+        # 列 -> 所属谱系相同的列组
+        groups: Dict[bytes, int] = {}
+        column_group = np.array([
+            groups.setdefault(membership.indices[membership.indptr[c]:membership.indptr[c + 1]].tobytes(), len(groups))
+            for c in range(v)
+        ], dtype=np.int64)
+        first = np.zeros(len(groups), dtype=np.int64)
+        first[column_group[::-1]] = np.arange(v)[::-1]
+        self.column_groups = sp.csr_matrix(
+            (np.ones(v, dtype=np.int32), column_group, np.arange(v + 1)), shape=(v, len(groups))
+        )
+
+        group_membership = membership[:, first].toarray().T.astype(np.int32)  # groups x lineages
+        self.complemented = group_membership.sum(axis=1) > n / 2
+        group_membership[self.complemented] -= 1
+        # 谱系按大小排序，剪枝窗口即连续的列区间
+        self.order = np.argsort(self.sizes, kind='stable')
+        self.sorted_sizes = self.sizes[self.order]
+        self.signed = sp.csc_matrix(group_membership[:, self.order])
+
+    @classmethod
+    def from_file(cls, path: str) -> 'LineageClassifier':
+        return cls(read_lineage_table(path))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def encode(self, mutation_lists: Sequence[Sequence[str]]) -> Tuple[sp.csr_matrix, np.ndarray]:
+        """
+        Bitsets of the distinct samples over the vocabulary, as a CSR matrix of 0/1 rows,
+        and the index of each input sample's row
+        """
+        vocabulary = self.vocabulary
+        distinct: Dict[Tuple[int, ...], int] = {}
+        inverse = np.empty(len(mutation_lists), dtype=np.int64)
+        for i, mutations in enumerate(mutation_lists):
+            columns = tuple(sorted({vocabulary[m] for m in mutations if m in vocabulary}))
+            inverse[i] = distinct.setdefault(columns, len(distinct))
+        indptr = np.zeros(len(distinct) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(columns) for columns in distinct])
+        indices = np.fromiter((c for columns in distinct for c in columns), dtype=np.int64, count=indptr[-1])
+        bitsets = sp.csr_matrix((np.ones(len(indices), dtype=np.int32), indices, indptr),
+                                shape=(len(distinct), len(vocabulary)))
+        return bitsets, inverse
+
+    def _score(self, counts: sp.csr_matrix, base: np.ndarray, sizes: np.ndarray,
+               lo: int, hi: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Best (sorted lineage position, Jaccard) of each row against lineages lo:hi in size order"""
+        intersections = (counts @ self.signed[:, lo:hi]).toarray().astype(np.float32)
+        intersections += base[:, None]
+        unions = self.sorted_sizes[lo:hi] + sizes[:, None]
+        unions -= intersections
+        intersections /= unions
+        best = intersections.argmax(axis=1)
+        return best + lo, intersections[np.arange(len(best)), best]
+
+    def assign(self, mutation_lists: Sequence[Sequence[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Index of the most similar lineage and its Jaccard similarity for every sample (-1 / 0 when nothing is shared)"""
+        bitsets, inverse = self.encode(mutation_lists)
+        sizes = np.diff(bitsets.indptr).astype(np.float32)
+        counts = (bitsets @ self.column_groups).tocsr()
+        base = np.asarray(counts[:, self.complemented].sum(axis=1), dtype=np.float32).ravel()
+
+        # 按样本大小排序分块，块内各样本的剪枝窗口相近
+        rows_by_size = np.argsort(sizes, kind='stable')
+        rows_by_size = rows_by_size[sizes[rows_by_size] > 0]
+        best = np.full(len(sizes), -1, dtype=np.int64)
+        scores = np.zeros(len(sizes), dtype=np.float32)
+        retry = []
+        for i in range(0, len(rows_by_size), SCORE_BLOCK):
+            rows = rows_by_size[i:i + SCORE_BLOCK]
+            lo = np.searchsorted(self.sorted_sizes, sizes[rows[0]] * PRUNE_SCORE, 'left')
+            hi = np.searchsorted(self.sorted_sizes, sizes[rows[-1]] / PRUNE_SCORE, 'right')
+            if lo == hi:
+                retry.append(rows)
+                continue
+            best[rows], scores[rows] = self._score(counts[rows], base[rows], sizes[rows], lo, hi)
+            retry.append(rows[scores[rows] < PRUNE_SCORE])
+        retry = np.concatenate(retry) if retry else np.zeros(0, dtype=np.int64)
+        for i in range(0, len(retry), SCORE_BLOCK):
+            rows = retry[i:i + SCORE_BLOCK]
+            best[rows], scores[rows] = self._score(counts[rows], base[rows], sizes[rows], 0, len(self))
+
+        lineages = np.where(best >= 0, self.order[np.maximum(best, 0)], -1)
+        return lineages[inverse], scores[inverse]
+
+    def classify(self, mutation_lists: Sequence[Sequence[str]],
+                 min_score: float = MIN_SCORE) -> List[Optional[Dict[str, Any]]]:
+        """{lineage, label, score} per sample, None when no lineage reaches min_score"""
+        lineages, scores = self.assign(mutation_lists)
+        return [
+            {"lineage": self.names[i], "label": self.labels[i], "score": round(float(score), 4)}
+            if i >= 0 and score >= min_score else None
+            for i, score in zip(lineages.tolist(), scores.tolist())
+        ]
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [
+            {"lineage": name, "label": label, "mutations": int(size)}
+            for name, label, size in zip(self.names, self.labels, self.sizes)
+        ]
+
+
+_classifiers: Dict[str, LineageClassifier] = {}
+_lock = threading.Lock()
+
+
+def get_classifier(path: str = DEFAULT_TABLE) -> LineageClassifier:
+    """Per-process classifier for a lineage table (built on first use)"""
+    classifier = _classifiers.get(path)
+    if classifier is None:
+        with _lock:
+            classifier = _classifiers.get(path)
+            if classifier is None:
+                classifier = _classifiers[path] = LineageClassifier.from_file(path)
+    return classifier
@@ -0,0 +1,194 @@
+import csv
+import os
+from concurrent.futures import Executor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+from data_processing.fasta_vcf_parser import FastaStreamParser
+
+REFERENCE_DIR = os.path.join(os.path.dirname(__file__), 'reference')
+REFERENCE_FASTA = os.path.join(REFERENCE_DIR, 'NC_045512.2.fasta')
+GENE_TABLE = os.path.join(REFERENCE_DIR, 'genes.csv')
+
+# 种子 k-mer 长度与在查询序列上的采样步长
+SEED_K = 20
+SEED_STRIDE = 8
+# 每批送入进程池的基因组数
+CALL_BATCH_SIZE = 64
+
+# 碱基编码：A C G T -> 0..3，其余（N、IUPAC 兼并碱基、gap）-> 4
+BASE_CODE = np.full(256, 4, dtype=np.uint8)
+for _i, _b in enumerate(b'ACGT'):
+    BASE_CODE[_b] = _i
+    BASE_CODE[ord(chr(_b).lower())] = _i
+
+# 64 个密码子（按 16*a + 4*b + c 编码）对应的氨基酸，'*' 为终止密码子
+CODON_TABLE = np.frombuffer(
+    b'KNKNTTTTRSRSIIMIQHQHPPPPRRRRLLLLEDEDAAAAGGGGVVVV*Y*YSSSS*CWCLFLF', dtype=np.uint8
+)
+CODON_WEIGHTS = np.array([16, 4, 1])
+
+
+def read_reference(path: str = REFERENCE_FASTA) -> bytes:
+    with open(path) as f:
+        return ''.join(line.strip() for line in f if not line.startswith('>')).upper().encode()
+
+
+def read_gene_table(path: str = GENE_TABLE) -> List[Tuple[str, int, int]]:
+    """[(gene, start, end)] with 1-based inclusive nucleotide coordinates"""
+    with open(path, newline='') as f:
+        return [(row['gene'], int(row['start']), int(row['end'])) for row in csv.DictReader(f)]
+
+
+class MutationCaller:
+    """
+    把基因组与参考序列比对后给出 gene:RefPosAlt 氨基酸突变
+    1. 用参考序列中唯一的 k-mer 作为种子锚定，同一对角线上的连续种子构成共线片段
+    2. 每个片段内用 NumPy 一次性逐字节比较得到核苷酸替换
+    3. 按基因坐标把替换归入密码子并翻译
+    片段之间（插入/缺失附近）的少量碱基不参与判定
+    """
+
+    def __init__(self, reference: Optional[bytes] = None, genes: Optional[Sequence[Tuple[str, int, int]]] = None):
+        self.reference = reference if reference is not None else read_reference()
+        self.genes = list(genes) if genes is not None else read_gene_table()
+        self.ref_codes = BASE_CODE[np.frombuffer(self.reference, dtype=np.uint8)]
+        self.seed_index = self._build_seed_index()
+
+    def _build_seed_index(self) -> Dict[bytes, int]:
+        seen: Dict[bytes, int] = {}
+        repeated = set()
+        ref = self.reference
+        for i in range(len(ref) - SEED_K + 1):
+            kmer = ref[i:i + SEED_K]
+            if kmer in seen:
+                repeated.add(kmer)
+            else:
+                seen[kmer] = i
+        for kmer in repeated:
+            del seen[kmer]
+        return seen
+
+    def anchor(self, query: bytes) -> List[Tuple[int, int, int]]:
+        """Return collinear segments [(query_start, query_end, diagonal)], ref = query + diagonal"""
+        seeds = []
+        for q in range(0, len(query) - SEED_K + 1, SEED_STRIDE):
+            r = self.seed_index.get(query[q:q + SEED_K])
+            if r is not None:
+                seeds.append((q, r - q))
+        # 只保留参考坐标单调递增的种子，丢弃零散的错误命中
+        chain = []
+        last_ref = -1
+        for i, (q, diag) in enumerate(seeds):
+            supported = (i > 0 and seeds[i - 1][1] == diag) or (i + 1 < len(seeds) and seeds[i + 1][1] == diag)
+            if supported and q + diag > last_ref:
+                chain.append((q, diag))
+                last_ref = q + diag
+        segments = []
+        for q, diag in chain:
+            if segments and segments[-1][2] == diag:
+                segments[-1][1] = q + SEED_K
+            else:
+                segments.append([q, q + SEED_K, diag])
+        if segments:
+            # 首尾片段延伸到查询序列两端（受参考序列边界限制）
+            first, last = segments[0], segments[-1]
+            first[0] = max(0, -first[2])
+            last[1] = min(len(query), len(self.reference) - last[2])
+        return [tuple(segment) for segment in segments]
+
+    def call(self, query: bytes) -> Dict[str, Any]:
+        """Compare one genome with the reference, return nucleotide and amino-acid differences"""
+        query_codes = BASE_CODE[np.frombuffer(query, dtype=np.uint8)]
+        # alt[pos] = 比对到参考位置 pos 的查询碱基编码；4 表示未覆盖或不确定
+        aligned = np.full(len(self.reference), 4, dtype=np.uint8)
+        for q_start, q_end, diag in self.anchor(query):
+            aligned[q_start + diag:q_end + diag] = query_codes[q_start:q_end]
+
+        covered = aligned < 4
+        diff_pos = np.flatnonzero(covered & (aligned != self.ref_codes))
+        nucleotide = [
+            f"{chr(self.reference[p])}{p + 1}{'ACGT'[aligned[p]]}" for p in diff_pos
+        ]
+
+        mutations = []
+        for gene, start, end in self.genes:
+            lo, hi = np.searchsorted(diff_pos, [start - 1, end])
+            if lo == hi:
+                continue
+            codon_idx = np.unique((diff_pos[lo:hi] - (start - 1)) // 3)
+            codon_idx = codon_idx[(start - 1) + codon_idx * 3 + 2 <= end - 1]
+            first = (start - 1) + codon_idx * 3
+            positions = first[:, None] + np.arange(3)
+            # 三个碱基都必须被覆盖，才能可靠地翻译
+            complete = covered[positions].all(axis=1)
+            positions, codon_idx = positions[complete], codon_idx[complete]
+            ref_aa = CODON_TABLE[(self.ref_codes[positions].astype(np.int64) * CODON_WEIGHTS).sum(axis=1)]
+            alt_aa = CODON_TABLE[(aligned[positions].astype(np.int64) * CODON_WEIGHTS).sum(axis=1)]
+            changed = (ref_aa != alt_aa) & (ref_aa != ord('*')) & (alt_aa != ord('*'))
+            mutations.extend(
+                f"{gene}:{chr(r)}{i + 1}{chr(a)}"
+                for r, i, a in zip(ref_aa[changed], codon_idx[changed], alt_aa[changed])
+            )
+        return {
+            "nucleotide_substitutions": nucleotide,
+            "mutations": mutations,
+            "coverage": round(float(covered.mean()), 4),
+        }
+
+
+_caller: Optional[MutationCaller] = None
+
+
+def get_caller() -> MutationCaller:
+    """Per-process MutationCaller (the seed index is built once per worker)"""
+    global _caller
+    if _caller is None:
+        _caller = MutationCaller()
+    return _caller
+
+
+def call_mutations_batch(records: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """Process-pool entry point: call mutations for a batch of {id, sequence} records"""
+    caller = get_caller()
+    return [
+        {"sequence_id": record['id'], **caller.call(record['sequence'].upper().encode('ascii', errors='replace'))}
+        for record in records
+    ]
+
+
+def iter_batches(records: Iterable[Dict[str, str]], size: int) -> Iterator[List[Dict[str, str]]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def call_mutations_in_fasta(chunks: Iterable[bytes], executor: Optional[Executor] = None,
+                            max_pending: int = 8) -> List[Dict[str, Any]]:
+    """
+    Stream FASTA chunks, call mutations for every genome and return results in file order
+    executor 为进程池时按批并行；同时在途的批次数受 max_pending 限制，避免读入整个文件
+    """
+    def records():
+        parser = FastaStreamParser()
+        for chunk in chunks:
+            yield from parser.feed(chunk)
+        yield from parser.close()
+
+    if executor is None:
+        return [result for batch in iter_batches(records(), CALL_BATCH_SIZE) for result in call_mutations_batch(batch)]
+
+    results = []
+    pending = []
+    for batch in iter_batches(records(), CALL_BATCH_SIZE):
+        pending.append(executor.submit(call_mutations_batch, batch))
+        if len(pending) >= max_pending:
+            results.extend(pending.pop(0).result())
+    for future in pending:
+        results.extend(future.result())
+    return results
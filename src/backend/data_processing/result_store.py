@@ -0,0 +1,161 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from data_processing.fasta_vcf_parser import FastaIndex
+
+RECORDS_FILE = 'records.ndjson'
+META_FILE = 'meta.json'
+# FASTA 上传的解压副本及其 samtools 兼容索引（FASTA_FILE + '.fai'）
+FASTA_FILE = 'sequences.fasta'
+# 每个进程保持打开（已映射、索引已读入内存）的 FASTA 数
+FASTA_INDEX_CACHE_SIZE = 16
+# 流式返回时每次读取的字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+DEFAULT_TTL = 24 * 3600
+
+UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadStore:
+    """
+    上传解析结果的磁盘存储：每个上传一个目录，记录逐行存为 NDJSON
+    分页游标就是文件中的字节偏移量，任何一页都只需一次 seek，耗时与数据总量无关
+    """
+
+    def __init__(self, root: str, ttl: float = DEFAULT_TTL):
+        self.root = root
+        self.ttl = ttl
+        os.makedirs(root, exist_ok=True)
+        self._indexes: 'OrderedDict[str, FastaIndex]' = OrderedDict()
+        self._indexes_lock = threading.Lock()
+
+    def _dir(self, upload_id: str) -> str:
+        if not UPLOAD_ID_RE.match(upload_id):
+            raise KeyError(upload_id)
+        return os.path.join(self.root, upload_id)
+
+    def create(self) -> Tuple[str, str]:
+        """Reserve a new entry; returns (upload_id, path to write the NDJSON records to)"""
+        self.purge_expired()
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._dir(upload_id))
+        return upload_id, os.path.join(self._dir(upload_id), RECORDS_FILE)
+
+    def finish(self, upload_id: str, summary: Dict[str, Any]) -> Dict[str, Any]:
+        meta = {
+            'upload_id': upload_id,
+            'filename': summary.get('filename'),
+            'filetype': summary.get('filetype'),
+            'count': summary.get('count'),
+            'indexed': summary.get('indexed', False),
+            'created_at': time.time(),
+        }
+        tmp = os.path.join(self._dir(upload_id), META_FILE + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self._dir(upload_id), META_FILE))
+        return meta
+
+    def fasta_path(self, upload_id: str) -> str:
+        """Where a FASTA upload's decompressed copy is spooled (its index goes next to it as .fai)"""
+        return os.path.join(self._dir(upload_id), FASTA_FILE)
+
+    def fasta_index(self, upload_id: str) -> Optional[FastaIndex]:
+        """
+        The memory-mapped FASTA of an upload, None if it has none (not FASTA, or not indexable)
+        每个上传的索引只在首次访问时读入，之后按 id 查找是一次字典查询
+        """
+        with self._indexes_lock:
+            index = self._indexes.get(upload_id)
+            if index is not None:
+                self._indexes.move_to_end(upload_id)
+                return index
+        path = self.fasta_path(upload_id)
+        if not os.path.exists(path + '.fai'):
+            return None
+        index = FastaIndex(path)
+        with self._indexes_lock:
+            self._indexes[upload_id] = index
+            while len(self._indexes) > FASTA_INDEX_CACHE_SIZE:
+                # 被淘汰的映射由仍在使用它的请求持有引用，随垃圾回收关闭
+                self._indexes.popitem(last=False)
+        return index
+
+    def discard(self, upload_id: str) -> None:
+        self._forget_index(upload_id)
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+
+    def _forget_index(self, upload_id: str) -> None:
+        with self._indexes_lock:
+            self._indexes.pop(upload_id, None)
+
+    def meta(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """Metadata of a finished upload, or None if it is unknown, unfinished or expired"""
+        try:
+            with open(os.path.join(self._dir(upload_id), META_FILE), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (KeyError, OSError, ValueError):
+            return None
+        if meta['created_at'] + self.ttl < time.time():
+            return None
+        return meta
+
+    def page(self, upload_id: str, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return up to `limit` records starting at `cursor` and the cursor of the next page (None at the end)"""
+        records = []
+        with self._open_at(upload_id, cursor) as f:
+            while len(records) < limit:
+                line = f.readline()
+                if not line:
+                    return records, None
+                records.append(json.loads(line))
+            next_offset = f.tell()
+            if not f.read(1):
+                return records, None
+        return records, str(next_offset)
+
+    def iter_ndjson(self, upload_id: str, cursor: Optional[str] = None) -> Iterator[bytes]:
+        """Raw NDJSON bytes from `cursor` to the end, in fixed-size chunks (the cursor is checked right away)"""
+        f = self._open_at(upload_id, cursor)
+
+        def chunks():
+            with f:
+                yield from iter(lambda: f.read(STREAM_CHUNK_SIZE), b'')
+        return chunks()
+
+    def _open_at(self, upload_id: str, cursor: Optional[str]):
+        offset = parse_cursor(cursor)
+        f = open(os.path.join(self._dir(upload_id), RECORDS_FILE), 'rb')
+        # 游标必须落在行首
+        if offset:
+            f.seek(offset - 1)
+            if f.read(1) != b'\n':
+                f.close()
+                raise ValueError(f"Invalid cursor: {cursor}")
+        return f
+
+    def purge_expired(self) -> int:
+        removed = 0
+        now = time.time()
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if UPLOAD_ID_RE.match(name) and os.path.getmtime(path) + self.ttl < now:
+                self._forget_index(name)
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
+
+
+def parse_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    if not cursor.isdigit():
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return int(cursor)
@@ -0,0 +1,302 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from data_processing.fasta_vcf_parser import iter_fasta
+from data_processing.mutation_caller import BASE_CODE
+
+INDEX_FILE = 'index.sqlite3'
+PACKED_FILE = 'packed.bin'
+# 每个事务写入的记录数
+INGEST_BATCH = 500
+# 2 位编码的碱基顺序，与 mutation_caller.BASE_CODE 一致（A C G T -> 0..3）
+BASES = np.frombuffer(b'ACGT', dtype=np.uint8)
+BASES_PER_BYTE = 4
+SHIFTS = np.array([6, 4, 2, 0], dtype=np.uint8)
+# 例外表：连续相同的非 ACGT 字符（N、IUPAC 兼并碱基、gap）记为一段 (起点, 长度, 字符)
+RUN_DTYPE = np.dtype([('start', '<i8'), ('length', '<i8'), ('base', 'u1')])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sequences (
+    sha256 TEXT PRIMARY KEY,
+    length INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    runs BLOB NOT NULL,
+    created_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS records (
+    id TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    created_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS records_sha256 ON records (sha256);
+"""
+
+
+def normalize_sequence(sequence: Union[str, bytes]) -> bytes:
+    """Upper-case ASCII bytes; the content hash and the stored form are both taken from this"""
+    if isinstance(sequence, str):
+        sequence = sequence.encode('ascii')
+    return sequence.upper()
+
+
+def sequence_sha256(sequence: bytes) -> str:
+    return hashlib.sha256(sequence).hexdigest()
+
+
+def find_runs(raw: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Runs of identical characters among the positions in mask, as a RUN_DTYPE array"""
+    idx = np.flatnonzero(mask)
+    if not idx.size:
+        return np.empty(0, dtype=RUN_DTYPE)
+    # 与前一个例外位置不相邻或字符不同处开始新的一段
+    breaks = np.flatnonzero((np.diff(idx) != 1) | (raw[idx[1:]] != raw[idx[:-1]])) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [idx.size]))
+    runs = np.empty(len(starts), dtype=RUN_DTYPE)
+    runs['start'] = idx[starts]
+    runs['length'] = ends - starts
+    runs['base'] = raw[idx[starts]]
+    return runs
+
+
+def pack_sequence(sequence: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    2 位编码：每字节 4 个碱基，高位在前，末尾不足 4 个补 0
+    非 ACGT 位置在编码中记为 A，原字符记入例外表；返回 (packed, runs)
+    """
+    raw = np.frombuffer(sequence, dtype=np.uint8)
+    codes = BASE_CODE[raw]
+    other = codes == 4
+    runs = find_runs(raw, other)
+    padded = np.zeros(-(-len(codes) // BASES_PER_BYTE) * BASES_PER_BYTE, dtype=np.uint8)
+    padded[:len(codes)] = np.where(other, 0, codes)
+    quads = padded.reshape(-1, BASES_PER_BYTE)
+    packed = (quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]
+    return packed, runs
+
+
+def unpack_codes(packed: np.ndarray, start: int, end: int) -> np.ndarray:
+    """2-bit codes (0..3) of positions [start, end), decoding only the bytes covering that range"""
+    first = start // BASES_PER_BYTE
+    last = -(-end // BASES_PER_BYTE)
+    codes = (packed[first:last, None] >> SHIFTS) & 3
+    offset = first * BASES_PER_BYTE
+    return codes.ravel()[start - offset:end - offset]
+
+
+class StoredSequence:
+    """
+    序列库中一条记录的只读视图
+    packed 是映射文件的切片（零拷贝，不随记录数增加内存）；codes / decode 按需解码任意区间
+    """
+
+    def __init__(self, seq_id: str, sha256: str, length: int, packed: np.ndarray, runs: np.ndarray):
+        self.id = seq_id
+        self.sha256 = sha256
+        self.length = length
+        self.packed = packed
+        self.runs = runs
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def packed_view(self) -> memoryview:
+        """The 2-bit packed bytes as a memoryview over the mapped file"""
+        return memoryview(self.packed)
+
+    def _range(self, start: int, end: Optional[int]) -> Tuple[int, int]:
+        end = self.length if end is None else min(end, self.length)
+        start = max(start, 0)
+        return start, max(start, end)
+
+    def _overlapping_runs(self, start: int, end: int) -> np.ndarray:
+        runs = self.runs
+        return runs[(runs['start'] < end) & (runs['start'] + runs['length'] > start)]
+
+    def codes(self, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        """mutation_caller.BASE_CODE codes of [start, end): 0..3 for A C G T, 4 for N/IUPAC/gap"""
+        start, end = self._range(start, end)
+        codes = unpack_codes(self.packed, start, end)
+        for run in self._overlapping_runs(start, end):
+            codes[max(run['start'], start) - start:min(run['start'] + run['length'], end) - start] = 4
+        return codes
+
+    def decode(self, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Nucleotides of [start, end) (0-based, end exclusive) as upper-case ASCII"""
+        start, end = self._range(start, end)
+        out = BASES[unpack_codes(self.packed, start, end)]
+        for run in self._overlapping_runs(start, end):
+            out[max(run['start'], start) - start:min(run['start'] + run['length'], end) - start] = run['base']
+        return out.tobytes()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'sha256': self.sha256,
+            'length': self.length,
+            'packed_bytes': int(self.packed.nbytes),
+            'exception_runs': len(self.runs),
+            'exception_bases': int(self.runs['length'].sum()),
+        }
+
+
+def iter_batches(items: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class SequenceStore:
+    """
+    持久化的基因组序列库：序列以 2 位编码追加写入 packed.bin，N/IUPAC 等例外字符按段记在索引中
+    相同内容（按 SHA-256）只存一份，多个序列 id 可指向同一条序列；
+    已存在的序列再次导入只需计算哈希，不再编码和写入
+    索引为 SQLite，多个进程共享同一目录时由 SQLite 的写锁串行化追加
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.index_path = os.path.join(root, INDEX_FILE)
+        self.packed_path = os.path.join(root, PACKED_FILE)
+        open(self.packed_path, 'ab').close()
+        self._local = threading.local()
+        self._map_lock = threading.Lock()
+        self._mapped: Optional[np.memmap] = None
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+        return conn
+
+    def _packed(self, offset: int, nbytes: int) -> np.ndarray:
+        """Slice of the mapped packed file; remapped when other writers have appended past the current map"""
+        if nbytes == 0:
+            return np.zeros(0, dtype=np.uint8)
+        mapped = self._mapped
+        if mapped is None or offset + nbytes > len(mapped):
+            with self._map_lock:
+                mapped = self._mapped
+                if mapped is None or offset + nbytes > len(mapped):
+                    mapped = self._mapped = np.memmap(self.packed_path, dtype=np.uint8, mode='r')
+        return mapped[offset:offset + nbytes]
+
+    def put_many(self, records: Iterable[Tuple[str, Union[str, bytes]]]) -> Dict[str, int]:
+        """
+        Store (id, sequence) pairs and return counts. A re-used id is re-pointed at the new sequence;
+        the old sequence stays in the corpus (other ids may share it)
+        """
+        stats = {'count': 0, 'new': 0, 'deduplicated': 0, 'bases': 0, 'packed_bytes': 0}
+        for batch in iter_batches(records, INGEST_BATCH):
+            self._put_batch(batch, stats)
+        return stats
+
+    def put(self, seq_id: str, sequence: Union[str, bytes]) -> Dict[str, int]:
+        return self.put_many([(seq_id, sequence)])
+
+    def _put_batch(self, batch: List[Tuple[str, Union[str, bytes]]], stats: Dict[str, int]) -> None:
+        hashed = []
+        for seq_id, sequence in batch:
+            sequence = normalize_sequence(sequence)
+            hashed.append((seq_id, sequence, sequence_sha256(sequence)))
+        conn = self._conn()
+        now = time.time()
+        with open(self.packed_path, 'ab') as out:
+            # BEGIN IMMEDIATE 取得写锁后再确定追加位置，其他进程的写入在此之后
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                shas = list({sha for _, _, sha in hashed})
+                known = {row[0] for row in conn.execute(
+                    f"SELECT sha256 FROM sequences WHERE sha256 IN ({','.join('?' * len(shas))})", shas
+                )}
+                offset = out.seek(0, os.SEEK_END)
+                for seq_id, sequence, sha in hashed:
+                    stats['count'] += 1
+                    if sha in known:
+                        stats['deduplicated'] += 1
+                    else:
+                        packed, runs = pack_sequence(sequence)
+                        out.write(packed.tobytes())
+                        conn.execute(
+                            "INSERT INTO sequences (sha256, length, offset, runs, created_at) VALUES (?, ?, ?, ?, ?)",
+                            (sha, len(sequence), offset, runs.tobytes(), now)
+                        )
+                        offset += packed.nbytes
+                        known.add(sha)
+                        stats['new'] += 1
+                        stats['bases'] += len(sequence)
+                        stats['packed_bytes'] += packed.nbytes
+                    conn.execute("INSERT OR REPLACE INTO records (id, sha256, created_at) VALUES (?, ?, ?)",
+                                 (seq_id, sha, now))
+                # 索引提交前数据必须已落盘，读者看到的偏移量总有对应的字节
+                out.flush()
+                os.fsync(out.fileno())
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def ingest_fasta(self, chunks: Iterable[bytes]) -> Dict[str, int]:
+        """Stream FASTA byte chunks into the store, one record in memory at a time"""
+        return self.put_many((record['id'], record['sequence']) for record in iter_fasta(chunks))
+
+    def _load(self, seq_id: str, sha256: str, length: int, offset: int, runs: bytes) -> StoredSequence:
+        nbytes = -(-length // BASES_PER_BYTE)
+        return StoredSequence(seq_id, sha256, length, self._packed(offset, nbytes),
+                              np.frombuffer(runs, dtype=RUN_DTYPE))
+
+    def get(self, seq_id: str) -> Optional[StoredSequence]:
+        row = self._conn().execute(
+            "SELECT s.sha256, s.length, s.offset, s.runs FROM records r JOIN sequences s ON s.sha256 = r.sha256 "
+            "WHERE r.id = ?", (seq_id,)
+        ).fetchone()
+        return self._load(seq_id, *row) if row is not None else None
+
+    def get_by_hash(self, sha256: str) -> Optional[StoredSequence]:
+        row = self._conn().execute(
+            "SELECT sha256, length, offset, runs FROM sequences WHERE sha256 = ?", (sha256,)
+        ).fetchone()
+        return self._load(sha256, *row) if row is not None else None
+
+    def contains_hash(self, sha256: str) -> bool:
+        return self._conn().execute("SELECT 1 FROM sequences WHERE sha256 = ?", (sha256,)).fetchone() is not None
+
+    def ids_for_hash(self, sha256: str, limit: int = 100) -> List[str]:
+        return [row[0] for row in self._conn().execute(
+            "SELECT id FROM records WHERE sha256 = ? ORDER BY id LIMIT ?", (sha256, limit)
+        )]
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        records, record_bases = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(s.length), 0) FROM records r JOIN sequences s ON s.sha256 = r.sha256"
+        ).fetchone()
+        sequences, bases, runs_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0), COALESCE(SUM(LENGTH(runs)), 0) FROM sequences"
+        ).fetchone()
+        packed_bytes = os.path.getsize(self.packed_path)
+        return {
+            'records': records,
+            'sequences': sequences,
+            # 每条记录按文本存储时的碱基数 / 去重后实际存储的碱基数
+            'record_bases': record_bases,
+            'bases': bases,
+            'packed_bytes': packed_bytes,
+            'exception_runs': runs_bytes // RUN_DTYPE.itemsize,
+            'compression_ratio': round(record_bases / packed_bytes, 2) if packed_bytes else None,
+        }
@@ -0,0 +1,242 @@
+import csv
+import json
+import os
+import zlib
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional
+
+from data_processing.fasta_vcf_parser import (
+    CHUNK_SIZE, FastaIndexer, FastaStreamParser, VcfColumnsParser, iter_lines, write_fai
+)
+
+# 接收每条完整记录的回调（例如写入结果存储）；预览仍然只保留前 PREVIEW_LIMIT 条
+RecordSink = Callable[[Dict[str, Any]], None]
+
+# 上传结果中最多返回的预览记录数
+PREVIEW_LIMIT = 100
+
+GZIP_MAGIC = b'\x1f\x8b'
+COMPRESSED_SUFFIXES = ('.gz', '.bgz', '.gzip')
+FASTA_SUFFIXES = ('.fasta', '.fa', '.fna')
+
+
+def strip_compression_suffix(filename: str) -> str:
+    """'sample.vcf.gz' -> 'sample.vcf'"""
+    lower = filename.lower()
+    for suffix in COMPRESSED_SUFFIXES:
+        if lower.endswith(suffix):
+            return filename[:-len(suffix)]
+    return filename
+
+
+def iter_decompressed(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """
+    Stream-decompress gzip input chunk by chunk; plain input passes through unchanged
+    BGZF 是多个 gzip 成员首尾相接，每个成员结束后用剩余字节开始新的解压器
+    """
+    first = next(chunks, b'')
+    if not first.startswith(GZIP_MAGIC):
+        if first:
+            yield first
+        yield from chunks
+        return
+
+    decompressor = zlib.decompressobj(wbits=31)
+    pending = first
+    while True:
+        while pending:
+            data = decompressor.decompress(pending, CHUNK_SIZE)
+            if data:
+                yield data
+            if decompressor.eof:
+                pending = decompressor.unused_data
+                decompressor = zlib.decompressobj(wbits=31)
+            else:
+                pending = decompressor.unconsumed_tail
+        pending = next(chunks, None)
+        if pending is None:
+            break
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+def iter_file_chunks(fileobj: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    return iter(lambda: fileobj.read(chunk_size), b'')
+
+
+def detect_filetype(filename: str, head: bytes) -> Optional[str]:
+    """File type from the (decompressed) extension, else sniffed from the first decompressed chunk"""
+    lower = strip_compression_suffix(filename).lower()
+    if lower.endswith(FASTA_SUFFIXES):
+        return 'FASTA'
+    if lower.endswith('.vcf'):
+        return 'VCF'
+    if lower.endswith('.csv'):
+        return 'CSV'
+    # 简单内容判断
+    text = head.decode('utf-8', errors='ignore')
+    if text.lstrip().startswith('>'):
+        return 'FASTA'
+    if text.lstrip().startswith('#CHROM') or text.lstrip().startswith('##fileformat=VCF') or '\t' in text:
+        return 'VCF'
+    if ',' in text:
+        return 'CSV'
+    return None
+
+
+def summarize_fasta(chunks: Iterator[bytes], sink: Optional[RecordSink] = None) -> Dict[str, Any]:
+    parser = FastaStreamParser()
+    count = 0
+    preview = []
+
+    def collect(records):
+        nonlocal count
+        for record in records:
+            count += 1
+            if len(preview) < PREVIEW_LIMIT:
+                preview.append(record)
+            if sink is not None:
+                sink(record)
+
+    for chunk in chunks:
+        collect(parser.feed(chunk))
+    collect(parser.close())
+    return {"count": count, "records": preview}
+
+
+def summarize_vcf(chunks: Iterator[bytes], sink: Optional[RecordSink] = None) -> Dict[str, Any]:
+    parser = VcfColumnsParser(mutations=True, genotypes=True, preview=PREVIEW_LIMIT, sink=sink)
+    for chunk in chunks:
+        parser.feed(chunk)
+    columns = parser.close()
+    result = {"count": len(columns), "records": parser.preview}
+    mutations = columns.mutation_list()
+    if mutations:
+        result["mutation_count"] = len(mutations)
+        result["mutations"] = mutations[:PREVIEW_LIMIT]
+    # 多样本 VCF：每个样本携带的突变，可直接提交给 /analyze/variants
+    sample_mutations = columns.sample_mutations()
+    if sample_mutations:
+        result["samples"] = [
+            {"sequence_id": sample, "mutations": sample_muts}
+            for sample, sample_muts in list(sample_mutations.items())[:PREVIEW_LIMIT]
+        ]
+    return result
+
+
+def summarize_csv(chunks: Iterator[bytes], sink: Optional[RecordSink] = None) -> Dict[str, Any]:
+    count = 0
+    preview = []
+    for row in csv.DictReader(iter_lines(chunks)):
+        count += 1
+        if len(preview) < PREVIEW_LIMIT:
+            preview.append(dict(row))
+        if sink is not None:
+            sink(dict(row))
+    return {"count": count, "records": preview}
+
+
+SUMMARIZERS = {'FASTA': summarize_fasta, 'VCF': summarize_vcf, 'CSV': summarize_csv}
+
+
+class FastaSpool:
+    """
+    把解压后的 FASTA 块原样写入 path，同时在同一次扫描中建立 path + '.fai' 索引
+    大文件只读一遍；之后按 id 读取任意记录或区间无需重新扫描
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.indexer = FastaIndexer()
+        self.error: Optional[str] = None
+
+    def tee(self, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        with open(self.path, 'wb') as out:
+            for chunk in chunks:
+                # 无法建立索引后不再写入，文件在 finish 中删除
+                if self.error is None:
+                    out.write(chunk)
+                    try:
+                        self.indexer.feed(chunk)
+                    except ValueError as e:
+                        self.error = str(e)
+                yield chunk
+
+    def finish(self) -> Dict[str, Any]:
+        if self.error is None:
+            try:
+                entries = self.indexer.close()
+            except ValueError as e:
+                self.error = str(e)
+        if self.error is not None:
+            os.remove(self.path)
+            return {"indexed": False, "index_error": self.error}
+        # 索引文件出现即表示 FASTA 已完整写入
+        write_fai(entries, self.path + '.fai.tmp')
+        os.replace(self.path + '.fai.tmp', self.path + '.fai')
+        result = {"indexed": True, "indexed_sequences": len(entries)}
+        if self.indexer.duplicates:
+            result["duplicate_ids"] = self.indexer.duplicates
+        return result
+
+
+def summarize_upload(fileobj: BinaryIO, filename: str, sink: Optional[RecordSink] = None,
+                     fasta_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Parse one uploaded file (optionally gzip/BGZF-compressed) in a single streaming pass.
+    With fasta_path a FASTA upload is also written there, decompressed, with a samtools-compatible .fai
+    """
+    chunks = iter_decompressed(iter_file_chunks(fileobj))
+    head = next(chunks, b'')
+    filetype = detect_filetype(filename, head)
+    if filetype is None:
+        return {
+            "status": "error",
+            "filename": filename,
+            "detail": "Unsupported file type."
+        }
+
+    def replay():
+        if head:
+            yield head
+        yield from chunks
+
+    if filetype == 'FASTA' and fasta_path is not None:
+        spool = FastaSpool(fasta_path)
+        summary = summarize_fasta(spool.tee(replay()), sink)
+        summary.update(spool.finish())
+    else:
+        summary = SUMMARIZERS[filetype](replay(), sink)
+    return {
+        "status": "success",
+        "filetype": filetype,
+        "filename": filename,
+        **summary
+    }
+
+
+def ndjson_writer(out) -> RecordSink:
+    """Sink writing one JSON object per line to a text file"""
+    def write(record: Dict[str, Any]) -> None:
+        out.write(json.dumps(record, ensure_ascii=False))
+        out.write('\n')
+    return write
+
+
+def summarize_upload_stored(fileobj: BinaryIO, filename: str, records_path: Optional[str] = None,
+                            fasta_path: Optional[str] = None) -> Dict[str, Any]:
+    """summarize_upload that also writes every record to records_path as NDJSON when given"""
+    if records_path is None:
+        return summarize_upload(fileobj, filename, fasta_path=fasta_path)
+    with open(records_path, 'w', encoding='utf-8') as out:
+        return summarize_upload(fileobj, filename, ndjson_writer(out), fasta_path)
+
+
+def summarize_upload_path(path: str, filename: str, records_path: Optional[str] = None,
+                          fasta_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Process-pool entry point: same as summarize_upload_stored, reading from a spooled file on disk
+    记录、FASTA 副本和索引在工作进程内直接写入上传目录，不经过进程间传输
+    """
+    with open(path, 'rb') as f:
+        return summarize_upload_stored(f, filename, records_path, fasta_path)
@@ -0,0 +1 @@
+# This file makes the inference directory a Python package 
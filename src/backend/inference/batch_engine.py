@@ -0,0 +1,64 @@
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+from ml_models.train_model import AMINO_ACIDS, encode_features
+from metrics.registry import PREDICT_STAGE_SECONDS
+
+# 氨基酸字母 -> AMINO_ACIDS 中的下标
+AA_INDEX = {aa: i for i, aa in enumerate(AMINO_ACIDS)}
+
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+def parse_mutation_key(mutation: str) -> Optional[Tuple[str, int, int, int]]:
+    """Parse a mutation the same way extract_features does, return (gene, position, ref_idx, alt_idx)"""
+    try:
+        gene, change = mutation.split(':')
+        ref = change[0]
+        pos = int(''.join(filter(str.isdigit, change)))
+        alt = change[-1]
+        if pos > _INT64_MAX:
+            return None
+        return gene, pos, AA_INDEX[ref], AA_INDEX[alt]
+    except Exception:
+        return None
+
+
+def parse_mutation_keys(mutations: Sequence[str]) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Parse a batch of mutations, return (genes, positions, ref_idx, alt_idx, valid) for the valid rows"""
+    parsed = [parse_mutation_key(m) for m in mutations]
+    valid = np.fromiter((p is not None for p in parsed), dtype=bool, count=len(parsed))
+    keys = [p for p in parsed if p is not None]
+    n = len(keys)
+    genes = [k[0] for k in keys]
+    positions = np.fromiter((k[1] for k in keys), dtype=np.int64, count=n)
+    ref_idx = np.fromiter((k[2] for k in keys), dtype=np.int64, count=n)
+    alt_idx = np.fromiter((k[3] for k in keys), dtype=np.int64, count=n)
+    return genes, positions, ref_idx, alt_idx, valid
+
+
+class BatchPredictor:
+    """把整批突变编码成与 feature_columns 对齐的特征矩阵，一次调用 predict_proba"""
+
+    def __init__(self, model, feature_columns: Sequence[str]):
+        self.model = model
+        self.feature_columns = list(feature_columns)
+
+    def encode(self, mutations: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (X, valid): feature matrix for the rows extract_features accepts, and the row mask"""
+        genes, positions, ref_idx, alt_idx, valid = parse_mutation_keys(mutations)
+        return encode_features(genes, positions, ref_idx, alt_idx, self.feature_columns), valid
+
+    def predict_scores(self, mutations: Sequence[str]) -> np.ndarray:
+        """Return the positive-class probability per mutation, NaN where features cannot be extracted"""
+        with PREDICT_STAGE_SECONDS.time(path='batch', stage='encode'):
+            X, valid = self.encode(mutations)
+        scores = np.full(len(mutations), np.nan)
+        if valid.any():
+            # sklearn 模型训练时带列名，传 DataFrame 避免特征名警告；编译后的森林直接接收数组
+            if hasattr(self.model, 'feature_names_in_'):
+                import pandas as pd
+                X = pd.DataFrame(X, columns=self.feature_columns)
+            with PREDICT_STAGE_SECONDS.time(path='batch', stage='predict_proba'):
+                scores[valid] = self.model.predict_proba(X)[:, 1]
+        return scores
@@ -0,0 +1,70 @@
+import numpy as np
+
+# 每次处理的样本数，限制 (样本数 x 树数) 节点下标矩阵的大小
+BLOCK_SIZE = 1024
+# 构造参数中的数组，顺序与 __init__ 一致
+ARRAY_NAMES = ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'depth', 'classes')
+
+
+class ForestEvaluator:
+    """
+    train_model.export_compiled_forest 导出的随机森林数组表示
+    所有树的节点拼接在同一组连续数组中；叶子节点的左右孩子指向自身，
+    因此每一步都可以对所有样本、所有树同时前进一层
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, depth, classes, model_sha256=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        # 从共享内存载入时 depth 是只有一个元素的数组（memmap）
+        self.depth = int(np.asarray(depth).reshape(-1)[0])
+        self.classes_ = classes
+        # 导出时 mutation_model.pkl 的哈希，用于判断是否与磁盘上的模型一致
+        self.model_sha256 = model_sha256
+
+    @classmethod
+    def load(cls, path: str) -> 'ForestEvaluator':
+        """Load a compiled forest (.npz)"""
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+        return cls(*(arrays[name] for name in ARRAY_NAMES),
+                   str(arrays['model_sha256']) if 'model_sha256' in arrays else None)
+
+    def arrays(self):
+        return {
+            'feature': self.feature, 'threshold': self.threshold, 'left': self.left, 'right': self.right,
+            'value': self.value, 'roots': self.roots, 'depth': np.array(self.depth), 'classes': self.classes_,
+        }
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Same result as RandomForestClassifier.predict_proba"""
+        # sklearn 的树在 float32 上比较阈值
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty((X.shape[0], self.value.shape[1]))
+        for start in range(0, X.shape[0], BLOCK_SIZE):
+            out[start:start + BLOCK_SIZE] = self._predict_block(X[start:start + BLOCK_SIZE])
+        return out
+
+    def _predict_block(self, X: np.ndarray) -> np.ndarray:
+        n_samples, n_features = X.shape
+        flat_X = X.ravel()
+        # node[t, i]：第 t 棵树上样本 i 当前所在的节点
+        node = np.repeat(self.roots[:, None], n_samples, axis=1)
+        row_offset = np.arange(n_samples, dtype=np.int64) * n_features
+        for _ in range(self.depth):
+            go_left = flat_X[row_offset + self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        # 按树的顺序逐棵累加，与 sklearn 的求和顺序一致，保证结果逐位相同
+        proba = np.zeros((n_samples, self.value.shape[1]))
+        for t in range(self.n_trees):
+            proba += self.value[node[t]]
+        proba /= self.n_trees
+        return proba
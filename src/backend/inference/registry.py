@@ -0,0 +1,273 @@
+from typing import Any, Dict, List, Optional, Sequence
+from datetime import datetime
+import logging
+import os
+import threading
+import time
+import numpy as np
+
+from ml_models.train_model import file_sha256
+from inference.batch_engine import BatchPredictor
+from inference.forest_evaluator import ForestEvaluator
+from inference.score_table import ScoreTable
+from inference.shared_model import load_shared, ensure_shared, shared_model_dir
+from metrics.registry import PREDICT_STAGE_SECONDS, MODEL_LOADS, MODEL_LOAD_SECONDS, MODEL_WARMUP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = 'mutation_model.pkl'
+FEATURE_COLUMNS_FILE = 'feature_columns.pkl'
+COMPILED_FOREST_FILE = 'forest.npz'
+# 版本化模型目录：<root>/versions/<version>/；旧布局（文件直接放在 <root> 下）视为 "default" 版本
+VERSIONS_DIR = 'versions'
+DEFAULT_VERSION = 'default'
+
+# 预热批次：覆盖常见基因、RBD 区域内外以及查表未命中的位置
+WARMUP_MUTATIONS = [
+    'S:D614G', 'S:N501Y', 'S:E484K', 'S:L452R', 'S:P681H', 'S:Y145D',
+    'N:R203K', 'N:G204R', 'ORF1a:T265I', 'ORF1b:P314L', 'S:D9999G'
+]
+
+
+class LoadedModel:
+    """一个已加载、可直接用于预测的模型版本"""
+
+    def __init__(self, version: str, path: str, model, feature_columns: List[str],
+                 score_table: Optional[ScoreTable] = None):
+        self.version = version
+        self.path = path
+        self.model = model
+        self.feature_columns = feature_columns
+        self.score_table = score_table
+        self.batch_predictor = BatchPredictor(model, feature_columns)
+        self.model_sha256: Optional[str] = None
+        # 共享内存模式下森林数组所在的目录（只读映射）
+        self.shared_dir: Optional[str] = None
+        self.loaded_at = datetime.now()
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+
+    @property
+    def fingerprint(self) -> str:
+        """Version plus content hash, e.g. for cache keys shared between worker processes"""
+        return f"{self.version}:{(self.model_sha256 or '')[:12]}"
+
+    def predict_scores(self, mutations: Sequence[str]) -> np.ndarray:
+        """Score a batch: score-table lookup first, the model for misses, NaN where features cannot be extracted"""
+        if self.score_table is None:
+            return self.batch_predictor.predict_scores(mutations)
+        with PREDICT_STAGE_SECONDS.time(path='batch', stage='score_table'):
+            scores = self.score_table.lookup(mutations)
+        missing = np.flatnonzero(np.isnan(scores))
+        if missing.size:
+            scores[missing] = self.batch_predictor.predict_scores([mutations[i] for i in missing])
+        return scores
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'path': self.path,
+            'backend': 'compiled_forest' if isinstance(self.model, ForestEvaluator) else 'sklearn',
+            'model_sha256': self.model_sha256,
+            'shared_dir': self.shared_dir,
+            'score_table': self.score_table is not None,
+            'loaded_at': self.loaded_at.isoformat(timespec='seconds'),
+            'load_seconds': self.load_seconds,
+            'warmup_seconds': self.warmup_seconds,
+        }
+
+
+def load_model_dir(version: str, path: str, shared_root: Optional[str] = None) -> LoadedModel:
+    """
+    Load one model directory; prefer the compiled forest (no sklearn) when it matches mutation_model.pkl.
+    With shared_root the forest arrays are memory-mapped from shared_root/<model sha256>/, exported there
+    by the first process that needs them, so every worker shares one copy
+    """
+    # joblib（以及反序列化时的 sklearn）只在真正加载时导入，不计入 API 的启动时间
+    import joblib
+    start = time.perf_counter()
+    model_path = os.path.join(path, MODEL_FILE)
+    forest_path = os.path.join(path, COMPILED_FOREST_FILE)
+    model = None
+    shared_dir = None
+    model_sha256 = file_sha256(model_path) if os.path.exists(model_path) else None
+    if shared_root and model_sha256:
+        shared_dir = shared_model_dir(shared_root, model_sha256)
+        model = load_shared(shared_dir)
+    if model is None and os.path.exists(forest_path):
+        forest = ForestEvaluator.load(forest_path)
+        if model_sha256 is None or forest.model_sha256 == model_sha256:
+            model = forest
+            model_sha256 = forest.model_sha256
+        else:
+            logger.warning(f"{forest_path} 与当前模型不匹配，改用 joblib 模型")
+    if model is None:
+        model = joblib.load(model_path)
+    if shared_dir is not None and not (isinstance(model, ForestEvaluator) and isinstance(model.feature, np.memmap)):
+        # 第一个加载该版本的进程负责导出
+        model = ensure_shared(model, model_sha256, shared_root)
+    feature_columns = joblib.load(os.path.join(path, FEATURE_COLUMNS_FILE))
+
+    score_table = None
+    try:
+        if os.path.exists(model_path):
+            score_table = ScoreTable.load(path, model_path)
+    except Exception as e:
+        logger.error(f"加载分数表失败: {str(e)}")
+
+    loaded = LoadedModel(version, path, model, feature_columns, score_table)
+    loaded.model_sha256 = model_sha256
+    loaded.shared_dir = shared_dir
+    loaded.load_seconds = round(time.perf_counter() - start, 4)
+    return loaded
+
+
+def warm_up(loaded: LoadedModel) -> None:
+    """Validate a freshly loaded model on the warm-up batch; raises ValueError if it misbehaves"""
+    if not isinstance(loaded.feature_columns, list) or not loaded.feature_columns:
+        raise ValueError("feature_columns 为空或格式错误")
+    if not hasattr(loaded.model, 'predict_proba'):
+        raise ValueError("模型缺少 predict_proba")
+    start = time.perf_counter()
+    scores = loaded.predict_scores(WARMUP_MUTATIONS)
+    if len(scores) != len(WARMUP_MUTATIONS) or not np.all((scores >= 0) & (scores <= 1)):
+        raise ValueError(f"预热批次输出异常: {scores.tolist()}")
+    loaded.warmup_seconds = round(time.perf_counter() - start, 4)
+
+
+class ModelRegistry:
+    """
+    管理版本化的模型目录
+    新版本在后台加载、校验并预热后才替换 active；替换只是一次引用赋值，
+    正在处理的请求继续使用它开始时拿到的版本
+    """
+
+    def __init__(self, root: str, shared_root: Optional[str] = None):
+        self.root = root
+        # 设置后所有版本都以共享内存映射方式加载（见 inference.shared_model）
+        self.shared_root = shared_root
+        self.active: Optional[LoadedModel] = None
+        self.last_error: Optional[str] = None
+        self._failed_version: Optional[str] = None
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        # 首次加载（无论成功与否）结束后置位；就绪检查和启动期间的请求据此等待
+        self.ready = threading.Event()
+        self._initial_load: Optional[threading.Thread] = None
+        self._initial_load_lock = threading.Lock()
+
+    def versions(self) -> Dict[str, str]:
+        """Return {version: directory} for every model directory under root"""
+        found = {}
+        if os.path.exists(os.path.join(self.root, MODEL_FILE)) or os.path.exists(os.path.join(self.root, COMPILED_FOREST_FILE)):
+            found[DEFAULT_VERSION] = self.root
+        versions_root = os.path.join(self.root, VERSIONS_DIR)
+        if os.path.isdir(versions_root):
+            for name in sorted(os.listdir(versions_root)):
+                path = os.path.join(versions_root, name)
+                if os.path.isdir(path) and os.path.exists(os.path.join(path, FEATURE_COLUMNS_FILE)):
+                    found[name] = path
+        return found
+
+    def latest_version(self) -> Optional[str]:
+        """Newest version directory by name (e.g. a timestamp), else the default layout"""
+        named = [v for v in self.versions() if v != DEFAULT_VERSION]
+        if named:
+            return named[-1]
+        return DEFAULT_VERSION if DEFAULT_VERSION in self.versions() else None
+
+    def load(self, version: Optional[str] = None) -> LoadedModel:
+        """Load, validate and warm up a version, then make it active"""
+        with self._reload_lock:
+            version = version or self.latest_version()
+            path = self.versions().get(version) if version else None
+            if path is None:
+                self.last_error = f"模型版本不存在: {version}"
+                self.ready.set()
+                raise FileNotFoundError(self.last_error)
+            try:
+                loaded = load_model_dir(version, path, self.shared_root)
+                warm_up(loaded)
+            except Exception as e:
+                self.last_error = f"{version}: {str(e)}"
+                self._failed_version = version
+                MODEL_LOADS.inc(status='failed')
+                self.ready.set()
+                raise
+            self.active = loaded
+            MODEL_LOADS.inc(status='success')
+            MODEL_LOAD_SECONDS.set(loaded.load_seconds)
+            MODEL_WARMUP_SECONDS.set(loaded.warmup_seconds)
+            self.last_error = None
+            self._failed_version = None
+            logger.info(f"模型版本 {version} 已生效 (加载 {loaded.load_seconds}s, 预热 {loaded.warmup_seconds}s)")
+            self.ready.set()
+            return loaded
+
+    def load_in_background(self) -> None:
+        """Start the initial load in a thread; only the first call (lifespan or first request) starts one"""
+        with self._initial_load_lock:
+            if self._initial_load is not None or self.ready.is_set():
+                return
+
+            def run():
+                try:
+                    self.load()
+                except Exception as e:
+                    logger.error(f"加载模型失败: {str(e)}")
+
+            self._initial_load = threading.Thread(target=run, name='model-load', daemon=True)
+            self._initial_load.start()
+
+    def wait_active(self, timeout: Optional[float] = None) -> Optional[LoadedModel]:
+        """
+        The active model once the initial load has finished (started here if nobody has yet).
+        Returns whatever is active after `timeout` seconds, None meaning "use the rules"
+        """
+        if not self.ready.is_set():
+            self.load_in_background()
+            self.ready.wait(timeout)
+        return self.active
+
+    def reload_async(self, version: Optional[str] = None) -> bool:
+        """Start a background reload; returns False if one is already running"""
+        if self._reload_lock.locked():
+            return False
+
+        def run():
+            try:
+                self.load(version)
+            except Exception as e:
+                logger.error(f"模型重新加载失败: {str(e)}")
+
+        threading.Thread(target=run, name='model-reload', daemon=True).start()
+        return True
+
+    def start_watcher(self, interval: float) -> None:
+        """Poll root every `interval` seconds and hot-load new versions as they appear"""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                latest = self.latest_version()
+                if latest is None or latest == self._failed_version:
+                    continue
+                if self.active is None or latest != self.active.version:
+                    try:
+                        self.load(latest)
+                    except Exception as e:
+                        logger.error(f"模型热加载失败: {str(e)}")
+
+        self._watcher = threading.Thread(target=watch, name='model-watcher', daemon=True)
+        self._watcher.start()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'active': self.active.info() if self.active is not None else None,
+            'versions': list(self.versions()),
+            'ready': self.ready.is_set(),
+            'reloading': self._reload_lock.locked(),
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,49 @@
+from typing import Optional, Sequence
+import logging
+import os
+import numpy as np
+
+from ml_models.train_model import AMINO_ACIDS, file_sha256
+from inference.batch_engine import parse_mutation_keys
+
+logger = logging.getLogger(__name__)
+
+
+class ScoreTable:
+    """train_model.export_score_table 导出的分数表，按 (基因槽位, 位置, 参考, 替换) 直接索引"""
+
+    def __init__(self, table: np.ndarray, genes: Sequence[str], max_position: int):
+        self.table = table
+        self.gene_slot = {gene: i for i, gene in enumerate(genes)}
+        self.other_slot = len(genes)
+        self.max_position = max_position
+
+    @classmethod
+    def load(cls, model_dir: str, model_path: str) -> Optional['ScoreTable']:
+        """Memory-map score_table.npy if it exists and was exported for the model at model_path"""
+        table_path = os.path.join(model_dir, 'score_table.npy')
+        index_path = os.path.join(model_dir, 'score_table_index.pkl')
+        if not (os.path.exists(table_path) and os.path.exists(index_path)):
+            return None
+        import joblib
+        index = joblib.load(index_path)
+        if index['amino_acids'] != AMINO_ACIDS:
+            logger.warning("分数表的氨基酸顺序与当前特征定义不一致，忽略分数表")
+            return None
+        if index['model_sha256'] != file_sha256(model_path):
+            logger.warning("分数表与当前模型不匹配，忽略分数表")
+            return None
+        table = np.load(table_path, mmap_mode='r')
+        return cls(table, index['genes'], index['max_position'])
+
+    def lookup(self, mutations: Sequence[str]) -> np.ndarray:
+        """Return the table score per mutation, NaN for unparseable or out-of-range mutations"""
+        genes, positions, ref_idx, alt_idx, valid = parse_mutation_keys(mutations)
+        scores = np.full(len(mutations), np.nan)
+        in_range = positions <= self.max_position
+        if not in_range.any():
+            return scores
+        slots = np.fromiter((self.gene_slot.get(g, self.other_slot) for g in genes), dtype=np.int64, count=len(genes))
+        rows = np.flatnonzero(valid)[in_range]
+        scores[rows] = self.table[slots[in_range], positions[in_range], ref_idx[in_range], alt_idx[in_range]]
+        return scores
@@ -0,0 +1,117 @@
+from typing import Any, Dict, Optional
+import json
+import logging
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from inference.forest_evaluator import ForestEvaluator, ARRAY_NAMES
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+# 预热时每次读取的字节数
+TOUCH_CHUNK_SIZE = 1024 * 1024
+
+
+def default_shared_root() -> str:
+    """/dev/shm (tmpfs, never written to disk) when available, else the temp directory"""
+    base = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else tempfile.gettempdir()
+    return os.path.join(base, 'sars_cov2_models')
+
+
+def shared_model_dir(shared_root: str, model_sha256: str) -> str:
+    """One directory per model content hash, so versions and hot reloads never overwrite a mapped file"""
+    return os.path.join(shared_root, model_sha256)
+
+
+def load_shared(directory: str) -> Optional[ForestEvaluator]:
+    """
+    以只读内存映射方式打开共享的森林数组；所有进程映射同一组页面，
+    模型数组只在页缓存中存在一份。目录不存在或不完整时返回 None
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        arrays = [np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r') for name in ARRAY_NAMES]
+    except (OSError, ValueError):
+        return None
+    return ForestEvaluator(*arrays, model_sha256=manifest['model_sha256'])
+
+
+def export_shared(arrays: Dict[str, np.ndarray], model_sha256: str, directory: str) -> None:
+    """
+    Write the forest arrays as uncompressed .npy files (memory-mappable) into `directory`.
+    先写到临时目录再 rename：并发的多个进程只有一个能生效，读者看到的总是完整目录
+    """
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=os.path.basename(directory) + '.tmp-', dir=parent)
+    try:
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(arrays[name]), allow_pickle=False)
+        with open(os.path.join(tmp, MANIFEST_FILE), 'w') as f:
+            json.dump({'model_sha256': model_sha256, 'arrays': list(ARRAY_NAMES)}, f)
+        os.rename(tmp, directory)
+    except OSError:
+        # 另一个进程已经抢先完成
+        if not os.path.exists(os.path.join(directory, MANIFEST_FILE)):
+            raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def ensure_shared(model: Any, model_sha256: str, shared_root: str) -> ForestEvaluator:
+    """Memory-mapped forest for `model` (a ForestEvaluator or a fitted RandomForestClassifier), exporting it once"""
+    directory = shared_model_dir(shared_root, model_sha256)
+    forest = load_shared(directory)
+    if forest is None:
+        if isinstance(model, ForestEvaluator):
+            arrays = model.arrays()
+        else:
+            from ml_models.train_model import compile_forest
+            arrays = compile_forest(model)
+        export_shared(arrays, model_sha256, directory)
+        logger.info(f"共享模型已导出到 {directory}")
+        forest = load_shared(directory)
+        if forest is None:
+            raise RuntimeError(f"无法映射共享模型: {directory}")
+    return forest
+
+
+def touch_pages(*paths: str) -> int:
+    """Read files (or every file in a directory) once so their pages are resident before workers start"""
+    total = 0
+    for path in paths:
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path))] if os.path.isdir(path) else [path]
+        for name in files:
+            if not os.path.isfile(name):
+                continue
+            with open(name, 'rb') as f:
+                for chunk in iter(lambda: f.read(TOUCH_CHUNK_SIZE), b''):
+                    total += len(chunk)
+    return total
+
+
+def memory_usage() -> Dict[str, int]:
+    """
+    本进程内存（字节）：rss 含共享页；pss 把共享页按映射进程数均摊；private 为独占页
+    多进程共享同一模型时应看 pss / private，rss 会把共享页重复计入每个进程
+    """
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                    usage[key] = int(value.split()[0]) * 1024
+    except OSError:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return {'rss': rss, 'pss': rss, 'private': rss}
+    return {
+        'rss': usage.get('Rss', 0),
+        'pss': usage.get('Pss', 0),
+        'private': usage.get('Private_Clean', 0) + usage.get('Private_Dirty', 0),
+    }
@@ -0,0 +1,342 @@
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+# 完成的任务结果默认保留 24 小时
+DEFAULT_RESULT_TTL = 24 * 3600
+# 空闲时轮询数据库的间隔（其他进程提交的任务靠轮询发现）
+POLL_INTERVAL = 1.0
+# 进度写入数据库的最小间隔
+PROGRESS_INTERVAL = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker_pid INTEGER,
+    worker_token TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created_at);
+"""
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def worker_token(pid: int) -> Optional[str]:
+    """
+    'pid:进程启动时间'，进程不存在时为 None
+    PID 会被复用（容器重启后服务进程往往又是 PID 1），只比较 PID 会把新进程误认为旧的工作进程
+    """
+    if not pid_alive(pid):
+        return None
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            # 第 22 个字段 starttime；进程名可能含空格，从最后一个 ')' 之后开始数
+            start = f.read().rsplit(')', 1)[1].split()[19]
+    except (OSError, IndexError):
+        start = ''
+    return f"{pid}:{start}"
+
+
+@functools.lru_cache(maxsize=None)
+def own_token(pid: int) -> str:
+    """Token of the current process (pass os.getpid(), so a forked child gets its own)"""
+    return worker_token(pid) or f"{pid}:"
+
+
+class JobContext:
+    """Passed to job handlers for progress reporting and cooperative cancellation"""
+
+    def __init__(self, queue: 'JobQueue', job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+        self._last_progress = 0.0
+
+    def progress(self, fraction: float) -> None:
+        """Record progress in [0, 1]; raises JobCancelled once cancellation was requested"""
+        now = time.monotonic()
+        if fraction >= 1 or now - self._last_progress >= PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.queue._execute("UPDATE jobs SET progress = ? WHERE id = ?", (min(max(fraction, 0.0), 1.0), self.job_id))
+        self.check_cancelled()
+
+    @property
+    def cancelled(self) -> bool:
+        row = self.queue._execute("SELECT cancel_requested FROM jobs WHERE id = ?", (self.job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def check_cancelled(self) -> None:
+        if self.cancelled:
+            raise JobCancelled()
+
+
+class JobQueue:
+    """
+    基于 SQLite 的本地任务队列，不依赖外部消息代理
+    - 任务按 priority 降序、提交时间升序取出；领取用 BEGIN IMMEDIATE 事务，多个进程共用同一数据库也不会重复执行
+    - 每个进程最多 workers 个工作线程同时执行
+    - 排队中的任务可直接取消；运行中的任务在处理函数调用 ctx.progress / ctx.check_cancelled 时停止
+    - 完成的任务保留 result_ttl 秒后删除
+    """
+
+    def __init__(self, path: str, workers: int = 2, result_ttl: float = DEFAULT_RESULT_TTL):
+        self.path = path
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self.handlers: Dict[str, Callable[[Dict[str, Any], JobContext], Any]] = {}
+        self.cleanups: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+        # 可以通过 POST /jobs 直接提交的任务类型；其余类型只能由服务端自己构造 payload 后提交
+        self.public_kinds: set = set()
+        self._local = threading.local()
+        self._wakeup = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        # 每次 start() 一个停止标志；stop() 之后可以再次 start()，上一批线程不会被复活
+        self._stop = threading.Event()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            if 'worker_token' not in {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}:
+                conn.execute("ALTER TABLE jobs ADD COLUMN worker_token TEXT")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        return self._conn().execute(sql, params)
+
+    def register(self, kind: str, handler: Callable[[Dict[str, Any], JobContext], Any],
+                 cleanup: Optional[Callable[[Dict[str, Any]], None]] = None, public: bool = True) -> None:
+        """
+        handler(payload, ctx) returns a JSON-serializable result; cleanup(payload) runs once the job ends
+        public=False: the payload is built by the server (e.g. paths of spooled files) and must not come from clients
+        """
+        self.handlers[kind] = handler
+        if cleanup is not None:
+            self.cleanups[kind] = cleanup
+        if public:
+            self.public_kinds.add(kind)
+        else:
+            self.public_kinds.discard(kind)
+
+    def submit(self, kind: str, payload: Dict[str, Any], priority: int = 0) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO jobs (id, kind, priority, status, payload, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, kind, int(priority), QUEUED, json.dumps(payload), time.time())
+        )
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str, include_result: bool = False) -> Optional[Dict[str, Any]]:
+        row = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or (row['expires_at'] is not None and row['expires_at'] < time.time()):
+            return None
+        return self._row_to_dict(row, include_result)
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        if status:
+            rows = self._execute("SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit))
+        else:
+            rows = self._execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,))
+        return [self._row_to_dict(row) for row in rows]
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a job; returns its status afterwards, or None if it does not exist"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT status, kind, payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            if row['status'] == QUEUED:
+                now = time.time()
+                conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, expires_at = ? WHERE id = ?",
+                    (CANCELLED, now, now + self.result_ttl, job_id)
+                )
+                status = CANCELLED
+            else:
+                if row['status'] == RUNNING:
+                    conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+                status = row['status']
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if status == CANCELLED and row['status'] == QUEUED:
+            self._cleanup(row['kind'], row['payload'])
+        return status
+
+    def purge_expired(self) -> int:
+        """Delete finished jobs past their retention period"""
+        return self._execute("DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),)).rowcount
+
+    def start(self) -> None:
+        """Start the worker threads (idempotent); jobs left running by a process that no longer exists are requeued"""
+        if self._threads:
+            return
+        with self._wakeup:
+            if self._threads:
+                return
+            rows = self._execute("SELECT id, worker_pid, worker_token FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+            for row in rows:
+                # 同一 PID 但启动时间不同的进程不是当初领取任务的那个
+                if row['worker_pid'] is None or row['worker_token'] != worker_token(row['worker_pid']):
+                    self._execute(
+                        "UPDATE jobs SET status = ?, started_at = NULL, worker_pid = NULL, worker_token = NULL "
+                        "WHERE id = ? AND status = ?",
+                        (QUEUED, row['id'], RUNNING)
+                    )
+            self._stop = stop = threading.Event()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, args=(stop,), name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the worker threads once their current job finishes; waits up to timeout for each"""
+        with self._wakeup:
+            threads, self._threads = self._threads, []
+            self._stop.set()
+            self._wakeup.notify_all()
+        for thread in threads:
+            thread.join(timeout)
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY priority DESC, created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, started_at = ?, worker_pid = ?, worker_token = ? WHERE id = ?",
+                    (RUNNING, time.time(), os.getpid(), own_token(os.getpid()), row['id'])
+                )
+            conn.execute("COMMIT")
+            return row
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _work(self, stop: threading.Event) -> None:
+        last_purge = 0.0
+        while not stop.is_set():
+            if time.monotonic() - last_purge > 60:
+                last_purge = time.monotonic()
+                self.purge_expired()
+            try:
+                row = self._claim()
+            except sqlite3.OperationalError as e:
+                logger.error(f"领取任务失败: {str(e)}")
+                row = None
+            if row is None:
+                with self._wakeup:
+                    self._wakeup.wait(POLL_INTERVAL)
+                continue
+            self._run(row)
+
+    def _run(self, row: sqlite3.Row) -> None:
+        job_id = row['id']
+        ctx = JobContext(self, job_id)
+        result, error, status = None, None, SUCCEEDED
+        start = time.perf_counter()
+        try:
+            result = json.dumps(self.handlers[row['kind']](json.loads(row['payload']), ctx), default=str)
+        except JobCancelled:
+            status = CANCELLED
+        except Exception as e:
+            logger.error(f"任务 {job_id} ({row['kind']}) 失败: {str(e)}")
+            status, error = FAILED, str(e)
+        finally:
+            self._cleanup(row['kind'], row['payload'])
+        now = time.time()
+        self._execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, progress = CASE WHEN ? THEN 1 ELSE progress END, "
+            "finished_at = ?, expires_at = ? WHERE id = ?",
+            (status, result, error, status == SUCCEEDED, now, now + self.result_ttl, job_id)
+        )
+        logger.info(f"任务 {job_id} ({row['kind']}) {status}, 用时 {time.perf_counter() - start:.3f}s")
+
+    def _cleanup(self, kind: str, payload: str) -> None:
+        cleanup = self.cleanups.get(kind)
+        if cleanup is None:
+            return
+        try:
+            cleanup(json.loads(payload))
+        except Exception as e:
+            logger.error(f"任务清理失败: {str(e)}")
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row, include_result: bool = False) -> Dict[str, Any]:
+        def timestamp(value: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(value).isoformat(timespec='seconds') if value is not None else None
+
+        job = {
+            'id': row['id'],
+            'kind': row['kind'],
+            'priority': row['priority'],
+            'status': row['status'],
+            'progress': round(row['progress'], 4),
+            'error': row['error'],
+            'created_at': timestamp(row['created_at']),
+            'started_at': timestamp(row['started_at']),
+            'finished_at': timestamp(row['finished_at']),
+            'expires_at': timestamp(row['expires_at']),
+        }
+        if include_result:
+            job['result'] = json.loads(row['result']) if row['result'] is not None else None
+        return job
@@ -1,19 +1,65 @@
-from fastapi import FastAPI, HTTPException, Body, UploadFile, File
+import time
+# 开始导入本模块的时间（在其他导入之前取），用于 /health 报告启动耗时
+STARTED_AT = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Body, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
-import uvicorn
+from typing import List, Optional, Dict, Any, Iterator, Callable
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-import random
 import re
-from fastapi.responses import JSONResponse
+import json
+import hashlib
+import os
+import logging
+import shutil
+import asyncio
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from fastapi.responses import JSONResponse, StreamingResponse
 from math import ceil
-from data_processing.fasta_vcf_parser import parse_fasta, parse_vcf, parse_csv
-from routers.ai_predict import router as ai_router
+from data_processing.fasta_vcf_parser import CHUNK_SIZE
+from data_processing.upload_processing import summarize_upload_stored, summarize_upload_path, iter_decompressed, iter_file_chunks, detect_filetype
+from data_processing.mutation_caller import call_mutations_in_fasta
+from routers.ai_predict import router as ai_router, registry as model_registry, start_model_loading
+from routers.simulation import router as simulation_router
+from routers.simulation import run_transmission_sweep, run_transmission_ensemble, run_transmission_metapopulation
+from routers.jobs import router as jobs_router, job_queue, JOB_SPOOL_DIR, JOB_SHUTDOWN_TIMEOUT, spooled_path
+from routers.uploads import router as uploads_router, upload_store
+from routers.annotations import router as annotations_router, annotation_store
+from routers.sequences import router as sequences_router, sequence_store
+from routers.lineages import router as lineages_router, lineage_classifier, LINEAGE_MIN_SCORE
+from routers.metrics import router as metrics_router
+from metrics.middleware import MetricsMiddleware
+from streaming.sse import event_stream, result_events
+from jobs.queue import JobContext
+from metrics.registry import UPLOAD_FILES, UPLOAD_BYTES, UPLOAD_RECORDS, UPLOAD_PARSE_SECONDS
+from cache.result_cache import result_cache
+from simulation.metapopulation import MobilityNetwork, normalize_location, run_metapopulation
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+
+startup_timings: Dict[str, Optional[float]] = {"serving": None, "ready": None}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    启动时不做耗时工作：模型在后台线程加载，事件循环立即开始接受请求；
+    /health 随即可用，/health/ready 在模型加载结束后才返回 200
+    任务队列的工作线程随服务启动（重启前排队或中断的任务立即继续），关闭时等待当前任务结束
+    """
+    startup_timings["serving"] = round(time.perf_counter() - STARTED_AT, 4)
+    start_model_loading()
+    job_queue.start()
+    yield
+    await asyncio.to_thread(job_queue.stop, JOB_SHUTDOWN_TIMEOUT)
 
 app = FastAPI(title="SARS-CoV-2 Analysis API",
              description="API for SARS-CoV-2 genomic analysis and transmission modeling",
-             version="1.0.0")
+             version="1.0.0",
+             lifespan=lifespan)
 
 # 配置CORS
 app.add_middleware(
@@ -26,6 +72,16 @@ app.add_middleware(
 
 # 注册路由
 app.include_router(ai_router)
+app.include_router(simulation_router)
+app.include_router(jobs_router)
+app.include_router(uploads_router)
+app.include_router(annotations_router)
+app.include_router(sequences_router)
+app.include_router(lineages_router)
+app.include_router(metrics_router)
+
+# 每个请求的耗时直方图和可选的采样剖析
+app.add_middleware(MetricsMiddleware)
 
 # 数据模型
 class VariantData(BaseModel):
@@ -40,40 +96,6 @@ class AnalysisRequest(BaseModel):
     analysis_type: str
     parameters: Optional[dict] = None
 
-# 已知的重要突变及其影响
-KNOWN_MUTATIONS = {
-    "S:D614G": {
-        "impact": "High",
-        "description": "Enhances viral transmissibility",
-        "frequency": 0.95,
-        "notes": "Characteristic mutation of major global strains"
-    },
-    "S:N501Y": {
-        "impact": "High",
-        "description": "Increases ACE2 receptor binding",
-        "frequency": 0.85,
-        "notes": "Characteristic mutation of Alpha and Omicron variants"
-    },
-    "S:E484K": {
-        "impact": "High",
-        "description": "May affect antibody neutralization",
-        "frequency": 0.75,
-        "notes": "Associated with immune escape"
-    },
-    "S:L452R": {
-        "impact": "Medium",
-        "description": "May affect antibody neutralization",
-        "frequency": 0.65,
-        "notes": "Characteristic mutation of Delta variant"
-    },
-    "S:P681H": {
-        "impact": "Medium",
-        "description": "May enhance viral entry into cells",
-        "frequency": 0.55,
-        "notes": "Related to viral replication"
-    }
-}
-
 def parse_mutation(mutation: str) -> Dict[str, str]:
     """Parse mutation string, return gene and mutation site"""
     pattern = r"([A-Za-z0-9]+):([A-Z])(\d+)([A-Z])"
@@ -88,11 +110,26 @@ def parse_mutation(mutation: str) -> Dict[str, str]:
         }
     return None
 
+def stable_frequency(mutation: str, low: float, high: float) -> float:
+    """Deterministic placeholder frequency in [low, high] derived from the mutation string"""
+    fraction = int(hashlib.md5(mutation.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+    return round(low + (high - low) * fraction, 2)
+
 def analyze_mutation(mutation: str) -> Dict[str, Any]:
     """Analyze the impact of a single mutation"""
-    if mutation in KNOWN_MUTATIONS:
-        return {**KNOWN_MUTATIONS[mutation], "mutation": mutation}
-    
+    return describe_mutation(mutation, annotation_store.get(mutation))
+
+def describe_mutation(mutation: str, annotation: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """注释库中有记录时直接使用，否则按基因给出默认评估"""
+    if annotation is not None:
+        return {
+            "impact": annotation["impact"],
+            "description": annotation["description"],
+            "frequency": annotation["frequency"],
+            "notes": annotation["notes"],
+            "mutation": mutation
+        }
+
     parsed = parse_mutation(mutation)
     if not parsed:
         return {
@@ -109,7 +146,7 @@ def analyze_mutation(mutation: str) -> Dict[str, Any]:
             "mutation": mutation,
             "impact": "Medium",
             "description": "Spike protein mutation",
-            "frequency": round(random.uniform(0.1, 0.5), 2),
+            "frequency": stable_frequency(mutation, 0.1, 0.5),
             "notes": "Further research needed on its impact"
         }
     elif gene == "N":
@@ -117,7 +154,7 @@ def analyze_mutation(mutation: str) -> Dict[str, Any]:
             "mutation": mutation,
             "impact": "Low",
             "description": "Nucleocapsid protein mutation",
-            "frequency": round(random.uniform(0.1, 0.3), 2),
+            "frequency": stable_frequency(mutation, 0.1, 0.3),
             "notes": "May affect viral packaging"
         }
     else:
@@ -125,31 +162,52 @@ def analyze_mutation(mutation: str) -> Dict[str, Any]:
             "mutation": mutation,
             "impact": "Low",
             "description": f"{gene} gene mutation",
-            "frequency": round(random.uniform(0.1, 0.2), 2),
+            "frequency": stable_frequency(mutation, 0.1, 0.2),
             "notes": "Further research needed on its impact"
         }
 
-def generate_variant_summary(mutations: List[str]) -> List[Dict[str, Any]]:
+def generate_variant_summary(mutations: List[str], analyzed: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
     """生成变异分析摘要"""
+    if analyzed is not None:
+        return [analyzed[mutation] for mutation in mutations]
     return [analyze_mutation(mutation) for mutation in mutations]
 
-def generate_transmission_network() -> List[Dict[str, Any]]:
-    """生成传播网络数据"""
-    dates = [(datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(30)]
+def generate_transmission_network(samples: List[VariantData], days: int = 30) -> List[Dict[str, Any]]:
+    """
+    以样本采集地为种子的多地区 SEIR 预测：从最晚的采样日期起向后 days 天
+    cases 为各地区感染者总数，regions 为仍有感染者的地区数
+    """
+    locations = [sample.location.strip() or "Unknown" for sample in samples]
+    names = list({normalize_location(name): name for name in reversed(locations)}.values())[::-1]
+    if not names:
+        return []
+    network = MobilityNetwork.small_world(names)
+    cases, _ = network.seed_cases(locations)
+    result = run_metapopulation(network, cases, beta=0.3, sigma=0.2, gamma=0.1, days=days,
+                                curve_regions=range(len(network)))
+    sample_dates = []
+    for sample in samples:
+        try:
+            sample_dates.append(datetime.strptime(sample.date, "%Y-%m-%d"))
+        except (TypeError, ValueError):
+            pass
+    start = max(sample_dates) if sample_dates else datetime.now()
     return [
         {
-            "date": date,
-            "cases": random.randint(100, 1000),
-            "variants": random.randint(50, 500)
+            "date": (start + timedelta(days=day + 1)).strftime("%Y-%m-%d"),
+            "cases": int(result['totals'][day, 1]),
+            "regions": int((result['curves'][day, :, 1] >= 1).sum())
         }
-        for date in dates
+        for day in range(days)
     ]
 
-def generate_risk_assessment(mutations: List[str]) -> List[Dict[str, Any]]:
+def generate_risk_assessment(mutations: List[str], analyzed: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
     """基于突变生成风险评估"""
-    high_impact_count = sum(1 for m in mutations if analyze_mutation(m)["impact"] == "High")
-    medium_impact_count = sum(1 for m in mutations if analyze_mutation(m)["impact"] == "Medium")
-    
+    impacts = [(analyzed[m] if analyzed is not None else analyze_mutation(m))["impact"] for m in mutations]
+    return risk_assessment_for_counts(impacts.count("High"), impacts.count("Medium"))
+
+def risk_assessment_for_counts(high_impact_count: int, medium_impact_count: int) -> List[Dict[str, Any]]:
+    """根据高/中影响突变数量给出风险等级"""
     if high_impact_count >= 2:
         return [
             {
@@ -180,25 +238,92 @@ def generate_risk_assessment(mutations: List[str]) -> List[Dict[str, Any]]:
             }
         ]
 
+def iter_variant_results(samples: List[VariantData]) -> Iterator[Dict[str, Any]]:
+    """
+    逐个样本产出分析结果：不重复的突变在首次出现时评估一次，之后直接复用；
+    传播网络和相同 (高, 中) 影响计数的风险评估在请求内只计算一次；
+    所有样本的谱系一次性批量判定，请求中已给出 variant_type 的样本保留原值
+    """
+    analyzed: Dict[str, Dict[str, Any]] = {}
+    transmission_network = generate_transmission_network(samples)
+    risk_cache: Dict[tuple, List[Dict[str, Any]]] = {}
+    lineages = lineage_classifier().classify([sample.mutations for sample in samples], LINEAGE_MIN_SCORE)
+
+    for idx, sample in enumerate(samples):
+        # 每个样本中首次出现的突变一次性批量查询注释库
+        new = [m for m in dict.fromkeys(sample.mutations) if m not in analyzed]
+        if new:
+            annotations = annotation_store.lookup_many(new)
+            for mutation in new:
+                analyzed[mutation] = describe_mutation(mutation, annotations.get(mutation))
+        impacts = [analyzed[m]["impact"] for m in sample.mutations]
+        counts = (impacts.count("High"), impacts.count("Medium"))
+        if counts not in risk_cache:
+            risk_cache[counts] = risk_assessment_for_counts(*counts)
+        yield {
+            "sequence_id": sample.sequence_id or f"sample{idx+1}",
+            "variant_type": sample.variant_type or (lineages[idx]["lineage"] if lineages[idx] else None),
+            "lineage": lineages[idx],
+            "variant_summary": generate_variant_summary(sample.mutations, analyzed),
+            "transmission_network": transmission_network,
+            "risk_assessment": risk_cache[counts]
+        }
+
+def analyze_variant_batch(samples: List[VariantData]) -> List[Dict[str, Any]]:
+    """批量分析（整批结果一次返回）"""
+    return list(iter_variant_results(samples))
+
+def ndjson_lines(results: Iterator[Dict[str, Any]]) -> Iterator[bytes]:
+    for result in results:
+        yield json.dumps(result, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def simulate_transmission(initial_cases: int, beta: float, gamma: float, days: int, N: int = 10000,
+                          progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+    """单一 (beta, gamma) 的逐日离散 SIR 模型；progress(fraction) 每模拟完一天调用一次"""
+    S = N - initial_cases
+    I = initial_cases
+    R = 0
+    curve = []
+    total_infections = I
+    peak_cases = I
+    peak_day = 0
+    for day in range(days):
+        new_infected = beta * S * I / N
+        new_recovered = gamma * I
+        S = S - new_infected
+        I = I + new_infected - new_recovered
+        R = R + new_recovered
+        curve.append({"day": day + 1, "cases": int(I)})
+        if I > peak_cases:
+            peak_cases = int(I)
+            peak_day = day + 1
+        total_infections = N - int(S)
+        if progress is not None:
+            progress((day + 1) / days)
+    R0 = round(beta / gamma, 2) if gamma > 0 else None
+    results = {
+        "curve": curve,
+        "R0": R0,
+        "total_infections": total_infections,
+        "peak_cases": peak_cases,
+        "peak_day": peak_day
+    }
+    return results
+
 # API路由
 @app.get("/")
 async def root():
     return {"message": "Welcome to SARS-CoV-2 Analysis API"}
 
 @app.post("/analyze/variants")
-async def analyze_variants(request: AnalysisRequest):
+async def analyze_variants(request: AnalysisRequest, stream: bool = False):
+    """stream=true 时以 NDJSON 逐行返回每个样本的结果，不在内存中拼出整个响应"""
+    if stream:
+        return StreamingResponse(ndjson_lines(iter_variant_results(request.data)), media_type="application/x-ndjson")
     try:
         # 支持批量样本分析
-        results = []
-        for idx, sample in enumerate(request.data):
-            seq_id = sample.sequence_id or f"sample{idx+1}"
-            sample_result = {
-                "sequence_id": seq_id,
-                "variant_summary": generate_variant_summary(sample.mutations),
-                "transmission_network": generate_transmission_network(),
-                "risk_assessment": generate_risk_assessment(sample.mutations)
-            }
-            results.append(sample_result)
+        results = analyze_variant_batch(request.data)
         return {
             "status": "success",
             "message": "Batch analysis completed",
@@ -207,132 +332,343 @@ async def analyze_variants(request: AnalysisRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/analyze/variants/events")
+async def analyze_variants_events(request: AnalysisRequest):
+    """
+    Server-sent events：每个样本算完即发送 result 事件，并发送 progress（完成百分比）和最终的 done 事件
+    客户端读取慢时计算暂停，断开连接时计算停止
+    """
+    samples = request.data
+    return event_stream(result_events(([result] for result in iter_variant_results(samples)), len(samples)),
+                        "/analyze/variants/events")
+
+def readiness() -> Dict[str, Any]:
+    """各启动任务的状态；模型加载失败也算就绪（预测回退到规则方法），状态中给出原因"""
+    ready = model_registry.ready.is_set()
+    if ready and startup_timings["ready"] is None:
+        startup_timings["ready"] = round(time.perf_counter() - STARTED_AT, 4)
+    active = model_registry.active
+    model = "loaded" if active is not None else ("unavailable" if ready else "loading")
+    return {
+        "ready": ready,
+        "checks": {
+            "model": {
+                "status": model,
+                "version": active.version if active is not None else None,
+                "error": model_registry.last_error,
+            }
+        },
+        "startup_seconds": dict(startup_timings),
+    }
+
 @app.get("/health")
 async def health_check():
+    """存活检查：进程能响应即为 healthy；ready 单独报告启动任务是否完成"""
+    return {"status": "healthy", **readiness()}
+
+@app.get("/health/live")
+async def liveness():
     return {"status": "healthy"}
 
+@app.get("/health/ready")
+async def readiness_check():
+    """就绪检查：模型仍在加载时返回 503，负载均衡器据此暂不转发流量"""
+    report = readiness()
+    return JSONResponse(status_code=200 if report["ready"] else 503,
+                        content={"status": "ready" if report["ready"] else "starting", **report})
+
 @app.post("/analyze/transmission")
 async def analyze_transmission(
     payload: dict = Body(...)
 ):
     try:
-        mutations = payload.get("mutations", [])
-        initial_cases = int(payload.get("initial_cases", 10))
-        beta = float(payload.get("beta", 0.3))
-        gamma = float(payload.get("gamma", 0.1))
-        days = int(payload.get("days", 30))
-        N = 10000  # total population (can be parameterized)
-        S = N - initial_cases
-        I = initial_cases
-        R = 0
-        curve = []
-        total_infections = I
-        peak_cases = I
-        peak_day = 0
-        for day in range(days):
-            new_infected = beta * S * I / N
-            new_recovered = gamma * I
-            S = S - new_infected
-            I = I + new_infected - new_recovered
-            R = R + new_recovered
-            curve.append({"day": day + 1, "cases": int(I)})
-            if I > peak_cases:
-                peak_cases = int(I)
-                peak_day = day + 1
-            total_infections = N - int(S)
-        R0 = round(beta / gamma, 2) if gamma > 0 else None
-        results = {
-            "curve": curve,
-            "R0": R0,
-            "total_infections": total_infections,
-            "peak_cases": peak_cases,
-            "peak_day": peak_day
+        params = {
+            "initial_cases": int(payload.get("initial_cases", 10)),
+            "beta": float(payload.get("beta", 0.3)),
+            "gamma": float(payload.get("gamma", 0.1)),
+            "days": int(payload.get("days", 30)),
         }
-        return {"status": "success", "results": results}
+        # 以解析后的参数作为缓存键，"10" 与 10 视为同一请求
+        return await result_cache.get_or_compute_async(
+            "transmission", params, lambda: {"status": "success", "results": simulate_transmission(**params)}
+        )
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
+def simulate_vaccine_coverage(vaccine_type: str, coverage: float, immunity_duration: int, population: int) -> Dict[str, Any]:
+    """免疫覆盖率曲线与预防感染数估计"""
+    days = 180 if immunity_duration < 180 else immunity_duration
+    # 模拟免疫覆盖率曲线
+    coverage_curve = []
+    for day in range(1, days + 1):
+        # 假设接种在前30天逐步完成
+        if day <= 30:
+            current_coverage = coverage * (day / 30)
+        else:
+            # 免疫持续期后逐步下降
+            decay = max(0, (day - immunity_duration) / 30)
+            current_coverage = max(0, coverage - decay * coverage)
+        coverage_curve.append({"day": day, "coverage": round(current_coverage, 2)})
+    final_immunity_rate = round(coverage_curve[-1]["coverage"], 2)
+    # 假设每1%覆盖可预防100例感染
+    infections_prevented = int(final_immunity_rate * population / 100)
+    optimal_strategy = f"Prioritize high-risk groups, maximize {coverage}% coverage with {vaccine_type} vaccine."
+    return {
+        "coverage_curve": coverage_curve,
+        "final_immunity_rate": final_immunity_rate,
+        "infections_prevented": infections_prevented,
+        "optimal_strategy": optimal_strategy
+    }
+
 @app.post("/analyze/vaccine")
 async def analyze_vaccine(
     payload: dict = Body(...)
 ):
     try:
-        mutations = payload.get("mutations", [])
-        vaccine_type = payload.get("vaccine_type", "mRNA")
-        coverage = float(payload.get("coverage", 70))
-        immunity_duration = int(payload.get("immunity_duration", 180))
-        population = int(payload.get("population", 10000))
-        days = 180 if immunity_duration < 180 else immunity_duration
-        # 模拟免疫覆盖率曲线
-        coverage_curve = []
-        for day in range(1, days + 1):
-            # 假设接种在前30天逐步完成
-            if day <= 30:
-                current_coverage = coverage * (day / 30)
-            else:
-                # 免疫持续期后逐步下降
-                decay = max(0, (day - immunity_duration) / 30)
-                current_coverage = max(0, coverage - decay * coverage)
-            coverage_curve.append({"day": day, "coverage": round(current_coverage, 2)})
-        final_immunity_rate = round(coverage_curve[-1]["coverage"], 2)
-        # 假设每1%覆盖可预防100例感染
-        infections_prevented = int(final_immunity_rate * population / 100)
-        optimal_strategy = f"Prioritize high-risk groups, maximize {coverage}% coverage with {vaccine_type} vaccine."
-        results = {
-            "coverage_curve": coverage_curve,
-            "final_immunity_rate": final_immunity_rate,
-            "infections_prevented": infections_prevented,
-            "optimal_strategy": optimal_strategy
+        params = {
+            "vaccine_type": payload.get("vaccine_type", "mRNA"),
+            "coverage": float(payload.get("coverage", 70)),
+            "immunity_duration": int(payload.get("immunity_duration", 180)),
+            "population": int(payload.get("population", 10000)),
         }
-        return {"status": "success", "results": results}
+        return await result_cache.get_or_compute_async(
+            "vaccine", params, lambda: {"status": "success", "results": simulate_vaccine_coverage(**params)}
+        )
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """结果缓存的命中/未命中计数与占用"""
+    return result_cache.stats()
+
+@app.delete("/cache")
+async def clear_cache():
+    result_cache.clear()
+    return {"status": "success"}
+
+# 上传文件在工作池中解析，避免阻塞事件循环；大文件交给进程池
+UPLOAD_WORKERS = int(os.environ.get('UPLOAD_WORKERS', min(8, os.cpu_count() or 1)))
+PROCESS_POOL_MIN_BYTES = int(os.environ.get('UPLOAD_PROCESS_POOL_MIN_BYTES', 32 * 1024 * 1024))
+upload_thread_pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix='upload')
+upload_process_pool: Optional[ProcessPoolExecutor] = None
+
+def get_upload_process_pool() -> ProcessPoolExecutor:
+    global upload_process_pool
+    if upload_process_pool is None:
+        upload_process_pool = ProcessPoolExecutor(max_workers=UPLOAD_WORKERS)
+    return upload_process_pool
+
+def spool_to_disk(file: UploadFile, directory: Optional[str] = None) -> str:
+    """Copy an upload to a named temporary file so a worker process can open it"""
+    file.file.seek(0)
+    with tempfile.NamedTemporaryFile(prefix='upload-', dir=directory, delete=False) as spooled:
+        shutil.copyfileobj(file.file, spooled, CHUNK_SIZE)
+    return spooled.name
+
+async def parse_upload(file: UploadFile, records_path: Optional[str], fasta_path: Optional[str] = None) -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    if file.size is not None and file.size >= PROCESS_POOL_MIN_BYTES:
+        path = await loop.run_in_executor(upload_thread_pool, spool_to_disk, file)
+        try:
+            return await loop.run_in_executor(
+                get_upload_process_pool(), summarize_upload_path, path, file.filename, records_path, fasta_path
+            )
+        finally:
+            os.unlink(path)
+    return await loop.run_in_executor(
+        upload_thread_pool, summarize_upload_stored, file.file, file.filename, records_path, fasta_path
+    )
+
+def record_upload_metrics(result: Dict[str, Any], size: Optional[int], elapsed: float) -> None:
+    """按文件类型统计解析的文件数、字节数、记录数和耗时"""
+    filetype = result.get("filetype") or "unknown"
+    UPLOAD_FILES.inc(filetype=filetype, status=result.get("status", "error"))
+    UPLOAD_PARSE_SECONDS.observe(elapsed, filetype=filetype)
+    if size:
+        UPLOAD_BYTES.inc(size, filetype=filetype)
+    if result.get("status") == "success":
+        UPLOAD_RECORDS.inc(result.get("count", 0), filetype=filetype)
+
+async def process_upload(file: UploadFile, store: bool = False) -> Dict[str, Any]:
+    upload_id, records_path = upload_store.create() if store else (None, None)
+    # 保存的 FASTA 上传同时落盘一份解压副本并建立 .fai 索引，之后可按 id 随机读取
+    fasta_path = upload_store.fasta_path(upload_id) if upload_id is not None else None
+    start = time.perf_counter()
+    try:
+        result = await parse_upload(file, records_path, fasta_path)
+    except Exception as e:
+        result = {"status": "error", "filename": file.filename, "detail": str(e)}
+    record_upload_metrics(result, file.size, time.perf_counter() - start)
+    if upload_id is not None:
+        if result.get("status") == "success":
+            upload_store.finish(upload_id, result)
+            result["upload_id"] = upload_id
+            result["records_url"] = f"/uploads/{upload_id}/records"
+            if result.get("indexed"):
+                result["sequences_url"] = f"/uploads/{upload_id}/sequences"
+        else:
+            upload_store.discard(upload_id)
+    return result
+
 @app.post("/upload")
-async def upload_file(files: List[UploadFile] = File(...)):
-    results = []
+async def upload_file(files: List[UploadFile] = File(...), store: bool = False):
+    """
+    store=true 时保存全部解析记录，可通过 /uploads/{upload_id}/records 分页或以 NDJSON 流式读取；
+    FASTA 文件另外建立 .fai 索引，可通过 /uploads/{upload_id}/sequences/{id} 按 id 读取记录或区间
+    """
     try:
-        for file in files:
-            filename = file.filename
-            content = (await file.read()).decode('utf-8')
-            # 判断文件类型
-            if filename.lower().endswith('.fasta') or filename.lower().endswith('.fa'):
-                filetype = 'FASTA'
-                records = parse_fasta(content)
-            elif filename.lower().endswith('.vcf'):
-                filetype = 'VCF'
-                records = parse_vcf(content)
-            elif filename.lower().endswith('.csv'):
-                filetype = 'CSV'
-                records = parse_csv(content)
-            else:
-                # 简单内容判断
-                if content.lstrip().startswith('>'):
-                    filetype = 'FASTA'
-                    records = parse_fasta(content)
-                elif content.lstrip().startswith('#CHROM') or '\t' in content:
-                    filetype = 'VCF'
-                    records = parse_vcf(content)
-                elif ',' in content:
-                    filetype = 'CSV'
-                    records = parse_csv(content)
-                else:
-                    results.append({
-                        "status": "error",
-                        "filename": filename,
-                        "detail": "Unsupported file type."
-                    })
-                    continue
-            results.append({
-                "status": "success",
-                "filetype": filetype,
-                "filename": filename,
-                "count": len(records),
-                "records": records[:100]  # 最多返回前100条，防止过大
-            })
+        # 各文件并发解析（支持 .gz / BGZF 压缩），结果按上传顺序返回
+        results = await asyncio.gather(*(process_upload(file, store) for file in files))
         return {"results": results}
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
+def call_upload_mutations(file: UploadFile) -> Dict[str, Any]:
+    """Call amino-acid mutations for every genome in one (optionally compressed) FASTA upload"""
+    file.file.seek(0)
+    samples = call_mutations_in_fasta(
+        iter_decompressed(iter_file_chunks(file.file)),
+        executor=get_upload_process_pool(),
+        max_pending=2 * UPLOAD_WORKERS
+    )
+    return {"status": "success", "filename": file.filename, "count": len(samples), "samples": samples}
+
+@app.post("/analyze/call_mutations")
+async def call_mutations(files: List[UploadFile] = File(...)):
+    """与参考基因组 NC_045512.2 比对，输出可直接提交给 /analyze/variants 和 /ai_predict 的突变列表"""
+    loop = asyncio.get_running_loop()
+
+    async def run(file: UploadFile) -> Dict[str, Any]:
+        try:
+            return await loop.run_in_executor(upload_thread_pool, call_upload_mutations, file)
+        except Exception as e:
+            return {"status": "error", "filename": file.filename, "detail": str(e)}
+
+    return {"results": await asyncio.gather(*(run(file) for file in files))}
+
+def ingest_sequences(file: UploadFile) -> Dict[str, Any]:
+    """Stream one (optionally compressed) FASTA upload into the sequence corpus"""
+    file.file.seek(0)
+    chunks = iter_decompressed(iter_file_chunks(file.file))
+    head = next(chunks, b'')
+    if detect_filetype(file.filename or '', head) != 'FASTA':
+        return {"status": "error", "filename": file.filename, "detail": "Only FASTA files can be stored."}
+
+    def replay():
+        if head:
+            yield head
+        yield from chunks
+
+    return {"status": "success", "filename": file.filename, **sequence_store.ingest_fasta(replay())}
+
+@app.post("/sequences")
+async def upload_sequences(files: List[UploadFile] = File(...)):
+    """
+    FASTA 记录存入 2 位编码的序列库，之后按 id 通过 /sequences/{id} 读取
+    内容相同的序列只存一份：已存在的基因组再次上传只做哈希比对（deduplicated 计数）
+    """
+    loop = asyncio.get_running_loop()
+
+    async def run(file: UploadFile) -> Dict[str, Any]:
+        try:
+            return await loop.run_in_executor(upload_thread_pool, ingest_sequences, file)
+        except Exception as e:
+            return {"status": "error", "filename": file.filename, "detail": str(e)}
+
+    return {"results": await asyncio.gather(*(run(file) for file in files))}
+
+# 后台任务：耗时的分析通过 /jobs 提交，立即返回任务 id，由任务队列的工作线程执行
+def endpoint_job(endpoint):
+    """
+    Wrap endpoint(payload, progress) as a job handler; progress is ctx.progress,
+    so the job reports progress and stops at the next step once cancelled
+    """
+    def run(payload: Dict[str, Any], ctx: JobContext) -> Any:
+        try:
+            return endpoint(payload, progress=ctx.progress)
+        except HTTPException as e:
+            raise ValueError(e.detail)
+    return run
+
+def run_variants_job(payload: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    request = AnalysisRequest(**payload)
+    results = []
+    for result in iter_variant_results(request.data):
+        results.append(result)
+        ctx.progress(len(results) / len(request.data))
+    return {"status": "success", "message": "Batch analysis completed", "results": results}
+
+def run_transmission_job(payload: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    results = simulate_transmission(
+        int(payload.get("initial_cases", 10)), float(payload.get("beta", 0.3)),
+        float(payload.get("gamma", 0.1)), int(payload.get("days", 30)), progress=ctx.progress
+    )
+    return {"status": "success", "results": results}
+
+def run_upload_job(payload: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    results = []
+    for i, spooled in enumerate(payload["files"]):
+        path = spooled_path(spooled["path"])
+        start = time.perf_counter()
+        try:
+            results.append(summarize_upload_path(path, spooled["filename"]))
+        except Exception as e:
+            results.append({"status": "error", "filename": spooled["filename"], "detail": str(e)})
+        record_upload_metrics(results[-1], os.path.getsize(path), time.perf_counter() - start)
+        ctx.progress((i + 1) / len(payload["files"]))
+    return {"results": results}
+
+def run_call_mutations_job(payload: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    results = []
+    for i, spooled in enumerate(payload["files"]):
+        path = spooled_path(spooled["path"])
+        try:
+            with open(path, 'rb') as f:
+                samples = call_mutations_in_fasta(
+                    iter_decompressed(iter_file_chunks(f)),
+                    executor=get_upload_process_pool(),
+                    max_pending=2 * UPLOAD_WORKERS
+                )
+            results.append({"status": "success", "filename": spooled["filename"], "count": len(samples), "samples": samples})
+        except Exception as e:
+            results.append({"status": "error", "filename": spooled["filename"], "detail": str(e)})
+        ctx.progress((i + 1) / len(payload["files"]))
+    return {"results": results}
+
+def remove_spooled_files(payload: Dict[str, Any]) -> None:
+    """只删除任务暂存目录中的文件"""
+    for spooled in payload["files"]:
+        path = spooled_path(spooled["path"])
+        if os.path.exists(path):
+            os.unlink(path)
+
+job_queue.register("analyze_variants", run_variants_job)
+job_queue.register("transmission", run_transmission_job)
+job_queue.register("transmission_sweep", endpoint_job(run_transmission_sweep))
+job_queue.register("transmission_ensemble", endpoint_job(run_transmission_ensemble))
+job_queue.register("transmission_metapopulation", endpoint_job(run_transmission_metapopulation))
+# payload 含服务端文件路径，只能通过下面的上传接口提交
+job_queue.register("upload", run_upload_job, cleanup=remove_spooled_files, public=False)
+job_queue.register("call_mutations", run_call_mutations_job, cleanup=remove_spooled_files, public=False)
+
+async def submit_file_job(kind: str, files: List[UploadFile], priority: int) -> Dict[str, Any]:
+    """Spool uploads to disk (the request ends before the job runs) and queue them"""
+    loop = asyncio.get_running_loop()
+    paths = await asyncio.gather(*(
+        loop.run_in_executor(upload_thread_pool, spool_to_disk, file, JOB_SPOOL_DIR) for file in files
+    ))
+    payload = {"files": [{"path": path, "filename": file.filename} for path, file in zip(paths, files)]}
+    return {"status": "success", "job_id": job_queue.submit(kind, payload, priority)}
+
+@app.post("/jobs/upload", status_code=202)
+async def submit_upload_job(files: List[UploadFile] = File(...), priority: int = Form(0)):
+    return await submit_file_job("upload", files, priority)
+
+@app.post("/jobs/call_mutations", status_code=202)
+async def submit_call_mutations_job(files: List[UploadFile] = File(...), priority: int = Form(0)):
+    return await submit_file_job("call_mutations", files, priority)
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -0,0 +1 @@
+# This file makes the metrics directory a Python package 
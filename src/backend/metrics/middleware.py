@@ -0,0 +1,62 @@
+import os
+import time
+import uuid
+
+from metrics.registry import HTTP_REQUEST_SECONDS
+from metrics.profiler import SamplingProfiler, profile_store, DEFAULT_INTERVAL
+
+# 请求头 X-Profile: 1 触发单次请求的采样剖析；需显式设置 PROFILE_REQUESTS=1 才生效
+PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS', '0') == '1'
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', DEFAULT_INTERVAL))
+PROFILE_HEADER = b'x-profile'
+
+
+class MetricsMiddleware:
+    """
+    纯 ASGI 中间件（BaseHTTPMiddleware 每个请求要多花约 2ms）
+    记录每个请求到最后一个响应字节为止的耗时，流式响应也完整计入；按需对单个请求做采样剖析
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        profiler = profile_id = None
+        if PROFILE_REQUESTS and dict(scope['headers']).get(PROFILE_HEADER) == b'1':
+            profiler = SamplingProfiler(PROFILE_INTERVAL).start()
+            profile_id = uuid.uuid4().hex
+        start = time.perf_counter()
+        status = 500
+        finished = False
+
+        def finish() -> None:
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            elapsed = time.perf_counter() - start
+            # 用路由模板（如 /jobs/{job_id}）作标签，避免标签值随路径参数无限增长
+            route = getattr(scope.get('route'), 'path', 'unmatched')
+            HTTP_REQUEST_SECONDS.observe(elapsed, method=scope['method'], route=route, status=status)
+            if profiler is not None:
+                profiler.stop()
+                profile_store.add(profiler, f"{scope['method']} {scope['path']}", elapsed, profile_id)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if profile_id is not None:
+                    message['headers'] = list(message.get('headers', [])) + [(b'x-profile-id', profile_id.encode())]
+            elif message['type'] == 'http.response.body' and not message.get('more_body', False):
+                # 在发出最后一块之前记录，客户端收到响应后即可取到剖析结果
+                finish()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish()
@@ -0,0 +1,105 @@
+from collections import Counter as StackCounter, OrderedDict
+from typing import Dict, Optional
+import os
+import sys
+import threading
+import uuid
+
+# 只统计经过本项目代码的调用栈（src/ 下的文件），空闲的线程池和事件循环等待不计入
+SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_INTERVAL = 0.005
+# 中间件和 JSON 编码的递归会让栈很深，必须能走到请求入口的帧
+MAX_STACK_DEPTH = 512
+# 最多保留的最近剖析结果数
+MAX_PROFILES = 32
+
+
+class SamplingProfiler:
+    """
+    采样剖析器：后台线程每 interval 秒抓取一次所有线程的调用栈，汇总成折叠栈格式
+    （"线程;外层函数;...;内层函数 次数"，可直接用于 flamegraph.pl / speedscope）
+    开启时才有开销；同时处理的其他请求也可能被采到
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.stacks: StackCounter = StackCounter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # co_filename 可能是相对路径，按文件名缓存判断结果
+        self._source_files: Dict[str, bool] = {}
+
+    def start(self) -> 'SamplingProfiler':
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> 'SamplingProfiler':
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = self._collapse(frame)
+                if stack is not None:
+                    self.stacks[f"{names.get(ident, ident)};{stack}"] += 1
+            self.samples += 1
+
+    def _is_source(self, filename: str) -> bool:
+        known = self._source_files.get(filename)
+        if known is None:
+            known = self._source_files[filename] = os.path.abspath(filename).startswith(SOURCE_ROOT)
+        return known
+
+    def _collapse(self, frame) -> Optional[str]:
+        frames = []
+        in_source = False
+        while frame is not None and len(frames) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            # 模块顶层帧（如 python main.py 启动时的 uvicorn.run）不算
+            in_source = in_source or (code.co_name != '<module>' and self._is_source(code.co_filename))
+            frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        if not in_source:
+            return None
+        return ';'.join(reversed(frames))
+
+    def folded(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Keeps the folded stacks of the most recent profiled requests"""
+
+    def __init__(self, max_profiles: int = MAX_PROFILES):
+        self.max_profiles = max_profiles
+        self._profiles: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profiler: SamplingProfiler, description: str, elapsed: float, profile_id: Optional[str] = None) -> str:
+        profile_id = profile_id or uuid.uuid4().hex
+        header = f"# {description} elapsed={elapsed:.4f}s samples={profiler.samples} interval={profiler.interval}s\n"
+        with self._lock:
+            self._profiles[profile_id] = header + profiler.folded()
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[str]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> Dict[str, str]:
+        with self._lock:
+            return {profile_id: text.split('\n', 1)[0] for profile_id, text in self._profiles.items()}
+
+
+profile_store = ProfileStore()
@@ -1,48 +1,73 @@
-from fastapi import APIRouter, Body
-from typing import List, Dict, Any
-import joblib
-import pandas as pd
+from fastapi import APIRouter, Body, HTTPException
+from typing import List, Dict, Any, Iterator, Optional
 import numpy as np
 import os
 import sys
 import logging
 
-# 配置日志
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# 添加src目录到Python路径
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+# 添加src目录到Python路径（ml_models 与 backend 同级）
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
 from ml_models.train_model import extract_features
+from inference.registry import LoadedModel, ModelRegistry
+from cache.result_cache import result_cache
+from metrics.registry import PREDICT_STAGE_SECONDS, PREDICT_RESULTS, PREDICT_DISAGREEMENTS, PREDICT_FALLBACKS
+from streaming.sse import event_stream, result_events
 
 router = APIRouter()
 
-# 加载模型和特征列名
-model_path = os.path.join(os.path.dirname(__file__), '../../ml_models/models/mutation_model.pkl')
-feature_columns_path = os.path.join(os.path.dirname(__file__), '../../ml_models/models/feature_columns.pkl')
+# 模型注册表：默认读取 ml_models/models（及其 versions/ 子目录）
+model_root = os.environ.get(
+    'MODEL_REGISTRY_DIR',
+    os.path.normpath(os.path.join(os.path.dirname(__file__), '../../ml_models/models'))
+)
+# 设置 MODEL_SHARED_DIR 后，森林数组只导出一份并由所有 worker 进程只读映射（见 serve.py）
+registry = ModelRegistry(model_root, shared_root=os.environ.get('MODEL_SHARED_DIR') or None)
+# 启动阶段的请求最多等待模型加载这么多秒，超时后按规则方法预测
+MODEL_READY_TIMEOUT = float(os.environ.get('MODEL_READY_TIMEOUT', 30))
+# /ai_predict/events 按批预测，每批算完即发送该批的结果；批大小从首批起逐批翻倍直到上限：
+# 第一批结果很快发出，之后每批的固定开销（特征对齐、predict_proba 调用）被摊薄
+PREDICT_EVENT_BATCH = int(os.environ.get('PREDICT_EVENT_BATCH', 256))
+PREDICT_EVENT_BATCH_MAX = int(os.environ.get('PREDICT_EVENT_BATCH_MAX', 8192))
+
+
+def start_model_loading() -> None:
+    """
+    在后台线程加载模型（由 main 的 lifespan 在启动时调用），服务不必等模型加载完即可接受请求
+    没有可用模型时不阻止服务启动，预测回退到规则方法
+    """
+    registry.load_in_background()
+    # 设置 MODEL_RELOAD_INTERVAL（秒）后，后台轮询并热加载新版本
+    if os.environ.get('MODEL_RELOAD_INTERVAL'):
+        registry.start_watcher(float(os.environ['MODEL_RELOAD_INTERVAL']))
 
-try:
-    model = joblib.load(model_path)
-    feature_columns = joblib.load(feature_columns_path)
-    logger.info(f"成功加载模型和特征列名")
-except Exception as e:
-    logger.error(f"加载模型失败: {str(e)}")
-    raise
 
 def predict_with_model(mutation: str) -> Dict[str, Any]:
     """使用机器学习模型预测"""
     try:
-        features = extract_features(mutation)
+        active = registry.wait_active(MODEL_READY_TIMEOUT)
+        if active is None:
+            PREDICT_FALLBACKS.inc(reason='no_model')
+            return predict_with_rules(mutation)
+        feature_columns = active.feature_columns
+        with PREDICT_STAGE_SECONDS.time(path='single', stage='extract_features'):
+            features = extract_features(mutation)
         if features:
-            # 转换为模型输入格式
-            X = pd.get_dummies(pd.DataFrame([features]))
-            # 确保特征列对齐
-            for col in feature_columns:
-                if col not in X.columns:
-                    X[col] = 0
-            X = X[feature_columns]
+            with PREDICT_STAGE_SECONDS.time(path='single', stage='align'):
+                import pandas as pd
+                # 转换为模型输入格式
+                X = pd.get_dummies(pd.DataFrame([features]))
+                # 确保特征列对齐
+                for col in feature_columns:
+                    if col not in X.columns:
+                        X[col] = 0
+                X = X[feature_columns]
             # 预测
-            score = model.predict_proba(X)[0][1]
+            with PREDICT_STAGE_SECONDS.time(path='single', stage='predict_proba'):
+                score = active.model.predict_proba(X)[0][1]
             label = 'Deleterious' if score > 0.5 else 'Benign'
             return {
                 'mutation': mutation,
@@ -52,11 +77,43 @@ def predict_with_model(mutation: str) -> Dict[str, Any]:
             }
         else:
             logger.warning(f"无法提取特征: {mutation}")
+            PREDICT_FALLBACKS.inc(reason='invalid_mutation')
             return predict_with_rules(mutation)  # 如果ML模型失败，使用规则基础方法
     except Exception as e:
         logger.error(f"ML模型预测失败: {str(e)}")
+        PREDICT_FALLBACKS.inc(reason='error')
         return predict_with_rules(mutation)  # 如果ML模型失败，使用规则基础方法
 
+def predict_batch_with_model(mutations: List[str], active: Optional[LoadedModel] = None) -> List[Dict[str, Any]]:
+    """批量使用机器学习模型预测：整批编码为一个特征矩阵，只调用一次 predict_proba"""
+    # 整个请求使用同一个模型版本，热替换不会影响进行中的请求
+    if active is None:
+        active = registry.wait_active(MODEL_READY_TIMEOUT)
+    if active is None:
+        PREDICT_FALLBACKS.inc(len(mutations), reason='no_model')
+        return [predict_with_rules(mut) for mut in mutations]
+    try:
+        scores = active.predict_scores(mutations)
+    except Exception as e:
+        logger.error(f"ML模型批量预测失败: {str(e)}")
+        PREDICT_FALLBACKS.inc(len(mutations), reason='error')
+        return [predict_with_rules(mut) for mut in mutations]
+
+    results = []
+    for mut, score in zip(mutations, scores):
+        if np.isnan(score):
+            logger.warning(f"无法提取特征: {mut}")
+            PREDICT_FALLBACKS.inc(reason='invalid_mutation')
+            results.append(predict_with_rules(mut))
+            continue
+        results.append({
+            'mutation': mut,
+            'ai_score': float(score),
+            'ai_label': 'Deleterious' if score > 0.5 else 'Benign',
+            'method': 'ML Model'
+        })
+    return results
+
 def predict_with_rules(mutation: str) -> Dict[str, Any]:
     """使用规则基础方法预测"""
     try:
@@ -141,28 +198,69 @@ def predict_with_rules(mutation: str) -> Dict[str, Any]:
             'method': 'Rule-based'
         }
 
+def predict_mutations(mutations: List[str], active: Optional[LoadedModel]) -> Dict[str, Any]:
+    results = []
+    ml_results = predict_batch_with_model(mutations, active)
+    disagreements = 0
+    with PREDICT_STAGE_SECONDS.time(path='batch', stage='rules'):
+        for mut, ml_result in zip(mutations, ml_results):
+            try:
+                # 使用两种方法预测
+                rule_result = predict_with_rules(mut)
+
+                # 如果两种方法结果一致，使用ML模型结果
+                if ml_result['ai_label'] == rule_result['ai_label']:
+                    results.append(ml_result)
+                else:
+                    # 如果不一致，使用规则基础方法（更保守）
+                    disagreements += 1
+                    results.append(rule_result)
+            except Exception as e:
+                logger.error(f"预测失败: {str(e)}")
+                results.append({
+                    'mutation': mut,
+                    'ai_score': 0.5,  # 默认中等风险
+                    'ai_label': 'Benign',
+                    'method': 'Rule-based'
+                })
+    # 只在实际计算时计数，缓存命中的请求不重复统计
+    PREDICT_DISAGREEMENTS.inc(disagreements)
+    ml_count = sum(result['method'] == 'ML Model' for result in results)
+    PREDICT_RESULTS.inc(ml_count, method='ML Model')
+    PREDICT_RESULTS.inc(len(results) - ml_count, method='Rule-based')
+    return {'results': results}
+
 @router.post('/ai_predict')
 def ai_predict(mutations: List[str] = Body(...)):
-    results = []
-    for mut in mutations:
-        try:
-            # 使用两种方法预测
-            ml_result = predict_with_model(mut)
-            rule_result = predict_with_rules(mut)
-            
-            # 如果两种方法结果一致，使用ML模型结果
-            if ml_result['ai_label'] == rule_result['ai_label']:
-                results.append(ml_result)
-            else:
-                # 如果不一致，使用规则基础方法（更保守）
-                results.append(rule_result)
-        except Exception as e:
-            logger.error(f"预测失败: {str(e)}")
-            results.append({
-                'mutation': mut,
-                'ai_score': 0.5,  # 默认中等风险
-                'ai_label': 'Benign',
-                'method': 'Rule-based'
-            })
-    
-    return {'results': results}
\ No newline at end of file
+    # 缓存键包含模型版本和内容哈希，切换模型后旧结果自然失效
+    active = registry.wait_active(MODEL_READY_TIMEOUT)
+    return result_cache.get_or_compute(
+        'ai_predict', mutations, lambda: predict_mutations(mutations, active),
+        version=active.fingerprint if active is not None else 'rules'
+    )
+
+@router.post('/ai_predict/events')
+def ai_predict_events(mutations: List[str] = Body(...)):
+    """Server-sent events 版本：按批预测（整个请求使用同一模型版本），每个突变一个 result 事件，不经过结果缓存"""
+    active = registry.wait_active(MODEL_READY_TIMEOUT)
+    return event_stream(result_events(prediction_batches(mutations, active), len(mutations)), '/ai_predict/events')
+
+def prediction_batches(mutations: List[str], active: Optional[LoadedModel]) -> Iterator[List[Dict[str, Any]]]:
+    start, size = 0, PREDICT_EVENT_BATCH
+    while start < len(mutations):
+        yield predict_mutations(mutations[start:start + size], active)['results']
+        start += size
+        size = min(size * 2, PREDICT_EVENT_BATCH_MAX)
+
+@router.get('/models')
+def model_status():
+    """当前生效的模型版本、加载/预热耗时以及可用版本"""
+    return registry.status()
+
+@router.post('/models/reload', status_code=202)
+def reload_model(version: Optional[str] = Body(None, embed=True)):
+    """在后台加载、校验并预热指定版本（默认最新版本），成功后原子替换"""
+    if version is not None and version not in registry.versions():
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {version}")
+    started = registry.reload_async(version)
+    return {'status': 'started' if started else 'already_running', **registry.status()}
\ No newline at end of file
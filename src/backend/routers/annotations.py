@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Body, HTTPException
+from typing import List, Optional
+import os
+
+from data_processing.annotation_store import DEFAULT_DB_PATH, AnnotationStore
+
+router = APIRouter()
+
+# 突变注释库；批量导入见 python -m data_processing.annotation_store import <file>
+annotation_store = AnnotationStore(os.environ.get('ANNOTATION_DB_PATH', DEFAULT_DB_PATH))
+
+
+@router.get("/annotations")
+def annotation_range(gene: str, start: int = 1, end: int = 100000, impact: Optional[str] = None,
+                     limit: int = 1000, offset: int = 0):
+    """区间查询，例如 gene=S&start=319&end=541 返回 RBD 区域内的所有已注释突变"""
+    results = annotation_store.range(gene, start, end, impact, min(max(limit, 1), 10000), max(offset, 0))
+    return {"count": len(results), "results": results}
+
+
+@router.post("/annotations/lookup")
+def annotation_lookup(mutations: List[str] = Body(...)):
+    """整个突变列表一次查询；未注释的突变不出现在结果中"""
+    return {"results": annotation_store.lookup_many(mutations)}
+
+
+@router.get("/annotations/{mutation}")
+def annotation_get(mutation: str):
+    annotation = annotation_store.get(mutation)
+    if annotation is None:
+        raise HTTPException(status_code=404, detail=f"没有 {mutation} 的注释")
+    return annotation
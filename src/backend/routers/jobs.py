@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Body, HTTPException
+from typing import Optional
+import os
+import tempfile
+
+from jobs.queue import SUCCEEDED, JobQueue
+
+router = APIRouter()
+
+# 任务数据库默认放在系统临时目录；多个 uvicorn 进程指向同一文件即可共享队列
+job_queue = JobQueue(
+    os.environ.get('JOB_DB_PATH', os.path.join(tempfile.gettempdir(), 'sars_cov2_jobs.sqlite3')),
+    workers=int(os.environ.get('JOB_WORKERS', 2)),
+    result_ttl=float(os.environ.get('JOB_RESULT_TTL', 24 * 3600)),
+)
+# 关闭服务时等待正在运行的任务结束的最长时间（每个工作线程）；未结束的任务在下次启动时重新排队
+JOB_SHUTDOWN_TIMEOUT = float(os.environ.get('JOB_SHUTDOWN_TIMEOUT', 10))
+
+# 文件类任务（/jobs/upload、/jobs/call_mutations）的上传先写到这里，任务结束后删除
+JOB_SPOOL_DIR = os.environ.get('JOB_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'sars_cov2_job_spool'))
+os.makedirs(JOB_SPOOL_DIR, exist_ok=True)
+
+
+def spooled_path(path: str) -> str:
+    """Resolved path of a spooled job file; ValueError unless it lies inside JOB_SPOOL_DIR"""
+    resolved = os.path.realpath(path)
+    if os.path.dirname(resolved) != os.path.realpath(JOB_SPOOL_DIR):
+        raise ValueError(f"文件不在任务暂存目录中: {path}")
+    return resolved
+
+
+@router.post("/jobs", status_code=202)
+def submit_job(kind: str = Body(...), payload: dict = Body(...), priority: int = Body(0)):
+    """提交后台任务，立即返回任务 id；priority 越大越先执行"""
+    available = f"可用类型: {', '.join(sorted(job_queue.public_kinds))}"
+    if kind in job_queue.handlers and kind not in job_queue.public_kinds:
+        # 文件类任务的 payload 含服务端路径，只能通过 /jobs/{kind} 上传文件提交
+        raise HTTPException(status_code=400, detail=f"{kind} 任务只能通过 /jobs/{kind} 提交; {available}")
+    try:
+        job_id = job_queue.submit(kind, payload, priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"{str(e)}; {available}")
+    return {"status": "success", "job_id": job_id}
+
+
+@router.get("/jobs")
+def list_jobs(status: Optional[str] = None, limit: int = 50):
+    return {"status": "success", "jobs": job_queue.list(status, min(max(limit, 1), 500))}
+
+
+@router.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在或已过期")
+    return job
+
+
+@router.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    job = job_queue.get(job_id, include_result=True)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在或已过期")
+    if job['status'] != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"任务状态为 {job['status']}" + (f": {job['error']}" if job['error'] else ""))
+    return job['result']
+
+
+@router.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    """排队中的任务立即取消；运行中的任务在下一次报告进度时停止"""
+    status = job_queue.cancel(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="任务不存在或已过期")
+    return {"status": "success", "job_status": status}
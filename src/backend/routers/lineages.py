@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Body
+from typing import List, Optional
+import os
+
+from data_processing.lineage_classifier import DEFAULT_TABLE, MIN_SCORE, LineageClassifier, get_classifier
+
+router = APIRouter()
+
+# 谱系定义突变表（CSV/TSV：lineage, label, mutations），在第一次分类时载入
+LINEAGE_TABLE_PATH = os.environ.get('LINEAGE_TABLE_PATH', DEFAULT_TABLE)
+LINEAGE_MIN_SCORE = float(os.environ.get('LINEAGE_MIN_SCORE', MIN_SCORE))
+
+
+def lineage_classifier() -> LineageClassifier:
+    return get_classifier(LINEAGE_TABLE_PATH)
+
+
+@router.get("/lineages")
+def lineage_list():
+    """已载入的谱系及各自的定义突变数"""
+    classifier = lineage_classifier()
+    return {"count": len(classifier), "vocabulary": len(classifier.vocabulary), "lineages": classifier.describe()}
+
+
+@router.post("/lineages/classify")
+def lineage_classify(samples: List[List[str]] = Body(...), min_score: Optional[float] = None):
+    """每个样本一个突变列表；返回与之 Jaccard 相似度最高的谱系，低于 min_score 时为 null"""
+    results = lineage_classifier().classify(samples, LINEAGE_MIN_SCORE if min_score is None else min_score)
+    return {"count": len(results), "results": results}
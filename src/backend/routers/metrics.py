@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+
+from metrics.registry import metrics, CONTENT_TYPE
+from metrics.profiler import profile_store
+from metrics.middleware import PROFILE_REQUESTS
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+def metrics_endpoint():
+    """Prometheus 文本格式的本进程指标"""
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+
+@router.get("/debug/profiles")
+def list_profiles():
+    """最近剖析过的请求（请求头 X-Profile: 1，需 PROFILE_REQUESTS=1）"""
+    return {"enabled": PROFILE_REQUESTS, "profiles": profile_store.list()}
+
+
+@router.get("/debug/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str):
+    """折叠栈格式的剖析结果，可直接交给 flamegraph.pl 或 speedscope"""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="剖析结果不存在或已被淘汰")
+    return profile
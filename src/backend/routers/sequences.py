@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import os
+import tempfile
+
+from data_processing.fasta_vcf_parser import format_fasta
+from data_processing.sequence_store import SequenceStore
+
+router = APIRouter()
+
+# 2 位编码的基因组序列库，POST /sequences 导入；多个 uvicorn 进程可共享同一目录
+sequence_store = SequenceStore(
+    os.environ.get('SEQUENCE_STORE_DIR', os.path.join(tempfile.gettempdir(), 'sars_cov2_sequences'))
+)
+
+
+def require_sequence(seq_id: str):
+    sequence = sequence_store.get(seq_id)
+    if sequence is None:
+        raise HTTPException(status_code=404, detail=f"序列不存在: {seq_id}")
+    return sequence
+
+
+@router.get("/sequences/stats")
+def sequence_stats():
+    """记录数、去重后的序列数、碱基数与 2 位编码后的字节数"""
+    return sequence_store.stats()
+
+
+@router.get("/sequences/{seq_id:path}/fasta", response_class=PlainTextResponse)
+def sequence_fasta(seq_id: str, start: int = 1, end: Optional[int] = None):
+    """以 FASTA 返回序列；start/end 为 1 起始的闭区间，只解码该区间覆盖的字节"""
+    sequence = require_sequence(seq_id)
+    end = len(sequence) if end is None else min(end, len(sequence))
+    if start < 1 or end < start:
+        raise HTTPException(status_code=400, detail=f"无效区间: {start}-{end}")
+    header = seq_id if (start, end) == (1, len(sequence)) else f"{seq_id}:{start}-{end}"
+    return format_fasta(header, sequence.decode(start - 1, end))
+
+
+@router.get("/sequences/{seq_id:path}")
+def sequence_info(seq_id: str):
+    """内容哈希、长度、编码后大小以及共享同一序列的其他 id"""
+    info = require_sequence(seq_id).info()
+    info["shared_with"] = [other for other in sequence_store.ids_for_hash(info["sha256"]) if other != seq_id]
+    return info
@@ -0,0 +1,263 @@
+from fastapi import APIRouter, Body, HTTPException
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import os
+import time
+import numpy as np
+
+from simulation.compartmental import MODELS, expand_grid, run_compartmental, scenario_count, steps_per_day
+from simulation.stochastic import DEFAULT_PERCENTILES, run_ensemble
+from simulation.metapopulation import MobilityNetwork, daily_rows, normalize_location, run_metapopulation
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# 单次扫描允许的最大情景数与天数
+MAX_SWEEP_SCENARIOS = 100000
+MAX_SWEEP_DAYS = 3650
+# 单次扫描的总计算量上限：情景数 x 天数 x 每天子步数
+MAX_SWEEP_STEPS = MAX_SWEEP_SCENARIOS * MAX_SWEEP_DAYS
+MAX_REALIZATIONS = 1000000
+# 多地区模型一次最多返回的地区逐日曲线数
+MAX_CURVE_REGIONS = 100
+SUMMARY_FIELDS = ('beta', 'gamma', 'sigma', 'population', 'initial_cases',
+                  'R0', 'peak_day', 'peak_cases', 'final_size', 'attack_rate')
+
+
+# 随机模拟的进程池，首次需要时创建
+SIMULATION_WORKERS = int(os.environ.get('SIMULATION_WORKERS', os.cpu_count() or 1))
+simulation_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_simulation_pool() -> ProcessPoolExecutor:
+    global simulation_pool
+    if simulation_pool is None:
+        simulation_pool = ProcessPoolExecutor(max_workers=SIMULATION_WORKERS)
+    return simulation_pool
+
+
+def check_population(population, initial_cases) -> None:
+    """400 unless population > 0 and 0 <= initial_cases <= population (element-wise for per-scenario arrays)"""
+    population = np.asarray(population, dtype=np.float64)
+    initial_cases = np.asarray(initial_cases, dtype=np.float64)
+    if not np.all(population > 0):
+        raise HTTPException(status_code=400, detail="population 必须大于 0")
+    if not np.all((initial_cases >= 0) & (initial_cases <= population)):
+        raise HTTPException(status_code=400, detail="initial_cases 必须在 0 到 population 之间")
+
+
+def scenario_summaries(result: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Per-scenario rows from the engine's column arrays"""
+    columns = {}
+    for field in SUMMARY_FIELDS:
+        if field not in result:
+            continue
+        values = result[field]
+        if field == 'peak_day':
+            columns[field] = values.astype(int).tolist()
+        elif field in ('peak_cases', 'final_size'):
+            columns[field] = np.floor(values).astype(int).tolist()
+        else:
+            rounded = np.round(values, 4)
+            columns[field] = [None if np.isnan(v) else v for v in rounded.tolist()]
+    n = len(result['beta'])
+    return [{field: column[i] for field, column in columns.items()} for i in range(n)]
+
+
+@router.post("/analyze/transmission/sweep")
+def transmission_sweep(payload: dict = Body(...)):
+    """
+    批量参数扫描：beta/gamma/sigma/population/initial_cases 均可为标量或列表
+    grid=true（默认）时取笛卡尔积，否则按位置配对
+    """
+    return run_transmission_sweep(payload)
+
+
+def run_transmission_sweep(payload: Dict[str, Any], progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+    """/analyze/transmission/sweep 的计算部分；progress 见 run_compartmental，供后台任务使用"""
+    model = str(payload.get("model", "SIR")).upper()
+    if model not in MODELS:
+        raise HTTPException(status_code=400, detail=f"model 必须是 {', '.join(MODELS)} 之一")
+    grid = bool(payload.get("grid", True))
+    params = {
+        "beta": payload.get("beta", 0.3),
+        "gamma": payload.get("gamma", 0.1),
+        "population": payload.get("population", 10000),
+        "initial_cases": payload.get("initial_cases", 10),
+        "sigma": payload.get("sigma", 0.2) if model == 'SEIR' else None,
+    }
+
+    # 参数转换也放在 try 中：非数字的 days/dt/参数列表返回 400 而不是 500
+    try:
+        days = int(payload.get("days", 30))
+        if not 0 < days <= MAX_SWEEP_DAYS:
+            raise HTTPException(status_code=400, detail=f"days 必须在 1 到 {MAX_SWEEP_DAYS} 之间")
+        dt = float(payload.get("dt", 1.0))
+        substeps = steps_per_day(dt)
+        count = scenario_count(grid, **params)
+        if count > MAX_SWEEP_SCENARIOS:
+            raise HTTPException(status_code=400, detail=f"情景数 {count} 超过上限 {MAX_SWEEP_SCENARIOS}")
+        if count * days * substeps > MAX_SWEEP_STEPS:
+            raise HTTPException(status_code=400, detail=f"情景数 x 天数 x 每天步数 = {count * days * substeps} 超过上限 {MAX_SWEEP_STEPS}")
+
+        start = time.perf_counter()
+        scenarios = expand_grid(grid, **params)
+        check_population(scenarios['population'], scenarios['initial_cases'])
+        result = run_compartmental(model, days=days, dt=dt, progress=progress, **scenarios)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    elapsed = time.perf_counter() - start
+    logger.info(f"传播扫描 {model}: {count} 个情景, {days} 天, 用时 {elapsed:.3f}s")
+
+    return {
+        "status": "success",
+        "model": model,
+        "days": days,
+        "dt": dt,
+        "count": int(result['beta'].size),
+        "elapsed_seconds": round(elapsed, 4),
+        "results": scenario_summaries(result),
+    }
+
+
+@router.post("/analyze/transmission/ensemble")
+def transmission_ensemble(payload: dict = Body(...)):
+    """
+    随机模式：链式二项 SIR/SEIR 的大量实现，返回按天的分位数包络而非原始轨迹
+    相同 seed 的结果可复现
+    """
+    return run_transmission_ensemble(payload)
+
+
+def run_transmission_ensemble(payload: Dict[str, Any], progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+    """/analyze/transmission/ensemble 的计算部分；progress 见 run_ensemble"""
+    model = str(payload.get("model", "SIR")).upper()
+    if model not in MODELS:
+        raise HTTPException(status_code=400, detail=f"model 必须是 {', '.join(MODELS)} 之一")
+    try:
+        days = int(payload.get("days", 30))
+        if not 0 < days <= MAX_SWEEP_DAYS:
+            raise HTTPException(status_code=400, detail=f"days 必须在 1 到 {MAX_SWEEP_DAYS} 之间")
+        realizations = int(payload.get("realizations", 1000))
+        if not 0 < realizations <= MAX_REALIZATIONS:
+            raise HTTPException(status_code=400, detail=f"realizations 必须在 1 到 {MAX_REALIZATIONS} 之间")
+        percentiles = [float(p) for p in payload.get("percentiles", DEFAULT_PERCENTILES)]
+        if not all(0 <= p <= 100 for p in percentiles):
+            raise HTTPException(status_code=400, detail="percentiles 必须在 0 到 100 之间")
+        population = int(payload.get("population", 10000))
+        initial_cases = int(payload.get("initial_cases", 10))
+        check_population(population, initial_cases)
+
+        start = time.perf_counter()
+        result = run_ensemble(
+            model,
+            beta=float(payload.get("beta", 0.3)),
+            gamma=float(payload.get("gamma", 0.1)),
+            population=population,
+            initial_cases=initial_cases,
+            days=days,
+            realizations=realizations,
+            sigma=float(payload.get("sigma", 0.2)),
+            seed=int(payload.get("seed", 0)),
+            percentiles=percentiles,
+            executor=get_simulation_pool(),
+            max_pending=2 * SIMULATION_WORKERS,
+            progress=progress,
+        )
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    elapsed = time.perf_counter() - start
+    logger.info(f"随机模拟 {model}: {realizations} 次实现, {days} 天, 用时 {elapsed:.3f}s")
+
+    return {
+        "status": "success",
+        "model": model,
+        "days": days,
+        "elapsed_seconds": round(elapsed, 4),
+        **result,
+    }
+
+
+@router.post("/analyze/transmission/metapopulation")
+def transmission_metapopulation(payload: dict = Body(...)):
+    """
+    多地区耦合 SEIR
+    regions/edges 描述地区人口和每日流动人数；未提供时用样本采集地构建占位网络
+    初始病例来自 samples[].location（每个样本计 1 例）或 initial_cases {地区: 人数}
+    只返回 curves 中列出地区的逐日曲线；地区汇总按最终规模降序并用 offset/limit 分页
+    """
+    return run_transmission_metapopulation(payload)
+
+
+def run_transmission_metapopulation(payload: Dict[str, Any], progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+    """/analyze/transmission/metapopulation 的计算部分；progress 见 run_metapopulation"""
+    samples = payload.get("samples", [])
+    initial = payload.get("initial_cases", {})
+    curve_names = payload.get("curves", [])
+    if len(curve_names) > MAX_CURVE_REGIONS:
+        raise HTTPException(status_code=400, detail=f"curves 最多 {MAX_CURVE_REGIONS} 个地区")
+
+    try:
+        days = int(payload.get("days", 60))
+        if not 0 < days <= MAX_SWEEP_DAYS:
+            raise HTTPException(status_code=400, detail=f"days 必须在 1 到 {MAX_SWEEP_DAYS} 之间")
+        offset = max(0, int(payload.get("offset", 0)))
+        limit = max(0, int(payload.get("limit", 50)))
+
+        start = time.perf_counter()
+        if any(float(count) < 0 for count in initial.values()):
+            raise ValueError("initial_cases 不能为负")
+        if payload.get("regions"):
+            network = MobilityNetwork.from_records(payload["regions"], payload.get("edges", []))
+        else:
+            locations = [s["location"] for s in samples if s.get("location")] + list(initial)
+            names = list({normalize_location(name): name.strip() for name in reversed(locations)}.values())[::-1]
+            if not names:
+                raise ValueError("需要 regions，或带 location 的 samples / initial_cases")
+            network = MobilityNetwork.small_world(names)
+        cases, unmatched = network.seed_cases((s.get("location", "") for s in samples), initial)
+        curve_index = []
+        for name in curve_names:
+            i = network.region(name)
+            if i is None:
+                raise ValueError(f"未知地区: {name}")
+            curve_index.append(i)
+        result = run_metapopulation(
+            network, cases,
+            beta=float(payload.get("beta", 0.3)),
+            sigma=float(payload.get("sigma", 0.2)),
+            gamma=float(payload.get("gamma", 0.1)),
+            days=days,
+            curve_regions=curve_index,
+            progress=progress,
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    elapsed = time.perf_counter() - start
+    logger.info(f"多地区模拟: {len(network)} 个地区, {network.edge_count} 条边, {days} 天, 用时 {elapsed:.3f}s")
+
+    order = np.argsort(-result['final_size'], kind='stable')[offset:offset + limit]
+    return {
+        "status": "success",
+        "region_count": len(network),
+        "edge_count": network.edge_count,
+        "days": days,
+        "elapsed_seconds": round(elapsed, 4),
+        "unmatched_locations": unmatched,
+        "totals": daily_rows(result['totals']),
+        "regions": [
+            {
+                "name": network.names[i],
+                "peak_day": int(result['peak_day'][i]),
+                "peak_infectious": int(result['peak_infectious'][i]),
+                "final_size": int(result['final_size'][i]),
+                "attack_rate": round(float(result['attack_rate'][i]), 4),
+            }
+            for i in order
+        ],
+        "curves": {
+            network.names[i]: daily_rows(result['curves'][:, k]) for k, i in enumerate(curve_index)
+        },
+    }
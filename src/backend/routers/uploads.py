@@ -0,0 +1,100 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import Iterator, Optional
+import itertools
+import os
+import tempfile
+
+from data_processing.fasta_vcf_parser import FASTA_LINE_WIDTH, FastaIndex, wrap_sequence
+from data_processing.result_store import UploadStore
+
+router = APIRouter()
+
+# /upload?store=true 的完整解析结果保存在这里，按 UPLOAD_STORE_TTL 秒过期
+upload_store = UploadStore(
+    os.environ.get('UPLOAD_STORE_DIR', os.path.join(tempfile.gettempdir(), 'sars_cov2_uploads')),
+    ttl=float(os.environ.get('UPLOAD_STORE_TTL', 24 * 3600)),
+)
+
+MAX_PAGE_SIZE = 10000
+# 大区间分块读取并流式返回；块长为行宽的整数倍，分块不改变换行位置
+FETCH_BLOCK_BASES = FASTA_LINE_WIDTH * 16384
+
+
+def require_upload(upload_id: str):
+    meta = upload_store.meta(upload_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="上传结果不存在或已过期")
+    return meta
+
+
+@router.get("/uploads/{upload_id}")
+def upload_meta(upload_id: str):
+    return require_upload(upload_id)
+
+
+@router.get("/uploads/{upload_id}/records")
+def upload_records(upload_id: str, cursor: Optional[str] = None, limit: int = 100, format: str = "json"):
+    """
+    按游标分页读取全部记录：返回 next_cursor，为 null 表示已到末尾
+    format=ndjson 时从 cursor 开始把剩余记录逐行流式返回
+    """
+    meta = require_upload(upload_id)
+    try:
+        if format == "ndjson":
+            return StreamingResponse(upload_store.iter_ndjson(upload_id, cursor), media_type="application/x-ndjson")
+        records, next_cursor = upload_store.page(upload_id, cursor, min(max(limit, 1), MAX_PAGE_SIZE))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"upload_id": upload_id, "count": meta["count"], "records": records, "next_cursor": next_cursor}
+
+
+def require_fasta(upload_id: str) -> FastaIndex:
+    require_upload(upload_id)
+    index = upload_store.fasta_index(upload_id)
+    if index is None:
+        raise HTTPException(status_code=404, detail="该上传没有已索引的 FASTA（仅 store=true 上传的 FASTA 文件会建立索引）")
+    return index
+
+
+@router.get("/uploads/{upload_id}/sequences")
+def upload_sequences(upload_id: str, limit: int = 100, offset: int = 0):
+    """已索引 FASTA 中的序列 id 与长度，按文件中的顺序分页"""
+    index = require_fasta(upload_id)
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    entries = itertools.islice(index.entries.values(), max(offset, 0), max(offset, 0) + limit)
+    return {
+        "upload_id": upload_id,
+        "count": len(index),
+        "sequences": [{"id": name, "length": length} for name, length, *_ in entries],
+    }
+
+
+@router.get("/uploads/{upload_id}/fai")
+def upload_fai(upload_id: str):
+    """samtools faidx 兼容的索引文件（NAME LENGTH OFFSET LINEBASES LINEWIDTH）"""
+    index = require_fasta(upload_id)
+    return FileResponse(index.path + '.fai', media_type="text/plain")
+
+
+def iter_region(index: FastaIndex, seq_id: str, header: str, start: int, end: int) -> Iterator[str]:
+    yield f">{header}\n"
+    for block in range(start, end, FETCH_BLOCK_BASES):
+        yield wrap_sequence(index.fetch(seq_id, block, min(end, block + FETCH_BLOCK_BASES)))
+
+
+@router.get("/uploads/{upload_id}/sequences/{seq_id:path}")
+def upload_sequence(upload_id: str, seq_id: str, start: int = 1, end: Optional[int] = None):
+    """
+    按 id 读取上传 FASTA 中的一条记录，start/end 为 1 起始的闭区间
+    由 .fai 偏移直接定位到内存映射文件中的字节范围，耗时与文件大小无关
+    """
+    index = require_fasta(upload_id)
+    if seq_id not in index:
+        raise HTTPException(status_code=404, detail=f"序列不存在: {seq_id}")
+    length = index.length(seq_id)
+    end = length if end is None else min(end, length)
+    if start < 1 or end < start:
+        raise HTTPException(status_code=400, detail=f"无效区间: {start}-{end}")
+    header = seq_id if (start, end) == (1, length) else f"{seq_id}:{start}-{end}"
+    return StreamingResponse(iter_region(index, seq_id, header, start - 1, end), media_type="text/plain")
@@ -0,0 +1,57 @@
+"""Run the API with several uvicorn workers sharing one memory-mapped copy of the model
+
+Usage (from src/backend):  python serve.py --workers 8 --port 8000
+
+The launcher loads the active model version once, exports its forest arrays to
+MODEL_SHARED_DIR (default /dev/shm/sars_cov2_models), reads them into the page cache
+and only then starts the workers. Every worker maps the same files read-only, so
+adding workers adds almost no model memory.
+"""
+import argparse
+import logging
+import os
+import sys
+
+import uvicorn
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+from inference.shared_model import default_shared_root, touch_pages
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def prepare_shared_model(shared_root: str) -> None:
+    """Export and pre-warm the shared artefact of the version the workers will load"""
+    os.environ['MODEL_SHARED_DIR'] = shared_root
+    # 与 worker 使用同一份配置（MODEL_REGISTRY_DIR 等）加载，导出共享数组
+    from routers.ai_predict import registry
+    active = registry.wait_active()
+    if active is None:
+        logger.warning(f"没有可用模型，worker 将使用规则方法: {registry.last_error}")
+        return
+    paths = [active.shared_dir]
+    if active.score_table is not None:
+        paths.append(os.path.join(active.path, 'score_table.npy'))
+    size = touch_pages(*paths)
+    logger.info(f"共享模型 {active.version} 已就绪: {active.shared_dir} ({size / 1e6:.1f} MB 已预热)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--shared-dir', default=os.environ.get('MODEL_SHARED_DIR') or default_shared_root(),
+                        help='directory for the memory-mapped model arrays (tmpfs recommended)')
+    args = parser.parse_args()
+
+    prepare_shared_model(args.shared_dir)
+    # worker 进程继承 MODEL_SHARED_DIR，直接映射已导出的数组
+    uvicorn.run('main:app', host=args.host, port=args.port, workers=args.workers, app_dir=BACKEND_DIR)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+# This file makes the simulation directory a Python package 
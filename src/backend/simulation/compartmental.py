@@ -0,0 +1,116 @@
+from typing import Callable, Dict, Optional
+import numpy as np
+
+MODELS = ('SIR', 'SEIR')
+# 最小积分步长（天），即每天最多 100 个子步
+MIN_DT = 0.01
+
+
+def steps_per_day(dt: float) -> int:
+    """Number of integration sub-steps per recorded day; dt must divide one day exactly (1, 0.5, 0.25, 0.1, ...)"""
+    if not MIN_DT <= dt <= 1:
+        raise ValueError(f"dt must be in [{MIN_DT}, 1]")
+    substeps = int(round(1.0 / dt))
+    if abs(substeps * dt - 1.0) > 1e-9:
+        raise ValueError(f"1 / dt must be an integer, got dt={dt}")
+    return substeps
+
+
+def run_compartmental(model: str, beta, gamma, population, initial_cases, days: int,
+                      dt: float = 1.0, sigma=None, record_curves: bool = False,
+                      progress: Optional[Callable[[float], None]] = None) -> Dict[str, np.ndarray]:
+    """
+    向量化的离散 SIR/SEIR 模型：所有情景放在同一组数组里，每个时间步一次数组运算
+    beta/gamma/sigma/population/initial_cases 可以是标量或同形状数组（按 NumPy 广播）
+    dt=1 时与 /analyze/transmission 原有的逐日欧拉步进完全一致
+    返回每个情景的峰值日、峰值病例、最终规模等；record_curves=True 时附带 (days, n) 的每日感染曲线
+    progress(fraction) 每模拟完一天调用一次（后台任务借此报告进度、响应取消）
+    """
+    model = model.upper()
+    if model not in MODELS:
+        raise ValueError(f"Unknown model: {model}")
+    if model == 'SEIR' and sigma is None:
+        raise ValueError("SEIR requires sigma (1 / incubation period)")
+
+    arrays = [beta, gamma, population, initial_cases] + ([sigma] if model == 'SEIR' else [])
+    arrays = np.broadcast_arrays(*[np.asarray(a, dtype=np.float64) for a in arrays])
+    beta, gamma, N, I0 = (np.ravel(a) for a in arrays[:4])
+    sigma = np.ravel(arrays[4]) if model == 'SEIR' else None
+    n = beta.size
+
+    substeps = steps_per_day(dt)
+    h = 1.0 / substeps
+    beta_h = beta * h / N
+    gamma_h = gamma * h
+    sigma_h = sigma * h if sigma is not None else None
+
+    S = N - I0
+    E = np.zeros(n)
+    I = I0.copy()
+    R = np.zeros(n)
+    peak_cases = I.copy()
+    peak_day = np.zeros(n, dtype=np.int64)
+    curves = np.empty((days, n)) if record_curves else None
+
+    for day in range(days):
+        for _ in range(substeps):
+            new_infected = beta_h * S * I
+            new_recovered = gamma_h * I
+            S = S - new_infected
+            if sigma_h is not None:
+                new_infectious = sigma_h * E
+                E = E + new_infected - new_infectious
+            else:
+                new_infectious = new_infected
+            I = I + new_infectious - new_recovered
+            R = R + new_recovered
+        higher = I > peak_cases
+        peak_cases = np.where(higher, I, peak_cases)
+        peak_day = np.where(higher, day + 1, peak_day)
+        if curves is not None:
+            curves[day] = I
+        if progress is not None:
+            progress((day + 1) / days)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        R0 = np.where(gamma > 0, beta / gamma, np.nan)
+    result = {
+        'beta': beta,
+        'gamma': gamma,
+        'population': N,
+        'initial_cases': I0,
+        'R0': R0,
+        'peak_day': peak_day,
+        'peak_cases': peak_cases,
+        'final_size': N - S,
+        'attack_rate': (N - S) / N,
+        'susceptible': S,
+        'infectious': I,
+        'recovered': R,
+    }
+    if sigma is not None:
+        result['sigma'] = sigma
+        result['exposed'] = E
+    if curves is not None:
+        result['curves'] = curves
+    return result
+
+
+def expand_grid(grid: bool, **params) -> Dict[str, np.ndarray]:
+    """
+    Turn scalar/list parameters into flat per-scenario arrays
+    grid=True 取所有列表参数的笛卡尔积；grid=False 按位置配对（长度需一致或为 1）
+    """
+    values = {name: np.atleast_1d(np.asarray(value, dtype=np.float64)) for name, value in params.items() if value is not None}
+    if grid:
+        meshes = np.meshgrid(*values.values(), indexing='ij')
+        return {name: mesh.ravel() for name, mesh in zip(values, meshes)}
+    flat = np.broadcast_arrays(*values.values())
+    return {name: np.ravel(array) for name, array in zip(values, flat)}
+
+
+def scenario_count(grid: bool, **params) -> int:
+    sizes = [np.size(value) for value in params.values() if value is not None]
+    if grid:
+        return int(np.prod(sizes)) if sizes else 0
+    return max(sizes) if sizes else 0
@@ -0,0 +1,167 @@
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Optional, Sequence
+import numpy as np
+
+from simulation.compartmental import MODELS
+
+# 每个进程池任务模拟的实现数（对应一个随机种子）；任务内再按 CHUNK_REALIZATIONS 分块，
+# 工作进程内存约为 days * CHUNK_REALIZATIONS 个整数
+TASK_REALIZATIONS = 20000
+CHUNK_REALIZATIONS = 2000
+# 分位数直方图的最大箱数；人口不超过该值时按整数病例精确统计
+MAX_HISTOGRAM_BINS = 1024
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class EnsembleHistogram:
+    """
+    按天累计的病例数直方图，用于流式计算分位数
+    内存只与 days * bins 有关，与实现数无关；多个直方图可直接相加合并
+    """
+
+    def __init__(self, days: int, population: int, bins: int = MAX_HISTOGRAM_BINS):
+        self.population = int(population)
+        self.width = max(1, -(-(self.population + 1) // bins))
+        self.bins = -(-(self.population + 1) // self.width)
+        self.daily = np.zeros((days, self.bins), dtype=np.int64)
+        self.final_size = np.zeros(self.bins, dtype=np.int64)
+        self.peak = np.zeros(self.bins, dtype=np.int64)
+        self.daily_sum = np.zeros(days)
+        self.count = 0
+
+    def _bin(self, values: np.ndarray) -> np.ndarray:
+        return np.minimum(values // self.width, self.bins - 1)
+
+    def add(self, curves: np.ndarray, final_size: np.ndarray) -> None:
+        """curves: (days, n) infectious counts for n realizations"""
+        days, n = curves.shape
+        flat = (self._bin(curves) + np.arange(days)[:, None] * self.bins).ravel()
+        self.daily += np.bincount(flat, minlength=days * self.bins).reshape(days, self.bins)
+        self.final_size += np.bincount(self._bin(final_size), minlength=self.bins)
+        self.peak += np.bincount(self._bin(curves.max(axis=0)), minlength=self.bins)
+        self.daily_sum += curves.sum(axis=1)
+        self.count += n
+
+    def merge(self, other: 'EnsembleHistogram') -> None:
+        self.daily += other.daily
+        self.final_size += other.final_size
+        self.peak += other.peak
+        self.daily_sum += other.daily_sum
+        self.count += other.count
+
+    def _quantiles(self, counts: np.ndarray, q: float) -> np.ndarray:
+        """First bin whose cumulative count reaches q * count (lower edge of the bin)"""
+        cdf = np.cumsum(counts, axis=-1)
+        target = np.maximum(q * self.count, 1)
+        index = (cdf < target).sum(axis=-1)
+        return np.minimum(index, self.bins - 1) * self.width
+
+    def summary(self, percentiles: Sequence[float]) -> Dict[str, Any]:
+        return {
+            "realizations": self.count,
+            "bin_width": self.width,
+            "mean": np.round(self.daily_sum / max(self.count, 1), 2).tolist(),
+            "envelope": {f"p{p:g}": self._quantiles(self.daily, p / 100).tolist() for p in percentiles},
+            "peak_cases": {f"p{p:g}": int(self._quantiles(self.peak, p / 100)) for p in percentiles},
+            "final_size": {f"p{p:g}": int(self._quantiles(self.final_size, p / 100)) for p in percentiles},
+        }
+
+
+def simulate_chain_binomial(beta: float, gamma: float, population: int, initial_cases: int,
+                            days: int, realizations: int, rng: np.random.Generator,
+                            sigma: Optional[float] = None):
+    """
+    链式二项 SIR（sigma 为 None）/ SEIR：每天的新感染 ~ Binomial(S, 1 - exp(-beta I / N))，康复 ~ Binomial(I, 1 - exp(-gamma))
+    所有实现放在同一组数组里向量化推进；返回 (days, n) 的每日感染数和每个实现的最终规模
+    """
+    N = int(population)
+    S = np.full(realizations, N - int(initial_cases), dtype=np.int64)
+    E = np.zeros(realizations, dtype=np.int64)
+    I = np.full(realizations, int(initial_cases), dtype=np.int64)
+    p_recover = 1.0 - np.exp(-gamma)
+    p_progress = 1.0 - np.exp(-sigma) if sigma is not None else None
+    curves = np.empty((days, realizations), dtype=np.int64)
+
+    for day in range(days):
+        new_infected = rng.binomial(S, 1.0 - np.exp(-beta * I / N))
+        new_recovered = rng.binomial(I, p_recover)
+        S -= new_infected
+        if p_progress is not None:
+            new_infectious = rng.binomial(E, p_progress)
+            E += new_infected - new_infectious
+        else:
+            new_infectious = new_infected
+        I += new_infectious - new_recovered
+        curves[day] = I
+    return curves, N - S
+
+
+def run_ensemble_task(beta: float, gamma: float, population: int, initial_cases: int,
+                      days: int, realizations: int, seed: np.random.SeedSequence,
+                      sigma: Optional[float] = None) -> EnsembleHistogram:
+    """Process-pool entry point: simulate one task in chunks and return only its histogram"""
+    rng = np.random.default_rng(seed)
+    histogram = EnsembleHistogram(days, population)
+    for start in range(0, realizations, CHUNK_REALIZATIONS):
+        curves, final_size = simulate_chain_binomial(
+            beta, gamma, population, initial_cases, days,
+            min(CHUNK_REALIZATIONS, realizations - start), rng, sigma
+        )
+        histogram.add(curves, final_size)
+    return histogram
+
+
+def run_ensemble(model: str, beta: float, gamma: float, population: int, initial_cases: int, days: int,
+                 realizations: int, sigma: Optional[float] = None, seed: int = 0,
+                 percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                 executor: Optional[Executor] = None, max_pending: int = 8,
+                 progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+    """
+    Run `realizations` stochastic trajectories and return percentile envelopes over days
+    每个任务的随机种子由 SeedSequence(seed).spawn 派生，结果与工作进程数无关、可复现
+    progress(fraction) 每合并一个任务调用一次；它抛出异常时尚未开始的任务被取消
+    """
+    model = model.upper()
+    if model not in MODELS:
+        raise ValueError(f"Unknown model: {model}")
+    if model == 'SEIR' and sigma is None:
+        raise ValueError("SEIR requires sigma (1 / incubation period)")
+    if not 0 <= initial_cases <= population:
+        raise ValueError("initial_cases must be between 0 and population")
+    if model == 'SIR':
+        sigma = None
+
+    sizes = [TASK_REALIZATIONS] * (realizations // TASK_REALIZATIONS)
+    if realizations % TASK_REALIZATIONS:
+        sizes.append(realizations % TASK_REALIZATIONS)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = (beta, gamma, population, initial_cases, days)
+
+    total = EnsembleHistogram(days, population)
+    done = 0
+
+    def merge(histogram: EnsembleHistogram, size: int) -> None:
+        nonlocal done
+        total.merge(histogram)
+        done += size
+        if progress is not None:
+            progress(done / realizations)
+
+    if executor is None or len(sizes) == 1:
+        for size, task_seed in zip(sizes, seeds):
+            merge(run_ensemble_task(*args, size, task_seed, sigma), size)
+    else:
+        pending = []
+        try:
+            for size, task_seed in zip(sizes, seeds):
+                pending.append((executor.submit(run_ensemble_task, *args, size, task_seed, sigma), size))
+                if len(pending) >= max_pending:
+                    future, done_size = pending.pop(0)
+                    merge(future.result(), done_size)
+            while pending:
+                future, done_size = pending.pop(0)
+                merge(future.result(), done_size)
+        finally:
+            for future, _ in pending:
+                future.cancel()
+    return total.summary(percentiles)
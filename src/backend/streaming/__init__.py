@@ -0,0 +1 @@
+# This file makes the streaming directory a Python package 
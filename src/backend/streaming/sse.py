@@ -0,0 +1,144 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+import anyio
+from starlette.responses import StreamingResponse
+
+from metrics.registry import SSE_STREAMS
+
+logger = logging.getLogger(__name__)
+
+# 已计算但尚未写入连接的事件字节数上限；达到上限时计算线程暂停，慢客户端不会让服务端无限缓冲
+SSE_BUFFER_BYTES = int(os.environ.get('SSE_BUFFER_BYTES', 1 << 20))
+# 计算期间没有事件时发送注释行，避免代理因空闲断开连接
+HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+# 等待缓冲区空位时检查取消标志的间隔
+POLL_SECONDS = 0.25
+
+_END = object()
+
+
+def format_event(event: str, data: Any, event_id: Optional[int] = None) -> bytes:
+    """One text/event-stream event with a JSON payload"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8')
+
+
+def result_events(batches: Iterable[List[Dict[str, Any]]], total: int) -> Iterator[bytes]:
+    """
+    Events for results computed batch by batch: a `result` per item (id = its index),
+    a `progress` event whenever the whole percentage advances, and a final `done`
+    """
+    started = time.perf_counter()
+    done = 0
+    reported = 0
+    yield format_event('progress', {'done': 0, 'total': total, 'percent': 0})
+    for batch in batches:
+        parts = []
+        for result in batch:
+            parts.append(format_event('result', result, done))
+            done += 1
+        percent = done * 100 // total if total else 100
+        if percent > reported:
+            parts.append(format_event('progress', {'done': done, 'total': total, 'percent': percent}))
+            reported = percent
+        yield b''.join(parts)
+    yield format_event('done', {'count': done, 'seconds': round(time.perf_counter() - started, 4)})
+
+
+async def pump(events: Iterator[bytes], endpoint: str, buffer_bytes: int = SSE_BUFFER_BYTES) -> AsyncIterator[bytes]:
+    """
+    在独立线程中运行同步的事件生成器，把产出交给事件循环
+    在途字节（已算出、尚未写入传输层）达到 buffer_bytes 时计算线程等待，每块发送完毕后再继续；
+    客户端断开时本生成器被关闭，计算线程在当前一步完成后停止，并关闭事件生成器
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    space = threading.Condition()
+    pending = {'bytes': 0}
+    cancelled = threading.Event()
+    outcome = {'value': 'completed'}
+
+    def deliver(item: Any) -> None:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:  # 事件循环已关闭
+            cancelled.set()
+
+    def produce() -> None:
+        try:
+            for chunk in events:
+                with space:
+                    while pending['bytes'] >= buffer_bytes and not cancelled.is_set():
+                        space.wait(POLL_SECONDS)
+                    if cancelled.is_set():
+                        return
+                    pending['bytes'] += len(chunk)
+                deliver(chunk)
+        except Exception as e:
+            logger.exception(f"事件流计算失败: {endpoint}")
+            outcome['value'] = 'error'
+            deliver(format_event('error', {'detail': str(e)}))
+        finally:
+            close = getattr(events, 'close', None)
+            if close is not None:
+                close()
+            deliver(_END)
+
+    threading.Thread(target=produce, name=f"sse {endpoint}", daemon=True).start()
+    finished = False
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b': keep-alive\n\n'
+                continue
+            if item is _END:
+                finished = True
+                return
+            yield item
+            with space:
+                pending['bytes'] -= len(item)
+                space.notify()
+    finally:
+        cancelled.set()
+        with space:
+            space.notify()
+        SSE_STREAMS.inc(endpoint=endpoint, outcome=outcome['value'] if finished else 'cancelled')
+
+
+class EventStreamResponse(StreamingResponse):
+    """
+    text/event-stream 响应；无论 ASGI 版本都同时监听 http.disconnect，
+    客户端一断开就取消发送（进而取消计算），而不是等到下一次写入失败
+    """
+    media_type = 'text/event-stream'
+
+    def __init__(self, content: AsyncIterator[bytes], **kwargs):
+        headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no', **kwargs.pop('headers', {})}
+        super().__init__(content, headers=headers, **kwargs)
+
+    async def __call__(self, scope, receive, send) -> None:
+        async with anyio.create_task_group() as task_group:
+            async def stream() -> None:
+                try:
+                    await self.stream_response(send)
+                except OSError:  # 写入时发现客户端已断开
+                    pass
+                task_group.cancel_scope.cancel()
+
+            task_group.start_soon(stream)
+            await self.listen_for_disconnect(receive)
+            task_group.cancel_scope.cancel()
+        # 取消发生在 yield 之外时生成器不会自动结束；显式关闭以便立即通知计算线程
+        await self.body_iterator.aclose()
+
+
+def event_stream(events: Iterator[bytes], endpoint: str) -> EventStreamResponse:
+    return EventStreamResponse(pump(events, endpoint))
@@ -0,0 +1,42 @@
+"""Benchmark: per-row predict_with_model vs. the batch engine behind /ai_predict
+
+Usage (from src/):  python benchmarks/bench_ai_predict.py --n 5000
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from generators import random_mutations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n', type=int, default=2000, help='number of mutations per batch')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # 预测失败时的日志和 sklearn 的特征名警告会干扰计时
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings('ignore')
+    from routers.ai_predict import predict_with_model, predict_batch_with_model
+
+    mutations = random_mutations(args.n)
+    for name, run in (
+        ('per-row', lambda: [predict_with_model(m) for m in mutations]),
+        ('batch', lambda: predict_batch_with_model(mutations)),
+    ):
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:>8}: {args.n / best:12.1f} mutations/s  ({best * 1000:.1f} ms for {args.n})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark: per-worker memory of the model with private loads vs. the shared memory-mapped model
+
+Usage (from src/):  python benchmarks/bench_shared_model.py --workers 4
+
+Starts --workers fresh processes per mode (like uvicorn workers). Each imports the
+web stack, loads the model via routers.ai_predict and scores a batch. Memory is
+sampled while all workers are alive. rss counts shared pages in every process;
+pss splits them between the processes mapping them; private is what a worker adds.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(SRC_DIR, 'backend'))
+sys.path.insert(0, SRC_DIR)
+
+from generators import random_mutations
+
+
+def worker(shared_root, barrier, results):
+    import logging
+    import warnings
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings('ignore')
+    if shared_root:
+        os.environ['MODEL_SHARED_DIR'] = shared_root
+    # 两种模式都需要的依赖先导入，差值只反映模型本身
+    import numpy, pandas, fastapi  # noqa: F401
+    from inference.shared_model import memory_usage
+    before = memory_usage()
+    from routers.ai_predict import registry, predict_batch_with_model
+    predict_batch_with_model(random_mutations(2000))
+    barrier.wait()
+    after = memory_usage()
+    results.put({key: after[key] - before[key] for key in after} | {'backend': registry.active.info()['backend']})
+    barrier.wait()
+
+
+def measure(workers: int, shared_root):
+    ctx = multiprocessing.get_context('spawn')
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(shared_root, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    from inference.shared_model import default_shared_root
+    from routers.ai_predict import registry
+    from inference.registry import ModelRegistry
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(default_shared_root())) as shared_root:
+        # 与 serve.py 相同：启动 worker 之前导出共享数组
+        ModelRegistry(registry.root, shared_root=shared_root).load()
+        for name, root in (('private', None), ('shared', shared_root)):
+            rows = measure(args.workers, root)
+            mb = {key: [row[key] / 1e6 for row in rows] for key in ('rss', 'pss', 'private')}
+            print(f"{name:>8} ({rows[0]['backend']}): per worker " + '  '.join(
+                f"{key}={sum(values) / len(values):6.1f} MB" for key, values in mb.items()
+            ) + f"  | {args.workers} workers private total={sum(mb['private']):6.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Startup budget: import-time profile of the API and time from launch until /health answers
+
+Usage (from src/):
+    python benchmarks/bench_startup.py                 # import report + server launch timing
+    python benchmarks/bench_startup.py --top 30 --budget 1.0
+    python benchmarks/bench_startup.py --skip-server   # import report only
+
+The import report runs `python -X importtime -c "import main"` in a fresh interpreter and
+lists the slowest modules (cumulative) and the slowest top-level packages (self time summed).
+The launch test starts uvicorn in a subprocess and polls /health (liveness) and /health/ready
+(model loaded); the exit status is 1 when /health takes longer than --budget seconds.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+DEFAULT_BUDGET = 1.0
+POLL_INTERVAL = 0.01
+
+# (self_us, cumulative_us, depth, module)
+ImportRecord = Tuple[int, int, int, str]
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    """Parse `-X importtime` lines: "import time: self [us] | cumulative | <indent>module" """
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # 表头行
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append((int(fields[0]), int(fields[1]), depth, name.strip()))
+    return records
+
+
+def import_report(module: str = 'main') -> List[ImportRecord]:
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=BACKEND_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    return parse_importtime(result.stderr)
+
+
+def print_import_report(records: List[ImportRecord], top: int, module: str = 'main') -> float:
+    """Print the report and return the cumulative import time of `module` in seconds"""
+    total = next((cumulative for _, cumulative, depth, name in records if name == module and depth == 0), 0)
+    packages: Dict[str, int] = defaultdict(int)
+    for self_us, _, _, name in records:
+        packages[name.split('.')[0]] += self_us
+
+    print(f"import {module}: {total / 1e6:.3f}s cumulative ({len(records)} modules)")
+    print("\nslowest modules (cumulative, includes their imports):")
+    for self_us, cumulative, depth, name in sorted(records, key=lambda r: -r[1])[:top]:
+        print(f"  {cumulative / 1e3:9.1f} ms  {self_us / 1e3:8.1f} ms self  {'  ' * depth}{name}")
+    print("\nslowest packages (self time summed):")
+    for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {self_us / 1e3:9.1f} ms  {name}")
+    return total / 1e6
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def poll(url: str, deadline: float) -> Optional[float]:
+    """Time (perf_counter) of the first 200 from url, None if the deadline passes"""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(POLL_INTERVAL)
+    return None
+
+
+def measure_launch(timeout: float) -> Dict[str, Optional[float]]:
+    """Start uvicorn and return seconds from launch until /health and /health/ready answer 200"""
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = start + timeout
+        live = poll(f'{base}/health', deadline)
+        ready = poll(f'{base}/health/ready', deadline) if live is not None else None
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        'health_s': None if live is None else live - start,
+        'ready_s': None if ready is None else ready - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=20, help='rows per report table')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help='maximum seconds from launch until /health answers')
+    parser.add_argument('--timeout', type=float, default=60.0, help='give up waiting for the server after this')
+    parser.add_argument('--repeat', type=int, default=3, help='server launches; the best one is reported')
+    parser.add_argument('--skip-server', action='store_true', help='only print the import report')
+    args = parser.parse_args()
+
+    print_import_report(import_report(), args.top)
+    if args.skip_server:
+        return
+
+    runs = [measure_launch(args.timeout) for _ in range(args.repeat)]
+    live = [run['health_s'] for run in runs if run['health_s'] is not None]
+    ready = [run['ready_s'] for run in runs if run['ready_s'] is not None]
+    print(f"\nlaunch -> /health       {min(live):.3f}s (best of {len(live)})" if live else "\n/health never answered")
+    print(f"launch -> /health/ready {min(ready):.3f}s (best of {len(ready)})" if ready else "/health/ready never answered")
+    if not live or min(live) > args.budget:
+        print(f"over budget: /health must answer within {args.budget:.2f}s of launch")
+        sys.exit(1)
+    print(f"within budget ({args.budget:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
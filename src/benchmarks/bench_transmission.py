@@ -0,0 +1,44 @@
+"""Benchmark: the per-scenario /analyze/transmission loop vs. the vectorized SIR engine
+
+Usage (from src/):  python benchmarks/bench_transmission.py --n 10000 --days 180
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n', type=int, default=10000, help='number of (beta, gamma) scenarios')
+    parser.add_argument('--days', type=int, default=180)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from main import simulate_transmission
+    from simulation.compartmental import run_compartmental
+
+    rng = np.random.default_rng(0)
+    beta = rng.uniform(0.1, 0.6, args.n)
+    gamma = rng.uniform(0.05, 0.3, args.n)
+
+    for name, run in (
+        ('loop', lambda: [simulate_transmission(10, b, g, args.days) for b, g in zip(beta, gamma)]),
+        ('vector', lambda: run_compartmental('SIR', beta, gamma, 10000, 10, args.days)),
+    ):
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:>8}: {args.n / best:12.1f} scenarios/s  ({best * 1000:.1f} ms for {args.n} x {args.days} days)")
+
+
+if __name__ == '__main__':
+    main()
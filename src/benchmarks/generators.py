@@ -0,0 +1,128 @@
+"""Synthetic inputs for the benchmarks: mutations, FASTA genomes, multi-sample VCFs, CSVs and lineage tables
+
+All generators are deterministic for a given seed so baseline runs are comparable.
+"""
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+AMINO_ACIDS = 'ADEFGHIKLMNPQRSTVWY'
+GENES = ['S', 'N', 'E', 'M', 'ORF1a', 'ORF1b']
+LOCATIONS = ['Beijing', 'Shanghai', 'Guangzhou', 'Shenzhen', 'Wuhan', 'Chengdu', 'Hangzhou', 'Nanjing']
+NUCLEOTIDES = 'ACGT'
+
+
+def random_mutation(rng: random.Random) -> str:
+    ref = rng.choice(AMINO_ACIDS)
+    alt = rng.choice(AMINO_ACIDS.replace(ref, ''))
+    return f"{rng.choice(GENES)}:{ref}{rng.randint(1, 1300)}{alt}"
+
+
+def random_mutations(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [random_mutation(rng) for _ in range(n)]
+
+
+def variant_samples(n: int, mutations_per_sample: int = 10, seed: int = 0) -> List[Dict[str, Any]]:
+    """Request items for /analyze/variants"""
+    rng = random.Random(seed)
+    return [
+        {
+            "sequence_id": f"sample_{i}",
+            "mutations": [random_mutation(rng) for _ in range(mutations_per_sample)],
+            "location": rng.choice(LOCATIONS),
+            "date": f"2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        }
+        for i in range(n)
+    ]
+
+
+def fasta_text(records: int, length: int = 29903, seed: int = 0, reference: Optional[str] = None,
+               snps: int = 30, line_width: int = 60) -> str:
+    """
+    FASTA with `records` genomes. With a reference each genome is the reference plus `snps`
+    random substitutions (realistic input for mutation calling); otherwise random bases of `length`
+    """
+    rng = random.Random(seed)
+    lines = []
+    for i in range(records):
+        if reference is not None:
+            genome = list(reference)
+            for _ in range(snps):
+                pos = rng.randrange(len(genome))
+                genome[pos] = rng.choice(NUCLEOTIDES.replace(genome[pos], '') or NUCLEOTIDES)
+            sequence = ''.join(genome)
+        else:
+            sequence = ''.join(rng.choices(NUCLEOTIDES, k=length))
+        lines.append(f">genome_{i} synthetic")
+        lines.extend(sequence[j:j + line_width] for j in range(0, len(sequence), line_width))
+    return '\n'.join(lines) + '\n'
+
+
+def vcf_text(variants: int, samples: int = 4, seed: int = 0, genome_length: int = 29903) -> str:
+    """Multi-sample VCF with GENE/AA annotations and GT columns"""
+    rng = random.Random(seed)
+    sample_names = [f"sample_{i}" for i in range(samples)]
+    lines = [
+        '##fileformat=VCFv4.2',
+        '##INFO=<ID=GENE,Number=1,Type=String,Description="Gene">',
+        '##INFO=<ID=AA,Number=1,Type=String,Description="Amino acid change">',
+        '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">',
+        '\t'.join(['#CHROM', 'POS', 'ID', 'REF', 'ALT', 'QUAL', 'FILTER', 'INFO', 'FORMAT'] + sample_names),
+    ]
+    positions = sorted(rng.sample(range(1, genome_length + 1), min(variants, genome_length)))
+    for pos in positions:
+        ref = rng.choice(NUCLEOTIDES)
+        alt = rng.choice(NUCLEOTIDES.replace(ref, ''))
+        gene, aa = random_mutation(rng).split(':')
+        genotypes = [rng.choice(('0', '1', '.')) for _ in sample_names]
+        lines.append('\t'.join(
+            ['NC_045512.2', str(pos), '.', ref, alt, '60', 'PASS', f"GENE={gene};AA={aa}", 'GT'] + genotypes
+        ))
+    return '\n'.join(lines) + '\n'
+
+
+def csv_text(rows: int, seed: int = 0) -> str:
+    """CSV of mutations with labels (the training_data.csv layout plus sample metadata)"""
+    rng = random.Random(seed)
+    lines = ['sequence_id,mutation,label,location,date']
+    for i in range(rows):
+        lines.append(
+            f"sample_{i},{random_mutation(rng)},{rng.randint(0, 1)},{rng.choice(LOCATIONS)},"
+            f"2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def lineage_table(lineages: int, root_mutations: int = 30, seed: int = 0) -> List[Tuple[str, str, List[str]]]:
+    """
+    Nested lineage definitions like a Pango tree: each lineage inherits its parent's mutations
+    and adds 1-4 new ones, so ancestral mutations are shared by most lineages
+    """
+    rng = random.Random(seed)
+    seen = set()
+
+    def new_mutation() -> str:
+        while True:
+            mutation = random_mutation(rng)
+            if mutation not in seen:
+                seen.add(mutation)
+                return mutation
+
+    table = [('L0', '', [new_mutation() for _ in range(root_mutations)])]
+    for i in range(1, lineages):
+        _, _, parent = table[rng.randrange(i)]
+        table.append((f"L{i}", '', parent + [new_mutation() for _ in range(rng.randint(1, 4))]))
+    return table
+
+
+def lineage_samples(table: List[Tuple[str, str, List[str]]], n: int, dropout: float = 0.03,
+                    private: int = 5, seed: int = 0) -> List[List[str]]:
+    """Mutation lists of samples drawn from `table`, with dropped-out and private (unlisted) mutations"""
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(n):
+        _, _, mutations = rng.choice(table)
+        sample = [m for m in mutations if rng.random() >= dropout]
+        sample.extend(random_mutation(rng) for _ in range(private))
+        samples.append(sample)
+    return samples
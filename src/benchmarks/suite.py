@@ -0,0 +1,324 @@
+"""Benchmark suite: parser/model microbenchmarks and in-process load tests for every API route
+
+Runs against the FastAPI app in-process (no server needed). Results can be saved as a
+baseline and later compared; --compare exits with status 1 when any metric regresses
+by more than --threshold (throughput lower, latency higher, or more failed requests).
+
+Usage (from src/):
+    python benchmarks/suite.py                                  # run and print
+    python benchmarks/suite.py --save benchmarks/baselines/local.json
+    python benchmarks/suite.py --compare benchmarks/baselines/local.json --threshold 0.25
+    python benchmarks/suite.py --only 'parse_|/upload' --scale 0.2
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from generators import csv_text, fasta_text, lineage_samples, lineage_table, random_mutations, variant_samples, vcf_text
+
+# 吞吐量越高越好，延迟越低越好；失败请求数不允许增加
+HIGHER_IS_BETTER = ('per_s', 'rps')
+LOWER_IS_BETTER = ('ms', 'p50_ms', 'p95_ms', 'p99_ms')
+DEFAULT_THRESHOLD = 0.25
+
+# (method, url, httpx request kwargs)
+Request = Tuple[str, str, Dict[str, Any]]
+
+
+def sized(base: int, scale: float) -> int:
+    return max(1, int(base * scale))
+
+
+def best_time(run: Callable[[], Any], repeat: int) -> float:
+    """Best wall time of `repeat` runs after one warm-up run"""
+    run()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def micro_benchmarks(scale: float) -> Dict[str, Tuple[Callable[[], Any], int]]:
+    """{name: (run, units processed per run)}"""
+    from main import simulate_transmission
+    from routers.ai_predict import predict_with_model
+    from data_processing.fasta_vcf_parser import parse_fasta, parse_vcf
+    from ml_models.train_model import extract_features  # 导入 main 后 src/ 已在 sys.path 中
+    from data_processing.lineage_classifier import LineageClassifier
+
+    fasta = fasta_text(sized(20, scale))
+    vcf = vcf_text(sized(5000, scale), samples=8)
+    mutations = random_mutations(sized(20000, scale))
+    predict = mutations[:sized(50, scale)]
+    rng = np.random.default_rng(0)
+    lineages = LineageClassifier(lineage_table(3000))
+    lineage_inputs = lineage_samples(lineage_table(3000), sized(100000, scale))
+    scenarios = list(zip(rng.uniform(0.1, 0.6, sized(500, scale)), rng.uniform(0.05, 0.3, sized(500, scale))))
+    return {
+        'parse_fasta': (lambda: parse_fasta(fasta), sized(20, scale)),
+        'parse_vcf': (lambda: parse_vcf(vcf), sized(5000, scale)),
+        'extract_features': (lambda: [extract_features(m) for m in mutations], len(mutations)),
+        'predict_with_model': (lambda: [predict_with_model(m) for m in predict], len(predict)),
+        'classify_lineages': (lambda: lineages.assign(lineage_inputs), len(lineage_inputs)),
+        'sir_loop': (lambda: [simulate_transmission(10, b, g, 180) for b, g in scenarios], len(scenarios)),
+    }
+
+
+def upload(name: str, content: str) -> Dict[str, Any]:
+    return {'files': [('files', (name, content.encode(), 'application/octet-stream'))]}
+
+
+def route_requests(scale: float) -> Dict[str, Callable[[int, Dict[str, Any]], Request]]:
+    """
+    {name: factory(i, ctx) -> request}; the i-th request differs from the others so
+    cached endpoints are measured on misses. ctx holds ids created by prepare_routes
+    """
+    from data_processing.mutation_caller import read_reference
+
+    samples = variant_samples(sized(20, scale))
+    fasta = fasta_text(sized(200, scale), length=1000)
+    vcf = vcf_text(sized(2000, scale), samples=8)
+    csv = csv_text(sized(2000, scale))
+    genomes = fasta_text(sized(4, scale), reference=read_reference().decode())
+    predict_size = sized(200, scale)
+    return {
+        'GET /': lambda i, ctx: ('GET', '/', {}),
+        'GET /health': lambda i, ctx: ('GET', '/health', {}),
+        'POST /analyze/variants': lambda i, ctx: (
+            'POST', '/analyze/variants', {'json': {'data': samples, 'analysis_type': 'variants'}}),
+        'POST /analyze/variants?stream=true': lambda i, ctx: (
+            'POST', '/analyze/variants?stream=true', {'json': {'data': samples, 'analysis_type': 'variants'}}),
+        'POST /analyze/variants/events': lambda i, ctx: (
+            'POST', '/analyze/variants/events', {'json': {'data': samples, 'analysis_type': 'variants'}}),
+        'POST /analyze/transmission': lambda i, ctx: (
+            'POST', '/analyze/transmission', {'json': {'beta': 0.2 + i * 1e-4, 'gamma': 0.1, 'days': 180}}),
+        'POST /analyze/vaccine': lambda i, ctx: (
+            'POST', '/analyze/vaccine', {'json': {'coverage': 50 + i * 1e-3, 'immunity_duration': 365}}),
+        'POST /analyze/transmission/sweep': lambda i, ctx: (
+            'POST', '/analyze/transmission/sweep',
+            {'json': {'beta': list(np.linspace(0.1, 0.6, 50) + i * 1e-4), 'gamma': list(np.linspace(0.05, 0.3, 20)),
+                      'days': 180}}),
+        'POST /analyze/transmission/ensemble': lambda i, ctx: (
+            'POST', '/analyze/transmission/ensemble',
+            {'json': {'realizations': sized(1000, scale), 'days': 60, 'population': 1000, 'seed': i}}),
+        'POST /analyze/transmission/metapopulation': lambda i, ctx: (
+            'POST', '/analyze/transmission/metapopulation', {'json': {'samples': samples, 'days': 60 + i % 30}}),
+        'POST /ai_predict': lambda i, ctx: ('POST', '/ai_predict', {'json': random_mutations(predict_size, seed=i)}),
+        'POST /ai_predict/events': lambda i, ctx: (
+            'POST', '/ai_predict/events', {'json': random_mutations(predict_size, seed=i)}),
+        'GET /models': lambda i, ctx: ('GET', '/models', {}),
+        'POST /upload (fasta)': lambda i, ctx: ('POST', '/upload', upload('bench.fasta', fasta)),
+        'POST /upload (vcf)': lambda i, ctx: ('POST', '/upload', upload('bench.vcf', vcf)),
+        'POST /upload (csv)': lambda i, ctx: ('POST', '/upload', upload('bench.csv', csv)),
+        'POST /upload?store=true': lambda i, ctx: ('POST', '/upload?store=true', upload('bench.csv', csv)),
+        'GET /uploads/{id}/records': lambda i, ctx: (
+            'GET', f"/uploads/{ctx['upload_id']}/records", {'params': {'limit': 100}}),
+        'GET /uploads/{id}/sequences/{seq}': lambda i, ctx: (
+            'GET', f"/uploads/{ctx['fasta_upload_id']}/sequences/genome_{i % 20}", {'params': {'start': 21563, 'end': 25384}}),
+        'POST /analyze/call_mutations': lambda i, ctx: ('POST', '/analyze/call_mutations', upload('genomes.fasta', genomes)),
+        'POST /sequences': lambda i, ctx: ('POST', '/sequences', upload('genomes.fasta', genomes)),
+        'GET /sequences/{id}/fasta': lambda i, ctx: ('GET', f"/sequences/{ctx['sequence_id']}/fasta", {}),
+        'POST /lineages/classify': lambda i, ctx: (
+            'POST', '/lineages/classify', {'json': [sample['mutations'] for sample in samples]}),
+        'GET /annotations': lambda i, ctx: ('GET', '/annotations', {'params': {'gene': 'S', 'start': 1, 'end': 1300}}),
+        'POST /annotations/lookup': lambda i, ctx: (
+            'POST', '/annotations/lookup', {'json': random_mutations(predict_size, seed=i)}),
+        'GET /annotations/{mutation}': lambda i, ctx: ('GET', '/annotations/S:D614G', {}),
+        'POST /jobs': lambda i, ctx: (
+            'POST', '/jobs', {'json': {'kind': 'transmission', 'payload': {'beta': 0.2 + i * 1e-4}}}),
+        'GET /jobs/{id}': lambda i, ctx: ('GET', f"/jobs/{ctx['job_id']}", {}),
+        'GET /cache/stats': lambda i, ctx: ('GET', '/cache/stats', {}),
+    }
+
+
+async def prepare_routes(client) -> Dict[str, Any]:
+    """Create the stored uploads, job and sequence the GET routes read"""
+    response = await client.post('/upload?store=true', **upload('prepare.csv', csv_text(500)))
+    fasta = await client.post('/upload?store=true', **upload('prepare.fasta', fasta_text(20)))
+    job = await client.post('/jobs', json={'kind': 'transmission', 'payload': {}})
+    await client.post('/sequences', **upload('prepare.fasta', fasta_text(1)))
+    return {'upload_id': response.json()['results'][0]['upload_id'], 'job_id': job.json()['job_id'],
+            'fasta_upload_id': fasta.json()['results'][0]['upload_id'], 'sequence_id': 'genome_0'}
+
+
+async def load_test(client, factory: Callable[[int, Dict[str, Any]], Request], ctx: Dict[str, Any],
+                    requests: int, concurrency: int) -> Dict[str, float]:
+    """Send `requests` requests with at most `concurrency` in flight; throughput and latency percentiles"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def send(i: int) -> None:
+        nonlocal errors
+        method, url, kwargs = factory(i, ctx)
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {'rps': requests / elapsed, 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'errors': errors}
+
+
+async def run_load_tests(scale: float, requests: int, concurrency: int, repeat: int,
+                         selected: Callable[[str], bool]) -> Dict[str, Dict[str, float]]:
+    import httpx
+    from main import app
+    from cache.result_cache import result_cache
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+        ctx = await prepare_routes(client)
+        for name, factory in route_requests(scale).items():
+            if not selected(name):
+                continue
+            # 预热一次（路由首次调用、进程池启动等）；每轮前清空结果缓存，测的是实际计算
+            method, url, kwargs = factory(-1, ctx)
+            await client.request(method, url, **kwargs)
+            best = None
+            for _ in range(repeat):
+                result_cache.clear()
+                metrics = await load_test(client, factory, ctx, requests, concurrency)
+                if best is None or metrics['rps'] > best['rps']:
+                    best = metrics
+            results[name] = best
+            print_result(name, best)
+    return results
+
+
+def run_micro(scale: float, repeat: int, selected: Callable[[str], bool]) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, (run, units) in micro_benchmarks(scale).items():
+        if not selected(name):
+            continue
+        best = best_time(run, repeat)
+        results[name] = {'per_s': units / best, 'ms': best * 1000}
+        print_result(name, results[name])
+    return results
+
+
+def print_result(name: str, metrics: Dict[str, float]) -> None:
+    print(f"{name:<44} " + '  '.join(f"{key}={value:.1f}" for key, value in metrics.items()), flush=True)
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """Regression messages for every metric worse than the baseline by more than `threshold`"""
+    regressions = []
+    for name, old_metrics in baseline.items():
+        new_metrics = results.get(name)
+        if new_metrics is None:
+            continue
+        for metric, old in old_metrics.items():
+            new = new_metrics.get(metric)
+            if new is None:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                worse = new < old * (1 - threshold)
+            elif metric in LOWER_IS_BETTER:
+                worse = new > old * (1 + threshold)
+            else:
+                worse = new > old
+            if worse:
+                change = f"{(new - old) / old:+.0%}" if old else 'new'
+                regressions.append(f"{name} {metric}: {old:.1f} -> {new:.1f} ({change})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier for all input sizes')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark; the best one is kept')
+    parser.add_argument('--requests', type=int, default=20, help='requests per route and run')
+    parser.add_argument('--concurrency', type=int, default=4, help='requests in flight per route')
+    parser.add_argument('--only', help='regex; run only benchmarks whose name matches')
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--skip-load', action='store_true')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON to compare against; exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed relative slowdown per metric (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    # 任务队列和上传存储写到临时目录，不影响本机服务的数据
+    workdir = tempfile.mkdtemp(prefix='sars_cov2_bench-')
+    os.environ['JOB_DB_PATH'] = os.path.join(workdir, 'jobs.sqlite3')
+    os.environ['UPLOAD_STORE_DIR'] = os.path.join(workdir, 'uploads')
+    os.environ['SEQUENCE_STORE_DIR'] = os.path.join(workdir, 'sequences')
+    os.environ.pop('RESULT_CACHE_DIR', None)
+    # 预测失败时的日志和 sklearn 的特征名警告会干扰计时
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings('ignore')
+
+    pattern = re.compile(args.only) if args.only else None
+
+    def selected(name: str) -> bool:
+        return pattern is None or bool(pattern.search(name))
+
+    results: Dict[str, Dict[str, float]] = {}
+    try:
+        if not args.skip_micro:
+            results.update(run_micro(args.scale, args.repeat, selected))
+        if not args.skip_load:
+            results.update(asyncio.run(run_load_tests(args.scale, args.requests, args.concurrency, args.repeat, selected)))
+            from routers.jobs import job_queue
+            job_queue.stop(timeout=5)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'scale': args.scale,
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'results': {name: {k: round(float(v), 3) for k, v in metrics.items()} for name, metrics in results.items()},
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"saved {len(results)} results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for key in ('scale', 'requests', 'concurrency', 'cpu_count'):
+            if baseline.get(key) != report[key]:
+                print(f"warning: baseline {key}={baseline.get(key)} differs from this run ({report[key]})")
+        regressions = compare(report['results'], baseline['results'], args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
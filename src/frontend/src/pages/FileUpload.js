@@ -146,7 +146,7 @@ const FileUpload = () => {
                 <Input
                   id="upload-file-input"
                   type="file"
-                  inputProps={{ accept: '.fasta,.fa,.vcf,.csv', multiple: true }}
+                  inputProps={{ accept: '.fasta,.fa,.vcf,.csv,.gz,.bgz', multiple: true }}
                   onChange={handleFileChange}
                   style={{ display: 'none' }}
                 />
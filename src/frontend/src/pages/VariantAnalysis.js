@@ -630,7 +630,7 @@ const VariantAnalysis = () => {
                         />
                         <Line
                           type="monotone"
-                          dataKey="variants"
+                          dataKey="regions"
                           stroke="#82ca9d"
                         />
                       </LineChart>
@@ -1,10 +1,63 @@
-import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
-import joblib
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, Iterable, List, Optional, Sequence, Tuple
+from contextlib import contextmanager
+import argparse
+import hashlib
+import json
 import os
+import time
+
+# pandas / joblib / sklearn 只在训练和导出时于函数内导入：API 进程导入本模块只为特征编码，不应承担它们的导入开销
+if TYPE_CHECKING:
+    import pandas as pd
+
+# 氨基酸性质字典
+AA_PROPERTIES = {
+    'A': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'small'},
+    'D': {'hydrophobic': 0, 'polar': 1, 'charged': -1, 'size': 'medium'},
+    'E': {'hydrophobic': 0, 'polar': 1, 'charged': -1, 'size': 'medium'},
+    'F': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'large'},
+    'G': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'small'},
+    'H': {'hydrophobic': 0, 'polar': 1, 'charged': 1, 'size': 'medium'},
+    'I': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'medium'},
+    'K': {'hydrophobic': 0, 'polar': 1, 'charged': 1, 'size': 'medium'},
+    'L': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'medium'},
+    'M': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'medium'},
+    'N': {'hydrophobic': 0, 'polar': 1, 'charged': 0, 'size': 'medium'},
+    'P': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'small'},
+    'Q': {'hydrophobic': 0, 'polar': 1, 'charged': 0, 'size': 'medium'},
+    'R': {'hydrophobic': 0, 'polar': 1, 'charged': 1, 'size': 'medium'},
+    'S': {'hydrophobic': 0, 'polar': 1, 'charged': 0, 'size': 'small'},
+    'T': {'hydrophobic': 0, 'polar': 1, 'charged': 0, 'size': 'small'},
+    'V': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'small'},
+    'W': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'large'},
+    'Y': {'hydrophobic': 1, 'polar': 1, 'charged': 0, 'size': 'large'}
+}
+
+# 向量化编码所用的查找表（行顺序与 AA_PROPERTIES 一致）
+AMINO_ACIDS = ''.join(AA_PROPERTIES)
+SIZE_LEVELS = sorted({props['size'] for props in AA_PROPERTIES.values()})
+AA_HYDROPHOBIC = np.array([p['hydrophobic'] for p in AA_PROPERTIES.values()], dtype=np.int64)
+AA_POLAR = np.array([p['polar'] for p in AA_PROPERTIES.values()], dtype=np.int64)
+AA_CHARGED = np.array([p['charged'] for p in AA_PROPERTIES.values()], dtype=np.int64)
+AA_SIZE = np.array([SIZE_LEVELS.index(p['size']) for p in AA_PROPERTIES.values()], dtype=np.int64)
+
+# extract_features 中的类别特征，pd.get_dummies 会展开为 "<name>_<value>" 列
+CATEGORICAL_FEATURES = ('gene', 'ref_size', 'alt_size')
+
+# 分数表覆盖的最大位置（S 蛋白全长 1273 aa）
+SCORE_TABLE_MAX_POSITION = 1300
+
+# extract_features 中数值特征的顺序，即 get_dummies 之后特征列的前半部分
+NUMERIC_FEATURES = (
+    'position', 'ref_hydrophobic', 'ref_polar', 'ref_charged', 'alt_hydrophobic', 'alt_polar', 'alt_charged',
+    'position_mod_10', 'position_mod_100', 'is_key_region', 'is_n_terminal', 'is_c_terminal',
+    'hydrophobic_change', 'polar_change', 'charged_change', 'size_change'
+)
+# 氨基酸字母 -> AMINO_ACIDS 下标
+AA_INDEX = {aa: i for i, aa in enumerate(AMINO_ACIDS)}
+# 分块读取训练 CSV 的行数
+TRAIN_CHUNK_SIZE = 500000
 
 def extract_features(mutation: str) -> Dict[str, Any]:
     """
@@ -18,93 +71,317 @@ def extract_features(mutation: str) -> Dict[str, Any]:
         pos = ''.join(filter(str.isdigit, change))
         alt = change[-1]
         
-        # 氨基酸性质字典
-        aa_properties = {
-            'A': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'small'},
-            'D': {'hydrophobic': 0, 'polar': 1, 'charged': -1, 'size': 'medium'},
-            'E': {'hydrophobic': 0, 'polar': 1, 'charged': -1, 'size': 'medium'},
-            'F': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'large'},
-            'G': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'small'},
-            'H': {'hydrophobic': 0, 'polar': 1, 'charged': 1, 'size': 'medium'},
-            'I': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'medium'},
-            'K': {'hydrophobic': 0, 'polar': 1, 'charged': 1, 'size': 'medium'},
-            'L': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'medium'},
-            'M': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'medium'},
-            'N': {'hydrophobic': 0, 'polar': 1, 'charged': 0, 'size': 'medium'},
-            'P': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'small'},
-            'Q': {'hydrophobic': 0, 'polar': 1, 'charged': 0, 'size': 'medium'},
-            'R': {'hydrophobic': 0, 'polar': 1, 'charged': 1, 'size': 'medium'},
-            'S': {'hydrophobic': 0, 'polar': 1, 'charged': 0, 'size': 'small'},
-            'T': {'hydrophobic': 0, 'polar': 1, 'charged': 0, 'size': 'small'},
-            'V': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'small'},
-            'W': {'hydrophobic': 1, 'polar': 0, 'charged': 0, 'size': 'large'},
-            'Y': {'hydrophobic': 1, 'polar': 1, 'charged': 0, 'size': 'large'}
-        }
-        
         # 提取特征
         features = {
             'gene': gene,
             'position': int(pos),
-            'ref_hydrophobic': aa_properties[ref]['hydrophobic'],
-            'ref_polar': aa_properties[ref]['polar'],
-            'ref_charged': aa_properties[ref]['charged'],
-            'ref_size': aa_properties[ref]['size'],
-            'alt_hydrophobic': aa_properties[alt]['hydrophobic'],
-            'alt_polar': aa_properties[alt]['polar'],
-            'alt_charged': aa_properties[alt]['charged'],
-            'alt_size': aa_properties[alt]['size'],
+            'ref_hydrophobic': AA_PROPERTIES[ref]['hydrophobic'],
+            'ref_polar': AA_PROPERTIES[ref]['polar'],
+            'ref_charged': AA_PROPERTIES[ref]['charged'],
+            'ref_size': AA_PROPERTIES[ref]['size'],
+            'alt_hydrophobic': AA_PROPERTIES[alt]['hydrophobic'],
+            'alt_polar': AA_PROPERTIES[alt]['polar'],
+            'alt_charged': AA_PROPERTIES[alt]['charged'],
+            'alt_size': AA_PROPERTIES[alt]['size'],
             'position_mod_10': int(pos) % 10,  # 位置特征
             'position_mod_100': int(pos) % 100,
             'is_key_region': 1 if 319 <= int(pos) <= 541 else 0,  # RBD区域
             'is_n_terminal': 1 if int(pos) <= 100 else 0,  # N端区域
             'is_c_terminal': 1 if int(pos) >= 1000 else 0,  # C端区域
-            'hydrophobic_change': abs(aa_properties[ref]['hydrophobic'] - aa_properties[alt]['hydrophobic']),
-            'polar_change': abs(aa_properties[ref]['polar'] - aa_properties[alt]['polar']),
-            'charged_change': abs(aa_properties[ref]['charged'] - aa_properties[alt]['charged']),
-            'size_change': 1 if aa_properties[ref]['size'] != aa_properties[alt]['size'] else 0
+            'hydrophobic_change': abs(AA_PROPERTIES[ref]['hydrophobic'] - AA_PROPERTIES[alt]['hydrophobic']),
+            'polar_change': abs(AA_PROPERTIES[ref]['polar'] - AA_PROPERTIES[alt]['polar']),
+            'charged_change': abs(AA_PROPERTIES[ref]['charged'] - AA_PROPERTIES[alt]['charged']),
+            'size_change': 1 if AA_PROPERTIES[ref]['size'] != AA_PROPERTIES[alt]['size'] else 0
         }
         return features
     except:
         return None
 
-def train_model():
+def encode_features(genes: Sequence[str], positions, ref_idx, alt_idx,
+                    feature_columns: Sequence[str]) -> np.ndarray:
+    """
+    extract_features + pd.get_dummies + 列对齐 的向量化版本
+    ref_idx/alt_idx 是 AMINO_ACIDS 中的下标，返回 float32 特征矩阵
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    ref_idx = np.asarray(ref_idx, dtype=np.int64)
+    alt_idx = np.asarray(alt_idx, dtype=np.int64)
+    n = len(positions)
+    column_index = {col: i for i, col in enumerate(feature_columns)}
+    X = np.zeros((n, len(feature_columns)), dtype=np.float32)
+    if n == 0:
+        return X
+
+    numeric = {
+        'position': positions,
+        'ref_hydrophobic': AA_HYDROPHOBIC[ref_idx],
+        'ref_polar': AA_POLAR[ref_idx],
+        'ref_charged': AA_CHARGED[ref_idx],
+        'alt_hydrophobic': AA_HYDROPHOBIC[alt_idx],
+        'alt_polar': AA_POLAR[alt_idx],
+        'alt_charged': AA_CHARGED[alt_idx],
+        'position_mod_10': positions % 10,
+        'position_mod_100': positions % 100,
+        'is_key_region': (positions >= 319) & (positions <= 541),
+        'is_n_terminal': positions <= 100,
+        'is_c_terminal': positions >= 1000,
+        'hydrophobic_change': np.abs(AA_HYDROPHOBIC[ref_idx] - AA_HYDROPHOBIC[alt_idx]),
+        'polar_change': np.abs(AA_POLAR[ref_idx] - AA_POLAR[alt_idx]),
+        'charged_change': np.abs(AA_CHARGED[ref_idx] - AA_CHARGED[alt_idx]),
+        'size_change': AA_SIZE[ref_idx] != AA_SIZE[alt_idx],
+    }
+    for name, values in numeric.items():
+        col = column_index.get(name)
+        if col is not None:
+            X[:, col] = values
+
+    # 独热编码：训练时没见过的取值没有对应列，整行保持为 0（与 get_dummies 后再对齐一致）
+    rows = np.arange(n)
+    gene_col = np.fromiter((column_index.get(f'gene_{g}', -1) for g in genes), dtype=np.int64, count=n)
+    hit = gene_col >= 0
+    X[rows[hit], gene_col[hit]] = 1
+    for name, aa in (('ref_size', ref_idx), ('alt_size', alt_idx)):
+        lookup = np.array([column_index.get(f'{name}_{level}', -1) for level in SIZE_LEVELS], dtype=np.int64)
+        size_col = lookup[AA_SIZE[aa]]
+        hit = size_col >= 0
+        X[rows[hit], size_col[hit]] = 1
+    return X
+
+def parse_mutation_column(mutations: 'pd.Series') -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    整列解析突变字符串，规则与 extract_features 相同：
+    冒号前为基因，参考/替换氨基酸取冒号后的首尾字符，位置取冒号后的全部数字
+    返回 (valid, genes, positions, ref_idx, alt_idx)，后四个只包含 valid 的行
+    """
+    import pandas as pd
+    mutations = mutations.astype(str)
+    parts = mutations.str.partition(':')
+    genes, change = parts[0], parts[2]
+    digits = change.str.replace(r'\D', '', regex=True)
+    # 必须恰好一个冒号；超过 18 位的位置无法放进 int64，视为无效
+    valid = ((mutations.str.count(':') == 1) & (digits.str.len() > 0) & (digits.str.len() <= 18)).to_numpy()
+    ref = change.str[:1].map(AA_INDEX).fillna(-1).to_numpy(dtype=np.int8)
+    alt = change.str[-1:].map(AA_INDEX).fillna(-1).to_numpy(dtype=np.int8)
+    valid &= (ref >= 0) & (alt >= 0)
+    positions = pd.to_numeric(digits[valid], errors='coerce').to_numpy(dtype=np.int64)
+    return valid, genes[valid].to_numpy(dtype=object), positions, ref[valid], alt[valid]
+
+def training_feature_columns(genes: Iterable[str], ref_idx: np.ndarray, alt_idx: np.ndarray) -> List[str]:
+    """与 pd.get_dummies(pd.DataFrame(extract_features 结果)).columns 相同的列名和顺序"""
+    columns = list(NUMERIC_FEATURES)
+    columns += [f'gene_{gene}' for gene in sorted(set(genes))]
+    for name, idx in (('ref_size', ref_idx), ('alt_size', alt_idx)):
+        columns += [f'{name}_{SIZE_LEVELS[level]}' for level in np.unique(AA_SIZE[idx])]
+    return columns
+
+@contextmanager
+def stage(timings: Dict[str, float], name: str):
+    """Record the wall time of one pipeline stage"""
+    start = time.perf_counter()
+    yield
+    timings[name] = round(time.perf_counter() - start, 4)
+    print(f"[{name}] {timings[name]:.3f}s")
+
+def load_training_data(path: str, chunksize: int = TRAIN_CHUNK_SIZE):
+    """
+    分块读取训练 CSV，只保留紧凑的编码列（基因、位置、氨基酸下标、标签），不构造逐行字典
+    返回 (genes, positions, ref_idx, alt_idx, labels, 总行数)
+    """
+    import pandas as pd
+    genes, positions, refs, alts, labels = [], [], [], [], []
+    total = 0
+    for chunk in pd.read_csv(path, usecols=['mutation', 'label'], chunksize=chunksize):
+        total += len(chunk)
+        valid, g, pos, ref, alt = parse_mutation_column(chunk['mutation'])
+        genes.append(g)
+        positions.append(pos)
+        refs.append(ref)
+        alts.append(alt)
+        labels.append(chunk['label'].to_numpy()[valid])
+    if not labels:
+        raise ValueError(f"{path} 中没有训练数据")
+    return (np.concatenate(genes), np.concatenate(positions), np.concatenate(refs),
+            np.concatenate(alts), np.concatenate(labels), total)
+
+def file_sha256(path: str) -> str:
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def export_score_table(model, feature_columns, model_dir: str = 'models',
+                       max_position: int = SCORE_TABLE_MAX_POSITION):
+    """
+    对所有 (基因, 位置, 参考氨基酸, 替换氨基酸) 组合打分并保存为可内存映射的 .npy 分数表
+    基因维度为训练时出现过的基因，外加一个"其他基因"槽位（独热列全为 0）
+    """
+    import joblib
+    import pandas as pd
+    genes = [col[len('gene_'):] for col in feature_columns if col.startswith('gene_')]
+    slots = genes + [None]
+    n_aa = len(AMINO_ACIDS)
+    shape = (len(slots), max_position + 1, n_aa, n_aa)
+
+    positions, ref_idx, alt_idx = (
+        grid.ravel() for grid in np.meshgrid(np.arange(max_position + 1), np.arange(n_aa), np.arange(n_aa), indexing='ij')
+    )
+    table = np.lib.format.open_memmap(os.path.join(model_dir, 'score_table.npy'), mode='w+', dtype=np.float64, shape=shape)
+    for slot, gene in enumerate(slots):
+        X = encode_features([gene] * len(positions), positions, ref_idx, alt_idx, feature_columns)
+        scores = model.predict_proba(pd.DataFrame(X, columns=feature_columns))[:, 1]
+        table[slot] = scores.reshape(shape[1:])
+    table.flush()
+    del table
+
+    # 索引信息：记录模型文件哈希，服务端据此判断分数表是否与当前模型匹配
+    joblib.dump({
+        'genes': genes,
+        'amino_acids': AMINO_ACIDS,
+        'max_position': max_position,
+        'feature_columns': list(feature_columns),
+        'model_sha256': file_sha256(os.path.join(model_dir, 'mutation_model.pkl')),
+    }, os.path.join(model_dir, 'score_table_index.pkl'))
+
+def compile_forest(model) -> Dict[str, np.ndarray]:
+    """
+    把随机森林展开为连续的 NumPy 数组（特征下标、阈值、左右孩子、叶子概率），
+    即 inference.forest_evaluator.ForestEvaluator 的构造参数
+    """
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        is_leaf = tree.children_left == -1
+        own = np.arange(offset, offset + n)
+        # 叶子节点指向自身，评估时可以统一走 max_depth 步
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        lefts.append(np.where(is_leaf, own, tree.children_left + offset))
+        rights.append(np.where(is_leaf, own, tree.children_right + offset))
+        # 与 DecisionTreeClassifier.predict_proba 相同的归一化
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+        roots.append(offset)
+        depth = max(depth, tree.max_depth)
+        offset += n
+
+    return {
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold': np.concatenate(thresholds),
+        'left': np.concatenate(lefts).astype(np.int32),
+        'right': np.concatenate(rights).astype(np.int32),
+        'value': np.concatenate(values),
+        'roots': np.array(roots, dtype=np.int32),
+        'depth': np.array(depth),
+        'classes': np.asarray(model.classes_),
+    }
+
+def export_compiled_forest(model, model_dir: str = 'models'):
+    """Save compile_forest(model) as forest.npz; the API loads it without sklearn"""
+    np.savez(
+        os.path.join(model_dir, 'forest.npz'),
+        **compile_forest(model),
+        model_sha256=np.array(file_sha256(os.path.join(model_dir, 'mutation_model.pkl'))),
+    )
+
+def train_model(score_table: bool = False, export_forest: bool = False, output_dir: str = 'models',
+                data_path: str = 'training_data.csv', n_jobs: Optional[int] = -1, random_state: int = 42,
+                chunksize: int = TRAIN_CHUNK_SIZE):
+    """
+    分块读取 + 整列特征构造 + 多核拟合
+    产物与逐行 extract_features + get_dummies 的旧流程逐字节一致（相同数据和 random_state）
+    """
+    import joblib
+    import pandas as pd
+    from sklearn import __version__ as sklearn_version
+    from sklearn.ensemble import RandomForestClassifier
+
     # 确保模型目录存在
-    os.makedirs('models', exist_ok=True)
-    
-    # 加载训练数据
-    data = pd.read_csv('training_data.csv')
-    
-    # 特征提取
-    X = []
-    y = []
-    for _, row in data.iterrows():
-        features = extract_features(row['mutation'])
-        if features:
-            X.append(features)
-            y.append(row['label'])
-    
-    # 特征编码
-    X_encoded = pd.get_dummies(pd.DataFrame(X))
-    y_encoded = np.array(y)
-    
+    os.makedirs(output_dir, exist_ok=True)
+    timings: Dict[str, float] = {}
+
+    # 加载训练数据并提取特征
+    with stage(timings, 'load'):
+        genes, positions, ref_idx, alt_idx, y, total_rows = load_training_data(data_path, chunksize)
+
+    # 特征编码：列名与 get_dummies 一致，直接构造 sklearn 内部使用的 float32 矩阵
+    with stage(timings, 'encode'):
+        feature_columns = training_feature_columns(genes, ref_idx, alt_idx)
+        X = pd.DataFrame(encode_features(genes, positions, ref_idx, alt_idx, feature_columns), columns=feature_columns)
+
     # 训练模型
-    model = RandomForestClassifier(
-        n_estimators=200,  # 增加树的数量
-        max_depth=10,      # 限制树的深度
-        min_samples_split=2,
-        min_samples_leaf=1,
-        class_weight='balanced',  # 处理类别不平衡
-        random_state=42
-    )
-    model.fit(X_encoded, y_encoded)
-    
-    # 保存模型
-    joblib.dump(model, 'models/mutation_model.pkl')
-    
-    # 保存特征列名（用于预测时对齐特征）
-    joblib.dump(X_encoded.columns.tolist(), 'models/feature_columns.pkl')
-    
-    return model, X_encoded.columns.tolist()
+    with stage(timings, 'fit'):
+        model = RandomForestClassifier(
+            n_estimators=200,  # 增加树的数量
+            max_depth=10,      # 限制树的深度
+            min_samples_split=2,
+            min_samples_leaf=1,
+            class_weight='balanced',  # 处理类别不平衡
+            random_state=random_state,
+            n_jobs=n_jobs
+        )
+        model.fit(X, y)
+        # 并行度不影响拟合结果；恢复默认值，使保存的模型与核数无关
+        model.set_params(n_jobs=None)
+
+    # 保存模型和特征列名（用于预测时对齐特征）
+    with stage(timings, 'save'):
+        joblib.dump(model, os.path.join(output_dir, 'mutation_model.pkl'))
+        joblib.dump(feature_columns, os.path.join(output_dir, 'feature_columns.pkl'))
+
+    # 可选：导出全量分数表和数组形式的森林
+    if score_table:
+        with stage(timings, 'score_table'):
+            export_score_table(model, feature_columns, output_dir)
+    if export_forest:
+        with stage(timings, 'compile_forest'):
+            export_compiled_forest(model, output_dir)
+
+    # 训练记录：数据和模型哈希、参数、各阶段耗时，便于复现
+    with open(os.path.join(output_dir, 'training_manifest.json'), 'w') as f:
+        json.dump({
+            'data_path': os.path.abspath(data_path),
+            'data_sha256': file_sha256(data_path),
+            'rows': int(total_rows),
+            'rows_used': int(len(y)),
+            'feature_columns': feature_columns,
+            'random_state': random_state,
+            'n_jobs': n_jobs,
+            'sklearn_version': sklearn_version,
+            'model_sha256': file_sha256(os.path.join(output_dir, 'mutation_model.pkl')),
+            'timings': timings,
+        }, f, indent=2)
+
+    return model, feature_columns
 
 if __name__ == '__main__':
-    train_model() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Train the mutation impact model')
+    parser.add_argument('--score-table', action='store_true',
+                        help='also export models/score_table.npy for constant-time lookup')
+    parser.add_argument('--compile-forest', action='store_true',
+                        help='also export models/forest.npz for sklearn-free serving')
+    parser.add_argument('--output-dir', default='models',
+                        help='model directory, e.g. models/versions/<version> for the serving registry')
+    parser.add_argument('--export-only', action='store_true',
+                        help='skip training and export the requested artefacts for the saved model')
+    parser.add_argument('--data', default='training_data.csv', help='training CSV with mutation,label columns')
+    parser.add_argument('--jobs', type=int, default=-1, help='CPU cores for tree fitting (-1 = all)')
+    parser.add_argument('--seed', type=int, default=42, help='random_state of the forest')
+    parser.add_argument('--chunksize', type=int, default=TRAIN_CHUNK_SIZE, help='CSV rows read per chunk')
+    args = parser.parse_args()
+    if args.export_only:
+        import joblib
+        model = joblib.load(os.path.join(args.output_dir, 'mutation_model.pkl'))
+        if args.score_table:
+            export_score_table(model, joblib.load(os.path.join(args.output_dir, 'feature_columns.pkl')), args.output_dir)
+        if args.compile_forest:
+            export_compiled_forest(model, args.output_dir)
+    else:
+        train_model(score_table=args.score_table, export_forest=args.compile_forest, output_dir=args.output_dir,
+                    data_path=args.data, n_jobs=args.jobs, random_state=args.seed, chunksize=args.chunksize) 
\ No newline at end of file
@@ -0,0 +1,148 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from fastapi.testclient import TestClient
+
+import main
+
+client = TestClient(main.app)
+
+
+def test_variant_batch_is_deterministic_and_shared():
+    payload = {
+        "analysis_type": "variant",
+        "data": [
+            {"sequence_id": "a", "mutations": ["S:D614G", "S:A222V", "N:R203K"], "location": "Wuhan", "date": "2020-01-01"},
+            {"sequence_id": "b", "mutations": ["S:A222V", "N:R203K"], "location": "London", "date": "2021-03-15"},
+        ]
+    }
+    first = client.post('/analyze/variants', json=payload).json()['results']
+    second = client.post('/analyze/variants', json=payload).json()['results']
+    summaries = lambda results: [r['variant_summary'] for r in results]
+    assert summaries(first) == summaries(second)
+    # 同一突变在不同样本中的结果一致
+    assert first[0]['variant_summary'][1] == first[1]['variant_summary'][0]
+    assert first[0]['transmission_network'] == first[1]['transmission_network']
+    assert first[1]['risk_assessment'] == main.generate_risk_assessment(["S:A222V", "N:R203K"])
+
+
+def test_vectorized_sir_matches_transmission_loop():
+    from simulation.compartmental import run_compartmental
+    betas, gammas = [0.3, 0.5, 0.2], [0.1, 0.25, 0.0]
+    result = run_compartmental('SIR', betas, gammas, 10000, 10, 60)
+    for i, (beta, gamma) in enumerate(zip(betas, gammas)):
+        expected = main.simulate_transmission(10, beta, gamma, 60)
+        assert result['peak_day'][i] == expected['peak_day']
+        assert int(result['peak_cases'][i]) == expected['peak_cases']
+        assert abs(result['final_size'][i] - expected['total_infections']) <= 1
+
+
+def test_transmission_sweep_grid():
+    body = client.post('/analyze/transmission/sweep', json={
+        "model": "SEIR", "beta": [0.2, 0.4], "gamma": [0.1, 0.2, 0.3], "sigma": 0.2, "days": 90
+    }).json()
+    assert body['count'] == 6
+    assert {row['R0'] for row in body['results']} == {2.0, 1.0, 0.6667, 4.0, 1.3333}
+    assert client.post('/analyze/transmission/sweep', json={"beta": list(range(1000)), "gamma": list(range(1000))}).status_code == 400
+
+
+def test_stochastic_ensemble_is_reproducible_across_workers():
+    from concurrent.futures import ThreadPoolExecutor
+    from simulation import stochastic
+    args = dict(model='SIR', beta=0.3, gamma=0.1, population=5000, initial_cases=10, days=40, seed=7)
+    serial = stochastic.run_ensemble(realizations=stochastic.TASK_REALIZATIONS + 500, **args)
+    with ThreadPoolExecutor(2) as executor:
+        pooled = stochastic.run_ensemble(realizations=stochastic.TASK_REALIZATIONS + 500, executor=executor, **args)
+    assert serial == pooled
+    envelope = serial['envelope']
+    assert all(lo <= mid <= hi for lo, mid, hi in zip(envelope['p5'], envelope['p50'], envelope['p95']))
+    assert serial['realizations'] == stochastic.TASK_REALIZATIONS + 500
+
+
+def test_metapopulation_couples_regions_through_flows():
+    from simulation.metapopulation import MobilityNetwork, run_metapopulation
+    network = MobilityNetwork.from_records(
+        [{"name": "A", "population": 1000}, {"name": "B", "population": 5000}, {"name": "C", "population": 2000}],
+        [{"source": "A", "target": "B", "flow": 10}]
+    )
+    assert network.edge_count == 1
+    cases, unmatched = network.seed_cases(["a", "Z"])
+    assert cases.tolist() == [1, 0, 0] and unmatched == ["Z"]
+    result = run_metapopulation(network, cases, beta=0.5, sigma=0.3, gamma=0.1, days=120, curve_regions=[1])
+    # B 只通过来访者被感染，C 没有任何连接
+    assert result['attack_rate'][0] > result['attack_rate'][1] > 0 == result['attack_rate'][2]
+    assert result['curves'].shape == (120, 1, 3)
+    body = client.post('/analyze/transmission/metapopulation', json={
+        "samples": [{"location": "Wuhan"}, {"location": "London"}], "curves": ["london"], "limit": 1
+    }).json()
+    assert body['region_count'] == 2 and len(body['regions']) == 1 and list(body['curves']) == ['London']
+
+
+def test_variant_stream_matches_batch():
+    import json
+    payload = {
+        "analysis_type": "variant",
+        "data": [
+            {"sequence_id": f"s{i}", "mutations": ["S:D614G", f"S:N{i}Y"], "location": "Wuhan", "date": "2020-01-01"}
+            for i in range(20)
+        ]
+    }
+    batch = client.post('/analyze/variants', json=payload).json()['results']
+    response = client.post('/analyze/variants?stream=true', json=payload)
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    assert [json.loads(line) for line in response.text.splitlines()] == batch
+
+
+def test_health_reports_liveness_and_readiness():
+    from routers.ai_predict import registry
+    # 进入上下文会执行 lifespan，在后台开始加载模型
+    with TestClient(main.app) as started:
+        assert started.get('/health/live').json() == {"status": "healthy"}
+        assert started.get('/health').json()['status'] == 'healthy'
+        registry.wait_active(60)
+        ready = started.get('/health/ready')
+        assert ready.status_code == 200
+        assert ready.json()['checks']['model']['status'] == 'loaded'
+
+
+def test_import_does_not_load_training_stack():
+    # 启动预算：导入 main 不应引入 sklearn / pandas / networkx，也不应在导入时加载模型
+    import subprocess
+    code = ("import sys, main; "
+            "print(sorted(m for m in ('sklearn', 'pandas', 'networkx', 'joblib') if m in sys.modules), "
+            "main.model_registry.active)")
+    output = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(main.__file__),
+                            capture_output=True, text=True, check=True).stdout
+    assert output.strip() == '[] None'
+
+
+def test_transmission_rejects_invalid_population():
+    for body in ({"population": 0}, {"population": [10000, -5]}, {"initial_cases": 20000},
+                 {"population": 100, "initial_cases": [10, 101]}, {"initial_cases": -1}):
+        response = client.post('/analyze/transmission/sweep', json=body)
+        assert response.status_code == 400, body
+        if not any(isinstance(value, list) for value in body.values()):
+            assert client.post('/analyze/transmission/ensemble', json={**body, "realizations": 10}).status_code == 400, body
+    assert client.post('/analyze/transmission/sweep', json={"population": 100, "initial_cases": [0, 100]}).json()['count'] == 2
+    assert client.post('/analyze/transmission/metapopulation', json={"initial_cases": {"Wuhan": -3}}).status_code == 400
+
+
+def test_sweep_step_size_must_divide_a_day_and_counts_toward_the_limit():
+    from simulation.compartmental import steps_per_day
+    assert [steps_per_day(dt) for dt in (1, 0.5, 0.25, 0.1, 0.01)] == [1, 2, 4, 10, 100]
+    for dt in (1e-9, 0.3, 0, 1.5):
+        assert client.post('/analyze/transmission/sweep', json={"dt": dt}).status_code == 400, dt
+    assert client.post('/analyze/transmission/sweep', json={"dt": 0.25, "days": 10}).json()['dt'] == 0.25
+    body = {"beta": [0.1 + i / 1000 for i in range(1000)], "gamma": [0.1] * 100, "days": 3650, "dt": 0.5}
+    response = client.post('/analyze/transmission/sweep', json=body)
+    assert response.status_code == 400 and '每天步数' in response.json()['detail']
+
+
+def test_transmission_rejects_non_numeric_parameters():
+    for path, body in (('sweep', {"days": "abc"}), ('sweep', {"dt": "x"}), ('sweep', {"beta": [0.1, "x"]}),
+                       ('ensemble', {"realizations": "many"}), ('ensemble', {"population": None}),
+                       ('ensemble', {"beta": "high"}), ('metapopulation', {"days": "x", "initial_cases": {"Wuhan": 1}}),
+                       ('metapopulation', {"limit": [], "initial_cases": {"Wuhan": 1}})):
+        assert client.post(f'/analyze/transmission/{path}', json=body).status_code == 400, (path, body)
@@ -0,0 +1,123 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from routers.ai_predict import predict_with_model, predict_batch_with_model
+
+
+def test_batch_matches_per_row():
+    # 批量路径必须与逐条预测结果完全一致（包括无法提取特征时的规则回退）
+    mutations = [
+        'S:D614G', 'S:E484K', 'S:N501Y', 'S:Y145D', 'S:A222V',
+        'N:R203K', 'ORF1a:T265I', 'S:D6a14G', 'S:X614G', 'bad', 'S:'
+    ]
+    expected = [predict_with_model(m) for m in mutations]
+    assert predict_batch_with_model(mutations) == expected
+
+
+def test_batch_empty():
+    assert predict_batch_with_model([]) == []
+
+
+def test_score_table_matches_model(tmp_path):
+    import shutil
+    from ml_models.train_model import export_score_table
+    from inference.score_table import ScoreTable
+    from inference.registry import MODEL_FILE
+    from routers.ai_predict import registry
+    active = registry.wait_active()
+    model, feature_columns = active.model, active.feature_columns
+    model_path = os.path.join(active.path, MODEL_FILE)
+
+    shutil.copy(model_path, tmp_path / 'mutation_model.pkl')
+    export_score_table(model, feature_columns, str(tmp_path), max_position=60)
+    table = ScoreTable.load(str(tmp_path), str(tmp_path / 'mutation_model.pkl'))
+    assert table is not None
+
+    mutations = ['S:D14G', 'N:R60K', 'S:Y0D', 'S:D614G', 'bad']
+    scores = table.lookup(mutations)
+    expected = [predict_with_model(m)['ai_score'] for m in mutations[:3]]
+    assert list(scores[:3]) == expected
+    # 超出表范围或无法解析的突变不命中
+    assert all(s != s for s in scores[3:])
+
+
+def test_compiled_forest_matches_sklearn(tmp_path):
+    import shutil
+    import joblib
+    import numpy as np
+    import pandas as pd
+    from ml_models.train_model import export_compiled_forest
+    from inference.forest_evaluator import ForestEvaluator
+    from inference.registry import MODEL_FILE
+    from routers.ai_predict import registry
+    active = registry.wait_active()
+    batch_predictor, feature_columns = active.batch_predictor, active.feature_columns
+    model_path = os.path.join(active.path, MODEL_FILE)
+
+    sklearn_model = joblib.load(model_path)
+    shutil.copy(model_path, tmp_path / 'mutation_model.pkl')
+    export_compiled_forest(sklearn_model, str(tmp_path))
+    forest = ForestEvaluator.load(str(tmp_path / 'forest.npz'))
+
+    X, _ = batch_predictor.encode([f'S:D{pos}G' for pos in range(1, 1300, 7)] + ['N:R203K', 'S:Y145W'])
+    expected = sklearn_model.predict_proba(pd.DataFrame(X, columns=feature_columns))
+    assert np.array_equal(forest.predict_proba(X), expected)
+
+
+def test_vectorized_training_features_match_per_row(tmp_path):
+    import numpy as np
+    import pandas as pd
+    from ml_models.train_model import extract_features, load_training_data, training_feature_columns, encode_features
+    mutations = ['S:D614G', 'N:R203K', 'ORF1ab:P4715L', 'S:D614', 'bad', 'S:Z12G', 'S:A1:B', 'S:N501Y', 'N:G204R']
+    data = pd.DataFrame({'mutation': mutations, 'label': [i % 2 for i in range(len(mutations))]})
+    data.to_csv(tmp_path / 'train.csv', index=False)
+
+    rows = [(extract_features(m), label) for m, label in zip(data['mutation'], data['label'])]
+    expected = pd.get_dummies(pd.DataFrame([f for f, _ in rows if f is not None]))
+
+    genes, positions, ref_idx, alt_idx, labels, total = load_training_data(str(tmp_path / 'train.csv'), chunksize=4)
+    columns = training_feature_columns(genes, ref_idx, alt_idx)
+    X = encode_features(genes, positions, ref_idx, alt_idx, columns)
+    assert total == len(mutations)
+    assert columns == list(expected.columns)
+    assert list(labels) == [label for f, label in rows if f is not None]
+    assert np.array_equal(X, expected.to_numpy(dtype=np.float32))
+
+
+def test_registry_hot_swaps_new_version(tmp_path):
+    import shutil
+    from inference.registry import ModelRegistry, MODEL_FILE, FEATURE_COLUMNS_FILE
+    from routers.ai_predict import registry
+
+    source = registry.wait_active().path
+    for version in ('20260101', '20260201'):
+        target = tmp_path / 'versions' / version
+        target.mkdir(parents=True)
+        for name in (MODEL_FILE, FEATURE_COLUMNS_FILE):
+            shutil.copy(os.path.join(source, name), target / name)
+
+    local = ModelRegistry(str(tmp_path))
+    assert list(local.versions()) == ['20260101', '20260201']
+    previous = local.load('20260101')
+    assert local.load().version == '20260201'
+    assert local.active is not previous
+    assert local.status()['active']['warmup_seconds'] is not None
+
+
+def test_shared_model_is_memory_mapped(tmp_path):
+    import numpy as np
+    from inference.registry import load_model_dir
+    from inference.shared_model import MANIFEST_FILE
+    from routers.ai_predict import registry
+    active = registry.wait_active()
+    mutations = [f'S:D{pos}G' for pos in range(1, 1300, 13)] + ['N:R203K', 'bad']
+
+    first = load_model_dir(active.version, active.path, shared_root=str(tmp_path))
+    assert os.path.exists(os.path.join(first.shared_dir, MANIFEST_FILE))
+    second = load_model_dir(active.version, active.path, shared_root=str(tmp_path))
+    assert isinstance(second.model.feature, np.memmap) and not second.model.feature.flags.writeable
+    expected = active.predict_scores(mutations)
+    for loaded in (first, second):
+        assert np.array_equal(loaded.predict_scores(mutations), expected, equal_nan=True)
@@ -0,0 +1,38 @@
+import os
+import sys
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(SRC_DIR, 'backend'))
+sys.path.insert(0, os.path.join(SRC_DIR, 'benchmarks'))
+
+from generators import csv_text, fasta_text, random_mutations, vcf_text
+from suite import compare
+from data_processing.fasta_vcf_parser import parse_csv, parse_fasta, parse_vcf
+
+
+def test_generators_are_deterministic_and_parseable():
+    assert random_mutations(50, seed=3) == random_mutations(50, seed=3)
+    assert len(parse_fasta(fasta_text(3, length=500))) == 3
+    assert len(parse_vcf(vcf_text(40, samples=3))) == 40
+    assert len(parse_csv(csv_text(25))) == 25
+
+    reference = 'ACGT' * 100
+    genome = parse_fasta(fasta_text(1, reference=reference, snps=5))[0]['sequence']
+    assert len(genome) == len(reference)
+    assert 0 < sum(a != b for a, b in zip(genome, reference)) <= 5
+
+
+def test_compare_flags_regressions_by_direction():
+    baseline = {
+        'parse_vcf': {'per_s': 1000.0, 'ms': 10.0},
+        'POST /ai_predict': {'rps': 100.0, 'p95_ms': 50.0, 'errors': 0},
+        'not_run': {'per_s': 1.0},
+    }
+    current = {
+        'parse_vcf': {'per_s': 900.0, 'ms': 11.0},
+        'POST /ai_predict': {'rps': 60.0, 'p95_ms': 80.0, 'errors': 2},
+    }
+    regressions = compare(current, baseline, threshold=0.25)
+    assert len(regressions) == 3
+    assert all(line.startswith('POST /ai_predict') for line in regressions)
+    assert compare(current, baseline, threshold=0.7) == ['POST /ai_predict errors: 0.0 -> 2.0 (new)']
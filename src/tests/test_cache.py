@@ -0,0 +1,51 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from cache.result_cache import ResultCache, cache_key
+
+
+def test_key_is_canonical():
+    assert cache_key('t', {'beta': 0.3, 'days': 30.0}) == cache_key('t', {'days': 30, 'beta': 0.3})
+    assert cache_key('t', {'days': 30}) != cache_key('t', {'days': 30}, version='v2')
+    assert cache_key('t', ['S:D614G', 'N:R203K']) != cache_key('t', ['N:R203K', 'S:D614G'])
+
+
+def test_lru_ttl_and_disk_tier(tmp_path):
+    cache = ResultCache(max_entries=2, ttl=0.3, directory=str(tmp_path))
+    for name in ('a', 'b', 'c'):
+        cache.get_or_compute('t', name, lambda: name.upper())
+    assert cache.stats()['entries'] == 2 and cache.stats()['evictions'] == 1
+    # 另一个进程（实例）从磁盘层读到结果
+    other = ResultCache(directory=str(tmp_path))
+    assert other.get_or_compute('t', 'a', lambda: 'recomputed') == 'A'
+    assert other.stats()['disk_hits'] == 1
+    time.sleep(0.35)
+    assert cache.get_or_compute('t', 'b', lambda: 'fresh') == 'fresh'
+
+
+def test_concurrent_identical_requests_compute_once():
+    cache = ResultCache()
+    calls = []
+    started = threading.Event()
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return {'value': 42}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('t', {'x': 1}, slow)))
+               for _ in range(5)]
+    threads[0].start()
+    started.wait(1)
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and results == [{'value': 42}] * 5
+    assert cache.stats()['inflight_waits'] == 4
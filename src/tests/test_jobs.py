@@ -0,0 +1,145 @@
+import os
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from jobs.queue import CANCELLED, SUCCEEDED, JobQueue
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id, include_result=True)
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_priority_order_cancellation_and_expiry(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), workers=1, result_ttl=0.5)
+    release = threading.Event()
+    order = []
+
+    def blocking(payload, ctx):
+        release.wait(5)
+        return 'done'
+
+    def record(payload, ctx):
+        order.append(payload['name'])
+        ctx.progress(1)
+        return payload['name']
+
+    queue.register('block', blocking)
+    queue.register('record', record)
+    first = queue.submit('block', {})
+    low = queue.submit('record', {'name': 'low'}, priority=0)
+    high = queue.submit('record', {'name': 'high'}, priority=10)
+    dropped = queue.submit('record', {'name': 'dropped'}, priority=5)
+    assert queue.cancel(dropped) == CANCELLED
+    release.set()
+
+    assert wait_for(queue, first)['result'] == 'done'
+    assert wait_for(queue, low)['status'] == SUCCEEDED
+    assert wait_for(queue, high)['result'] == 'high'
+    assert order == ['high', 'low']
+    time.sleep(0.6)
+    assert queue.get(low) is None
+    assert queue.purge_expired() == 4
+    queue.stop(timeout=2)
+
+
+def test_file_jobs_only_accept_spooled_uploads(tmp_path):
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    target = tmp_path / 'x.csv'
+    target.write_text('a,b\n1,2\n')
+    payload = {"files": [{"path": str(target), "filename": "x.csv"}]}
+    response = client.post('/jobs', json={"kind": "upload", "payload": payload})
+    assert response.status_code == 400 and 'upload' not in response.json()['detail'].split('可用类型')[1]
+    # 即使 payload 绕过接口进入队列，处理函数和清理函数也拒绝暂存目录外的路径
+    try:
+        main.run_upload_job(payload, None)
+        raise AssertionError("path outside the spool directory was accepted")
+    except ValueError:
+        pass
+    try:
+        main.remove_spooled_files(payload)
+    except ValueError:
+        pass
+    assert target.read_text() == 'a,b\n1,2\n'
+
+    spooled_before = set(os.listdir(main.JOB_SPOOL_DIR))
+    job_id = client.post('/jobs/upload', files=[('files', ('y.csv', b'sequence_id,mutation\ns1,S:D614G\n'))]).json()['job_id']
+    job = wait_for(main.job_queue, job_id)
+    assert job['result']['results'][0]['status'] == 'success'
+    assert set(os.listdir(main.JOB_SPOOL_DIR)) == spooled_before
+
+
+def test_lifespan_resumes_jobs_left_by_a_previous_process():
+    import json
+    import sqlite3
+    import subprocess
+    from fastapi.testclient import TestClient
+    import main
+
+    main.job_queue.stop(timeout=2)
+    dead_pid = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead_pid.wait()
+    payload = json.dumps({'initial_cases': 5, 'days': 10})
+    queued, running, reused = (f'resume-{uuid.uuid4().hex}' for _ in range(3))
+    with sqlite3.connect(main.job_queue.path) as conn:
+        conn.executemany(
+            "INSERT INTO jobs (id, kind, status, payload, worker_pid, worker_token, created_at) "
+            "VALUES (?, 'transmission', ?, ?, ?, ?, ?)",
+            [(queued, 'queued', payload, None, None, time.time()),
+             (running, 'running', payload, dead_pid.pid, f'{dead_pid.pid}:1', time.time()),
+             # 旧进程的 PID 已被当前进程复用（例如容器重启后都是 PID 1）
+             (reused, 'running', payload, os.getpid(), f'{os.getpid()}:0', time.time())]
+        )
+
+    with TestClient(main.app):
+        for job_id in (queued, running, reused):
+            assert wait_for(main.job_queue, job_id)['status'] == SUCCEEDED
+    assert not main.job_queue._threads
+
+
+def test_running_simulation_jobs_report_progress_and_stop_when_cancelled():
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    sweep = {"beta": [0.1 + i / 1000 for i in range(100)], "gamma": [0.05 + i / 10000 for i in range(1000)], "days": 3650}
+    job_id = client.post('/jobs', json={"kind": "transmission_sweep", "payload": sweep}).json()['job_id']
+    deadline = time.time() + 10
+    while client.get(f'/jobs/{job_id}').json()['progress'] == 0:
+        assert time.time() < deadline
+        time.sleep(0.05)
+    assert client.delete(f'/jobs/{job_id}').json()['job_status'] == 'running'
+    job = wait_for(main.job_queue, job_id, timeout=2)
+    assert job['status'] == CANCELLED and 0 < job['progress'] < 1
+
+    samples = [{"sequence_id": f"s{i}", "mutations": ["S:D614G"], "location": "Wuhan", "date": "2020-03-01"} for i in range(3)]
+    job_id = client.post('/jobs', json={"kind": "analyze_variants", "payload": {"analysis_type": "variant", "data": samples}}).json()['job_id']
+    job = wait_for(main.job_queue, job_id)
+    assert job['progress'] == 1 and len(job['result']['results']) == 3
+
+
+def test_jobs_claimed_by_a_live_process_are_not_requeued(tmp_path):
+    from jobs.queue import RUNNING, own_token
+
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), workers=1)
+    queue.register('noop', lambda payload, ctx: None)
+    queue._execute(
+        "INSERT INTO jobs (id, kind, status, payload, worker_pid, worker_token, created_at) VALUES ('live', 'noop', ?, '{}', ?, ?, ?)",
+        (RUNNING, os.getpid(), own_token(os.getpid()), time.time())
+    )
+    queue.start()
+    time.sleep(0.2)
+    assert queue.get('live')['status'] == RUNNING
+    queue.stop(timeout=2)
@@ -0,0 +1,48 @@
+import os
+import sys
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(SRC_DIR, 'backend'))
+sys.path.insert(0, os.path.join(SRC_DIR, 'benchmarks'))
+
+from generators import lineage_samples, lineage_table
+from data_processing.lineage_classifier import DEFAULT_TABLE, LineageClassifier, read_lineage_table
+
+
+def test_assignment_matches_brute_force_jaccard():
+    table = lineage_table(300, root_mutations=10, seed=1)
+    samples = lineage_samples(table, 400, dropout=0.2, seed=2) + [[], ['X:A1B'], table[0][2][:1]]
+    classifier = LineageClassifier(table)
+    lineages, scores = classifier.assign(samples)
+
+    definitions = [set(mutations) for _, _, mutations in table]
+    for sample, lineage, score in zip(samples, lineages, scores):
+        known = set(sample) & set(classifier.vocabulary)
+        jaccard = [len(known & d) / len(known | d) for d in definitions]
+        assert abs(score - max(jaccard)) < 1e-6
+        assert lineage == -1 if not known else abs(jaccard[lineage] - score) < 1e-6
+
+
+def test_variant_analysis_fills_variant_type():
+    from fastapi.testclient import TestClient
+    import main
+
+    table = {name: mutations for name, _, mutations in read_lineage_table(DEFAULT_TABLE)}
+    ba5 = [m for m in table['BA.5'] if m not in ('S:T19I', 'N:S413R')] + ['S:A222V']
+    delta = table['B.1.617.2'][:-2]
+    results = LineageClassifier.from_file(DEFAULT_TABLE).classify([ba5, delta, ['S:D614G', 'S:E484K']])
+    assert [r and (r['lineage'], r['label']) for r in results] == [('BA.5', 'Omicron'), ('B.1.617.2', 'Delta'), None]
+
+    samples = [
+        {"sequence_id": "a", "mutations": ba5, "location": "Beijing", "date": "2022-07-01"},
+        {"sequence_id": "b", "mutations": delta, "location": "Beijing", "date": "2021-08-01", "variant_type": "custom"},
+        {"sequence_id": "c", "mutations": ["S:E484K"], "location": "Wuhan", "date": "2020-05-01"},
+    ]
+    client = TestClient(main.app)
+    response = client.post('/analyze/variants', json={"analysis_type": "variant", "data": samples}).json()
+    assert [r['variant_type'] for r in response['results']] == ['BA.5', 'custom', None]
+    assert response['results'][1]['lineage']['lineage'] == 'B.1.617.2'
+
+    classified = client.post('/lineages/classify', json=[ba5, ["S:D614G"]], params={'min_score': 0.1}).json()
+    assert [r['lineage'] for r in classified['results']] == ['BA.5', 'B.1']
+    assert client.get('/lineages').json()['count'] == len(table)
@@ -0,0 +1,62 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from metrics.registry import MetricsRegistry
+
+
+def test_exposition_format():
+    registry = MetricsRegistry()
+    latency = registry.histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+    hits = registry.counter('hits_total', 'Hits', ('name',))
+    latency.observe(0.05, route='/a')
+    latency.observe(0.1, route='/a')
+    latency.observe(3.0, route='/a')
+    hits.inc(name='say "hi"\n')
+    hits.inc(2, name='say "hi"\n')
+
+    lines = registry.render().splitlines()
+    assert '# TYPE latency_seconds histogram' in lines
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+    assert 'hits_total{name="say \\"hi\\"\\n"} 3' in lines
+    assert latency.count(route='/a') == 3
+
+
+def test_metrics_endpoint_counts_routes_and_predictions():
+    from fastapi.testclient import TestClient
+    from main import app
+    from metrics.registry import HTTP_REQUEST_SECONDS, PREDICT_RESULTS, PREDICT_FALLBACKS
+    client = TestClient(app)
+    before = HTTP_REQUEST_SECONDS.count(method='POST', route='/ai_predict', status=200)
+    predicted = PREDICT_RESULTS.value(method='ML Model') + PREDICT_RESULTS.value(method='Rule-based')
+    fallbacks = PREDICT_FALLBACKS.value(reason='invalid_mutation')
+
+    # 带随机成分的请求体，避免命中其他测试留下的缓存
+    mutations = ['S:N501Y', 'S:E484K', f'not-a-mutation-{os.getpid()}']
+    assert client.post('/ai_predict', json=mutations).status_code == 200
+
+    assert HTTP_REQUEST_SECONDS.count(method='POST', route='/ai_predict', status=200) == before + 1
+    assert PREDICT_RESULTS.value(method='ML Model') + PREDICT_RESULTS.value(method='Rule-based') == predicted + 3
+    assert PREDICT_FALLBACKS.value(reason='invalid_mutation') == fallbacks + 1
+    response = client.get('/metrics')
+    assert response.headers['content-type'].startswith('text/plain')
+    assert 'http_request_duration_seconds_bucket{method="POST",route="/ai_predict",status="200",le="+Inf"}' in response.text
+    assert 'ai_predict_stage_seconds_count{path="batch",stage="encode"}' in response.text
+
+
+def test_profile_header(monkeypatch):
+    from fastapi.testclient import TestClient
+    from main import app
+    import metrics.middleware
+    client = TestClient(app)
+    assert 'x-profile-id' not in client.get('/health', headers={'X-Profile': '1'}).headers
+
+    monkeypatch.setattr(metrics.middleware, 'PROFILE_REQUESTS', True)
+    response = client.post('/analyze/transmission', json={'days': 3000, 'beta': 0.31}, headers={'X-Profile': '1'})
+    profile = client.get(f"/debug/profiles/{response.headers['x-profile-id']}")
+    assert profile.status_code == 200
+    assert profile.text.startswith('# POST /analyze/transmission')
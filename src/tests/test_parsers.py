@@ -0,0 +1,181 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from data_processing.fasta_vcf_parser import parse_fasta, iter_fasta
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'tests')
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_iter_fasta_matches_parse_fasta():
+    with open(os.path.join(EXAMPLE_DIR, 'example.fasta'), 'rb') as f:
+        data = f.read()
+    # 覆盖 CRLF、空行以及跨块边界的多字节字符
+    data += '\r\n>seq3 描述\r\nACGT\r\n\r\nNNAC'.encode('utf-8')
+    expected = parse_fasta(data.decode('utf-8'))
+    for size in (1, 2, 5, 64, len(data)):
+        assert list(iter_fasta(chunked(data, size))) == expected
+
+
+def test_vcf_columns_multi_sample():
+    from data_processing.fasta_vcf_parser import parse_vcf_columns, parse_vcf
+
+    vcf = (
+        '##fileformat=VCFv4.2\n'
+        '#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tA\tB\n'
+        'MN908947.3\t23403\t.\tA\tG\t.\tPASS\tDP=10;ANN=G|missense_variant|MODERATE|S|GU280_gp02|transcript|'
+        'QHD43416.1|protein_coding|1/1|c.1841A>G|p.Asp614Gly|1841/3822|1841/3822|614/1273||\tGT\t1\t0\n'
+        'MN908947.3\t28881\t.\tG\tA\t.\tPASS\tBCSQ=missense|N|QHD43423.2|protein_coding|+|203R>203K|28881G>A'
+        '\tGT:DP\t0/1:5\t./.:3\n'
+        'MN908947.3\t23063\t.\tA\tT\t.\tPASS\tGENE=S;AA=N501Y\tGT\t.\t1\n'
+        'MN908947.3\t3037\t.\tC\tT\t.\tPASS\t.\tGT\t1\t1\n'
+    ).encode()
+    columns = parse_vcf_columns(chunked(vcf, 7), info_keys=['DP'], mutations=True, genotypes=True)
+
+    assert len(columns) == len(parse_vcf(vcf.decode()))
+    assert columns.pos.tolist() == [23403, 28881, 23063, 3037]
+    assert columns.chrom_categories == ['MN908947.3']
+    assert columns.info['DP'].tolist() == ['10', '', '', '']
+    assert columns.mutation_list() == ['S:D614G', 'N:R203K', 'S:N501Y']
+    assert columns.sample_mutations() == {'A': ['S:D614G', 'N:R203K'], 'B': ['S:N501Y']}
+
+
+def test_upload_summary_reads_bgzf_members():
+    import gzip
+    import io
+    from data_processing.upload_processing import summarize_upload
+
+    fasta = ''.join(f'>g{i}\n' + 'ACGT' * 50 + '\n' for i in range(250)).encode()
+    # BGZF：多个独立的 gzip 成员首尾相接
+    bgzf = b''.join(gzip.compress(fasta[i:i + 4096]) for i in range(0, len(fasta), 4096))
+    result = summarize_upload(io.BytesIO(bgzf), 'genomes.fa.gz')
+    assert result['filetype'] == 'FASTA'
+    assert result['count'] == 250
+    assert len(result['records']) == 100
+    assert result['records'][-1] == {'id': 'g99', 'sequence': 'ACGT' * 50}
+
+
+def test_mutation_caller_across_indels():
+    from data_processing.mutation_caller import MutationCaller, read_reference
+
+    genome = bytearray(read_reference())
+    genome[23403 - 1] = ord('G')            # S:D614G
+    genome[28881 - 1:28884 - 1] = b'AAC'    # N:R203K + N:G204R
+    genome[14408 - 1] = ord('T')            # ORF1b:P314L
+    genome[11000:11000] = b'ACGTAC'         # ORF1a 插入
+    del genome[21765:21774]                 # S 缺失
+    query = b'N' * 50 + bytes(genome[30:-40])
+
+    result = MutationCaller().call(query)
+    assert result['mutations'] == ['ORF1b:P314L', 'S:D614G', 'N:R203K', 'N:G204R']
+    assert 'A23403G' in result['nucleotide_substitutions']
+
+
+def test_stored_upload_pages_through_every_record(tmp_path):
+    import io
+    from data_processing.result_store import UploadStore
+    from data_processing.upload_processing import summarize_upload_stored
+
+    fasta = ''.join(f'>seq{i}\nACGT\n' for i in range(250)).encode()
+    store = UploadStore(str(tmp_path))
+    upload_id, records_path = store.create()
+    summary = summarize_upload_stored(io.BytesIO(fasta), 'many.fasta', records_path)
+    assert store.finish(upload_id, summary)['count'] == 250 and len(summary['records']) == 100
+
+    ids, cursor = [], None
+    while True:
+        records, cursor = store.page(upload_id, cursor, limit=64)
+        ids.extend(record['id'] for record in records)
+        if cursor is None:
+            break
+    assert ids == [f'seq{i}' for i in range(250)]
+    streamed = b''.join(store.iter_ndjson(upload_id)).decode().splitlines()
+    assert len(streamed) == 250
+    try:
+        store.page(upload_id, '3')
+        assert False, "cursor inside a line must be rejected"
+    except ValueError:
+        pass
+
+
+def test_annotation_store_lookups(tmp_path):
+    from data_processing.annotation_store import AnnotationStore
+
+    store = AnnotationStore(str(tmp_path / 'annotations.sqlite3'))
+    assert store.count() == 5
+    store.bulk_import(
+        {'gene': 'S', 'position': pos, 'ref': 'A', 'alt': 'V', 'impact': 'Low', 'frequency': ''}
+        for pos in range(300, 600)
+    )
+    store.bulk_import([{'mutation': 'N:R203K', 'impact': 'Medium', 'frequency': 0.4}])
+    assert store.get('S:D614G')['impact'] == 'High'
+    assert store.get('S:X614G') is None and store.get('S:D614A') is None
+    rbd = store.range('S', 319, 541)
+    assert len(rbd) == 223 + 3 and [a['position'] for a in rbd] == sorted(a['position'] for a in rbd)
+    assert [a['mutation'] for a in store.range('S', 319, 541, impact='High')] == ['S:E484K', 'S:N501Y']
+    found = store.lookup_many(['S:N501Y', 'N:R203K', 'S:A1V', 'bad', 'S:N501Y', 'S:Y501Y', 's:N501Y'])
+    assert set(found) == {'S:N501Y', 'N:R203K'} and found['N:R203K']['frequency'] == 0.4
+
+
+def test_fasta_index_random_access(tmp_path):
+    from data_processing.fasta_vcf_parser import FastaIndexer, FastaIndex, write_fai
+
+    records = [('a', 'ACGTACGTAC' * 13 + 'A'), ('b', ''), ('c', 'nnACGT'), ('d', 'T' * 60)]
+    for newline, trailing in (('\n', True), ('\r\n', False)):
+        text = newline.join(
+            f'>{name} description' + ''.join(newline + seq[i:i + 60] for i in range(0, len(seq), 60))
+            for name, seq in records
+        ) + (newline if trailing else '')
+        data = text.encode()
+        for size in (1, 5, 64, len(data)):
+            indexer = FastaIndexer()
+            for chunk in chunked(data, size):
+                indexer.feed(chunk)
+            path = str(tmp_path / 'x.fa')
+            with open(path, 'wb') as f:
+                f.write(data)
+            write_fai(indexer.close(), path + '.fai')
+            index = FastaIndex(path)
+            for name, seq in records:
+                assert index.fetch(name) == seq.encode()
+                for start in (0, 1, 59, 60, 61):
+                    for end in (start + 1, start + 60, len(seq)):
+                        assert index.fetch(name, start, end) == seq[start:end].encode()
+            index.close()
+    assert open(path + '.fai').read().splitlines()[0] == 'a\t131\t16\t60\t62'
+
+    indexer = FastaIndexer()
+    try:
+        indexer.feed(b'>a\nACGT\nAC\nACGT\n')
+        assert False, "a short line in the middle of a record must be rejected"
+    except ValueError:
+        pass
+
+
+def test_stored_fasta_upload_fetch_by_id():
+    import gzip
+    from fastapi.testclient import TestClient
+    from main import app
+    client = TestClient(app)
+
+    genome = ''.join('ACGT'[(i * 7) % 4] for i in range(1000))
+    fasta = '>hCoV-19/Test/1/2021|EPI_ISL_1 a\n' + '\n'.join(genome[i:i + 60] for i in range(0, 1000, 60)) + '\n>s2\nNNNN\n'
+    result = client.post('/upload?store=true', files={'files': ('g.fasta.gz', gzip.compress(fasta.encode()))}).json()['results'][0]
+    assert result['indexed'] and result['indexed_sequences'] == 2
+    url = result['sequences_url']
+
+    assert client.get(url).json()['sequences'] == [{'id': 'hCoV-19/Test/1/2021|EPI_ISL_1', 'length': 1000}, {'id': 's2', 'length': 4}]
+    text = client.get(f'{url}/hCoV-19/Test/1/2021|EPI_ISL_1').text
+    assert ''.join(text.splitlines()[1:]) == genome
+    region = client.get(f'{url}/hCoV-19/Test/1/2021|EPI_ISL_1', params={'start': 55, 'end': 130}).text
+    assert region.splitlines()[0].endswith(':55-130') and ''.join(region.splitlines()[1:]) == genome[54:130]
+    assert client.get(f'{url}/missing').status_code == 404
+    assert client.get(url.replace('/sequences', '/fai')).text.splitlines()[1] == 's2\t4\t1054\t4\t5'
+
+    csv_result = client.post('/upload?store=true', files={'files': ('t.csv', b'a,b\n1,2\n')}).json()['results'][0]
+    assert client.get(f"/uploads/{csv_result['upload_id']}/sequences").status_code == 404
@@ -0,0 +1,75 @@
+import gzip
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+import numpy as np
+
+from data_processing.mutation_caller import BASE_CODE
+from data_processing.sequence_store import SequenceStore
+
+
+def test_round_trip_with_ambiguity_runs(tmp_path):
+    store = SequenceStore(str(tmp_path))
+    sequence = b'nnnACGTRYKM--acgtNNNNNGATTACA' * 3 + b'T'
+    store.put('s1', sequence.decode())
+    stored = store.get('s1')
+    expected = sequence.upper()
+
+    assert stored.decode() == expected and len(stored) == len(expected)
+    assert stored.packed.nbytes == -(-len(expected) // 4)
+    # 读取不复制数据：packed 是映射文件的切片
+    assert isinstance(stored.packed, np.memmap) and stored.packed_view.nbytes == stored.packed.nbytes
+    for start in range(len(expected)):
+        for end in (start, start + 1, start + 7, len(expected) + 10):
+            assert stored.decode(start, end) == expected[start:end]
+    assert np.array_equal(stored.codes(), BASE_CODE[np.frombuffer(expected, dtype=np.uint8)])
+    assert store.get('missing') is None
+
+
+def test_identical_sequences_are_stored_once(tmp_path):
+    store = SequenceStore(str(tmp_path))
+    fasta = b'>a\nACGTNNACGT\nACGT\n>b\nACGTNNACGTACGT\n>c\nTTTT\n'
+    assert store.ingest_fasta([fasta]) == {'count': 3, 'new': 2, 'deduplicated': 1, 'bases': 18, 'packed_bytes': 5}
+    size = os.path.getsize(store.packed_path)
+
+    # 重复导入只做哈希比对，不再写入
+    again = store.ingest_fasta([fasta[:9], fasta[9:]])
+    assert again['new'] == 0 and again['deduplicated'] == 3
+    assert os.path.getsize(store.packed_path) == size
+    assert store.get('a').sha256 == store.get('b').sha256
+    assert store.ids_for_hash(store.get('a').sha256) == ['a', 'b']
+
+    # 同一 id 指向新内容
+    store.put('c', 'GGGG')
+    assert store.get('c').decode() == b'GGGG'
+    stats = SequenceStore(str(tmp_path)).stats()
+    assert stats['records'] == 3 and stats['sequences'] == 3
+
+
+def test_sequences_endpoint(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+    import routers.sequences
+    store = SequenceStore(str(tmp_path))
+    monkeypatch.setattr(main, 'sequence_store', store)
+    monkeypatch.setattr(routers.sequences, 'sequence_store', store)
+    client = TestClient(main.app)
+
+    genome = 'ACGT' * 30 + 'NNNN' + 'TTGCA' * 10
+    fasta = gzip.compress(f'>hCoV-19/Test/1/2021|EPI_ISL_1 sample\n{genome}\n'.encode())
+    files = [('files', ('a.fasta.gz', fasta)), ('files', ('b.fasta.gz', fasta)), ('files', ('c.csv', b'a,b\n1,2\n'))]
+    results = client.post('/sequences', files=files).json()['results']
+    assert [r['status'] for r in results] == ['success', 'success', 'error']
+    assert results[0]['new'] + results[1]['new'] == 1
+
+    seq_id = 'hCoV-19/Test/1/2021|EPI_ISL_1'
+    info = client.get(f'/sequences/{seq_id}').json()
+    assert info['length'] == len(genome) and info['exception_bases'] == 4
+    text = client.get(f'/sequences/{seq_id}/fasta').text
+    assert text.splitlines()[0] == f'>{seq_id}' and ''.join(text.splitlines()[1:]) == genome
+    region = client.get(f'/sequences/{seq_id}/fasta', params={'start': 119, 'end': 126}).text
+    assert region == f'>{seq_id}:119-126\n{genome[118:126]}\n'
+    assert client.get('/sequences/unknown/fasta').status_code == 404
+    assert client.get('/sequences/stats').json()['records'] == 1
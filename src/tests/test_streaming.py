@@ -0,0 +1,87 @@
+import asyncio
+import itertools
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from metrics.registry import SSE_STREAMS
+from streaming.sse import EventStreamResponse, pump
+
+
+def parse_events(text):
+    events = []
+    for block in text.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_variant_events_stream_results_and_progress():
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    samples = [
+        {"sequence_id": f"s{i}", "mutations": ["S:D614G", f"N:R{200 + i}K"], "location": "Wuhan", "date": "2020-03-01"}
+        for i in range(7)
+    ]
+    payload = {"analysis_type": "variant", "data": samples}
+    response = client.post('/analyze/variants/events', json=payload)
+    assert response.headers['content-type'].startswith('text/event-stream')
+    events = parse_events(response.text)
+
+    assert [data for name, data in events if name == 'result'] == client.post('/analyze/variants', json=payload).json()['results']
+    progress = [data['percent'] for name, data in events if name == 'progress']
+    assert progress[0] == 0 and progress[-1] == 100 and progress == sorted(progress)
+    assert events[-1] == ('done', {'count': 7, 'seconds': events[-1][1]['seconds']})
+
+    predictions = parse_events(client.post('/ai_predict/events', json=["S:D614G", "S:N501Y", "bad"]).text)
+    assert [data['mutation'] for name, data in predictions if name == 'result'] == ["S:D614G", "S:N501Y", "bad"]
+
+
+def test_slow_client_pauses_computation_and_disconnect_cancels_it():
+    produced = []
+    closed = threading.Event()
+
+    def events():
+        try:
+            for i in itertools.count():
+                produced.append(i)
+                yield f"data: {i}\n\n".encode()
+        finally:
+            closed.set()
+
+    cancelled_before = SSE_STREAMS.value(endpoint='test', outcome='cancelled')
+
+    async def scenario():
+        sent = []
+        stalled = {}
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.body' and message.get('body'):
+                sent.append(message['body'])
+                if len(sent) == 3:
+                    # 客户端停止读取：计算线程最多领先约 buffer_bytes 字节（这里每个事件 9-10 字节）
+                    await asyncio.sleep(0.5)
+                    stalled['produced'] = len(produced)
+                    disconnect.set()
+                    await asyncio.sleep(30)
+
+        response = EventStreamResponse(pump(events(), 'test', buffer_bytes=40))
+        await asyncio.wait_for(response({'type': 'http', 'asgi': {'spec_version': '2.4'}}, receive, send), 10)
+        return sent, stalled
+
+    sent, stalled = asyncio.run(scenario())
+    assert len(sent) == 3
+    assert stalled['produced'] <= len(sent) + 5 + 1
+    assert closed.wait(5)
+    assert len(produced) <= stalled['produced'] + 1
+    assert SSE_STREAMS.value(endpoint='test', outcome='cancelled') == cancelled_before + 1